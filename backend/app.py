@@ -1,15 +1,31 @@
 # app.py - API Flask pour Football Manager 2023
 import os
-from flask import Flask, jsonify, request, send_file
+import json
+import hmac
+import math
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
 from config import config
-from models import db, Player
-from sqlalchemy import func, or_
-import pandas as pd
+from models import db, Player, PlayerPosition, ImportJob, RATED_ATTRIBUTES, AVERAGE_GROUPS, BASIC_FIELDS, DETAIL_FIELDS, DETAIL_GROUPS
+from attribute_store import ALL_GROUPS, histogram_summary, store as attribute_store
+from search_index import index as search_index
+from roles import ROLES, ROLE_INDEX
+from positions import CANONICAL_POSITIONS, POSITION_GROUPS, POSITION_INDEX, parse_positions, position_group
+from units import SHADOW_COLUMNS
+from cache import SharedVersion, count_cache, create_response_cache
+from metrics import metrics
+from exports import (EXPORT_BATCH_SIZE, PLAYER_EXPORT_FORMATS, XLSX_MIMETYPE, ExportBusy, PlayerExporter,
+                     csv_stream, xlsx_file)
+from jobs import JobRunner, TERMINAL_STATUSES
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter, keyset_order
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.exc import IntegrityError
 from io import BytesIO
+from urllib.parse import urlencode
 from functools import wraps
+from concurrent.futures import TimeoutError as FuturesTimeout
+from werkzeug.datastructures import MultiDict
 from werkzeug.security import check_password_hash, generate_password_hash
-import jwt
 from datetime import datetime, timedelta
 
 # === Déterminer l'environnement ===
@@ -28,6 +44,127 @@ CORS(app,
 # Initialisation de SQLAlchemy
 db.init_app(app)
 
+# Métriques par route : enregistrées avant les autres before_request pour les inclure dans la latence
+metrics.init_app(app)
+
+# Cache des réponses agrégées (invalidé à chaque écriture admin)
+response_cache = create_response_cache(app.config)
+# Écritures des autres workers gunicorn (cf. sync_data_version)
+data_version = SharedVersion(app.config['DATA_VERSION_FILE'])
+player_exporter = PlayerExporter.from_config(app.config)
+
+# ====================
+# STRUCTURES EN MÉMOIRE
+# ====================
+# Au-delà de ce nombre de lignes modifiées, on reconstruit au lieu de patcher
+INCREMENTAL_REFRESH_LIMIT = 100
+
+def warm_up(resume_jobs=True):
+    """Construit les structures en mémoire avant de servir des requêtes
+
+    resume_jobs=False : processus maître gunicorn, les tâches sont relancées après le fork (gunicorn.conf.py)
+    """
+    with app.app_context():
+        # Matrice et structures dérivées (centiles, notes de rôle, facettes, similarité)
+        attribute_store.snapshot().prepare()
+        if app.config['SEARCH_BACKEND'] == 'memory':
+            search_index.ensure_loaded()
+    if resume_jobs:
+        # Imports interrompus par un redémarrage
+        import_jobs.resume()
+
+def notify_players_changed(players=None, deleted_ids=None):
+    """Répercute une écriture admin sur les structures en mémoire (rien = tout recharger)"""
+    data_version.bump()
+    count_cache.clear()
+    response_cache.invalidate()
+    if players is None and deleted_ids is None:
+        attribute_store.invalidate()
+        search_index.invalidate()
+        return
+    
+    players = players or []
+    if len(players) > INCREMENTAL_REFRESH_LIMIT:
+        attribute_store.invalidate()
+        search_index.invalidate()
+        players = []
+    for player in players:
+        attribute_store.refresh_player(player)
+        search_index.upsert(player)
+    for player_id in deleted_ids or []:
+        attribute_store.remove_player(player_id)
+        search_index.remove(player_id)
+
+@app.before_request
+def sync_data_version():
+    """Écriture faite par un autre worker : caches et structures en mémoire de ce processus à recharger"""
+    if data_version.changed():
+        count_cache.clear()
+        response_cache.invalidate_local()
+        attribute_store.invalidate()
+        search_index.invalidate()
+
+def notify_imported_players(player_ids):
+    """Après un import : rafraîchissement ligne à ligne si peu de joueurs, sinon rechargement"""
+    if len(player_ids) > INCREMENTAL_REFRESH_LIMIT:
+        notify_players_changed()
+    else:
+        notify_players_changed(players=Player.query.filter(Player.id.in_(player_ids)).all())
+
+# Paramètres lus par store_filters, player_filters et scout_predicates (clés de cache)
+STORE_FILTER_PARAMS = ("position", "nationality", "club", "preferred_foot", "min_age", "max_age", "age_min", "age_max")
+PLAYER_FILTER_PARAMS = STORE_FILTER_PARAMS \
+    + tuple(f"{bound}_avg_{group}" for group in AVERAGE_GROUPS for bound in ("min", "max")) \
+    + tuple(f"{bound}_{column}" for column in SHADOW_COLUMNS for bound in ("min", "max"))
+SCOUT_PARAMS = tuple(f"{bound}_{attribute}" for attribute in RATED_ATTRIBUTES for bound in ("min", "max"))
+
+def cached_response(*params):
+    """Met en cache la réponse JSON d'une route en lecture seule (clé = chemin + params connus, triés)
+
+    Les autres paramètres sont ignorés : ils ne changent pas la réponse et ne doivent pas
+    multiplier les entrées du cache.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = request.path + "?" + urlencode(sorted(
+                (name, request.args[name]) for name in params if name in request.args
+            ))
+            
+            def render():
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    failures.append(response)
+                    return None
+                return response.get_data(), response.mimetype
+            
+            failures = []
+            cached = response_cache.get_or_set(key, render)
+            if cached is None:
+                return failures[0]
+            body, mimetype = cached
+            return app.response_class(body, mimetype=mimetype)
+        
+        return decorated
+    return decorator
+
+def age_filters(args):
+    """Bornes d'âge (min_age / max_age, ou leurs alias age_min / age_max), communes aux chemins mémoire et SQL"""
+    return {
+        "min_age": args.get("min_age", type=int) or args.get("age_min", type=int) or None,
+        "max_age": args.get("max_age", type=int) or args.get("age_max", type=int) or None
+    }
+
+def store_filters(args):
+    """Filtres de /api/players applicables à la matrice en mémoire"""
+    return {
+        "position": args.get("position"),
+        "nationality": args.get("nationality"),
+        "club": args.get("club"),
+        "preferred_foot": args.get("preferred_foot"),
+        **age_filters(args)
+    }
+
 # ====================
 # PAGE D'ACCUEIL
 # ====================
@@ -38,6 +175,7 @@ def home():
         total_players = Player.query.count()
     except Exception as e:
         total_players = 0
+        metrics.record_exception(e)
         print(f"Erreur DB: {e}")
     
     return jsonify({
@@ -56,53 +194,176 @@ def home():
 # ====================
 # JOUEURS - LISTE
 # ====================
+def player_filters(args):
+    """Filtres de /api/players normalisés (les valeurs vides sont ignorées)"""
+    filters = {
+        "position": args.get("position"),
+        "nationality": args.get("nationality"),
+        # ILIKE : insensible à la casse
+        "club": (args.get("club") or "").strip().lower() or None,
+        "preferred_foot": args.get("preferred_foot"),
+        **age_filters(args)
+    }
+    for group in AVERAGE_GROUPS:
+        filters[f"min_avg_{group}"] = args.get(f"min_avg_{group}", type=float)
+        filters[f"max_avg_{group}"] = args.get(f"max_avg_{group}", type=float)
+    for column in SHADOW_COLUMNS:
+        filters[f"min_{column}"] = args.get(f"min_{column}", type=float)
+        filters[f"max_{column}"] = args.get(f"max_{column}", type=float)
+    return {key: value for key, value in filters.items() if value is not None and value != ""}
+
+def requested_fields(default, value=None):
+    """Champs demandés via fields= (ValueError si un champ est inconnu)"""
+    return Player.parse_fields(value if value is not None else request.args.get("fields"), default)
+
+def filter_signature(filters):
+    """Clé de cache d'une combinaison de filtres"""
+    return tuple(sorted(filters.items()))
+
+def filtered_players_query(args):
+    """Requête Player avec les filtres de /api/players"""
+    filters = player_filters(args)
+    query = Player.query
+    
+    if "position" in filters: query = query.filter(position_filter(filters["position"]))
+    if "nationality" in filters: query = query.filter(Player.nationality == filters["nationality"])
+    if "club" in filters: query = query.filter(Player.club.ilike(f"%{filters['club']}%"))
+    if "preferred_foot" in filters: query = query.filter(Player.preferred_foot == filters["preferred_foot"])
+    if "min_age" in filters: query = query.filter(Player.age >= filters["min_age"])
+    if "max_age" in filters: query = query.filter(Player.age <= filters["max_age"])
+    
+    # Moyennes matérialisées (colonnes indexées avg_*)
+    for group in AVERAGE_GROUPS:
+        column = getattr(Player, f"avg_{group}")
+        if f"min_avg_{group}" in filters: query = query.filter(column >= filters[f"min_avg_{group}"])
+        if f"max_avg_{group}" in filters: query = query.filter(column <= filters[f"max_avg_{group}"])
+    
+    # Taille, poids, valeur (euros) et statistiques converties en nombres (colonnes indexées)
+    for name in SHADOW_COLUMNS:
+        column = getattr(Player, name)
+        if f"min_{name}" in filters: query = query.filter(column >= filters[f"min_{name}"])
+        if f"max_{name}" in filters: query = query.filter(column <= filters[f"max_{name}"])
+    
+    return query
+
+def position_filter(position):
+    """Joueurs ayant l'un des postes canoniques désignés ("DM", "D (RL)", "D"...), via l'index de player_positions"""
+    tokens = parse_positions(position, expand=True)
+    return Player.id.in_(db.select(PlayerPosition.player_id).where(PlayerPosition.position.in_(tokens)))
+
+def count_players(query, signature, estimate=False):
+    """Total d'une liste filtrée : (total, estimé ?) ; exact mis en cache par signature"""
+    total = count_cache.get(signature)
+    if total is not None:
+        return total, False
+    
+    if estimate and db.engine.dialect.name == 'postgresql':
+        return estimate_players_count(query, signature), True
+    
+    total = query.order_by(None).count()
+    count_cache.set(signature, total)
+    return total, False
+
+def estimate_players_count(query, signature):
+    """Estimation PostgreSQL : statistiques de la table ou plan du planificateur"""
+    if not signature:
+        reltuples = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": Player.__tablename__}
+        ).scalar()
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+    
+    compiled = query.order_by(None).statement.compile(db.engine)
+    plan = db.session.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
 @app.route("/api/players")
 def get_players():
-    """Récupère les joueurs avec filtres"""
+    """Récupère les joueurs avec filtres (?cursor= pour la pagination par curseur, ?fields= pour les champs)"""
     try:
-        page = request.args.get("page", 1, type=int)
-        per_page = min(request.args.get("per_page", 50, type=int), 100)
-        
-        position = request.args.get("position")
-        nationality = request.args.get("nationality")
-        club = request.args.get("club")
-        min_age = request.args.get("min_age", type=int)
-        max_age = request.args.get("max_age", type=int)
+        fields = requested_fields(BASIC_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        page = max(request.args.get("page", 1, type=int), 1)
+        # Borné dans les deux modes (0 ou négatif : LIMIT invalide / page vide)
+        per_page = max(1, min(request.args.get("per_page", 50, type=int), app.config['MAX_ITEMS_PER_PAGE']))
         
         sort_by = request.args.get("sort_by", "name")
         order = request.args.get("order", "asc")
         
-        query = Player.query
+        sort_column = Player.sortable_column(sort_by)
+        if sort_column is None:
+            sort_by, sort_column = "name", Player.name
+        descending = order == "desc"
         
-        if position: query = query.filter(Player.position == position)
-        if nationality: query = query.filter(Player.nationality == nationality)
-        if club: query = query.filter(Player.club.ilike(f"%{club}%"))
-        if min_age: query = query.filter(Player.age >= min_age)
-        if max_age: query = query.filter(Player.age <= max_age)
+        query = filtered_players_query(request.args)
+        query = query.order_by(*keyset_order(sort_column, Player.id, descending))
         
-        if hasattr(Player, sort_by):
-            sort_column = getattr(Player, sort_by)
-            if order == "desc":
-                query = query.order_by(sort_column.desc())
-            else:
-                query = query.order_by(sort_column.asc())
-        else:
-             query = query.order_by(Player.name.asc())
+        if "cursor" in request.args:
+            return players_cursor_page(query, sort_by, sort_column, order, per_page, fields)
         
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Total mis en cache par combinaison de filtres : une seule requête sur un succès
+        total, estimated = count_players(
+            query, filter_signature(player_filters(request.args)),
+            estimate=request.args.get("total") == "estimate"
+        )
+        items = query.options(Player.load_fields(fields)).limit(per_page).offset((page - 1) * per_page).all()
+        
+        pagination = {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "pages": math.ceil(total / per_page)
+        }
+        if estimated:
+            pagination["total_is_estimate"] = True
         
         return jsonify({
-            "players": [p.to_dict() for p in paginated.items],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": paginated.total,
-                "pages": paginated.pages
-            }
+            "players": [p.to_dict(fields=fields) for p in items],
+            "pagination": pagination
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def players_cursor_page(query, sort_by, sort_column, order, per_page, fields):
+    """Page keyset : aucun OFFSET ni COUNT, coût constant quelle que soit la profondeur"""
+    try:
+        position = decode_cursor(request.args.get("cursor"), sort_by, order)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if position is not None:
+        value, last_id = position
+        query = query.filter(keyset_filter(
+            sort_column, Player.id, order == "desc", value, last_id, db.engine.dialect.name
+        ))
+    
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    rows = query.options(Player.load_fields(fields, sort_by)).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, order, getattr(last, sort_by), last.id)
+    
+    return jsonify({
+        "players": [p.to_dict(fields=fields) for p in rows],
+        "pagination": {
+            "per_page": per_page,
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        }
+    })
+
 # ====================
 #  EXPORT JOUEUR 
 # ====================
@@ -110,106 +371,75 @@ def get_players():
 def export_player(player_id, format):
     """
     Exporte les données d'un joueur unique
-    Formats: csv, excel, pdf
+    Formats: csv, excel, pdf (rendus hors requête, cf. exports.PlayerExporter)
     """
-    # Imports locaux pour éviter les erreurs si libs manquantes
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-    except ImportError:
-        print("ReportLab non installé")
-
-    # Récupérer le joueur
+    if format not in PLAYER_EXPORT_FORMATS:
+        return jsonify({"error": "Format non supporté"}), 400
+    
     player = Player.query.get_or_404(player_id)
     player_data = player.to_dict(include_all_stats=True)
     
-    if format == 'csv':
-        output = BytesIO()
-        # Aplatir les données pour le CSV
-        rows = []
-        for key, value in player_data.items():
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    rows.append([f"{key}_{k}", str(v)])
-            else:
-                rows.append([key, str(value)])
-        
-        df = pd.DataFrame(rows, columns=['Attribut', 'Valeur'])
-        df.to_csv(output, index=False, encoding='utf-8-sig')
-        output.seek(0)
-        
-        return send_file(
-            output,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'{player.name.replace(" ", "_")}_stats.csv'
-        )
+    try:
+        content = player_exporter.render(player.id, format, player.name, player_data)
+    except ExportBusy as e:
+        return jsonify({"error": str(e)}), 503
+    except FuturesTimeout:
+        return jsonify({"error": "Délai de génération dépassé"}), 504
+    except ImportError as e:
+        return jsonify({"error": f"Export {format} indisponible : {e}"}), 501
     
-    elif format == 'excel':
-        output = BytesIO()
-        rows = []
-        for key, value in player_data.items():
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    rows.append({'Catégorie': key, 'Attribut': k, 'Valeur': str(v)})
-            else:
-                rows.append({'Catégorie': 'Général', 'Attribut': key, 'Valeur': str(value)})
-        
-        df = pd.DataFrame(rows)
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Statistiques')
-        
-        output.seek(0)
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'{player.name.replace(" ", "_")}_stats.xlsx'
-        )
+    mimetype, extension = PLAYER_EXPORT_FORMATS[format]
+    return send_file(
+        BytesIO(content),
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=f'{player.name.replace(" ", "_")}_stats.{extension}'
+    )
+
+# ====================
+# EXPORT EN MASSE
+# ====================
+@app.route("/api/export/csv", methods=["POST"])
+def export_players():
+    """
+    Exporte la liste filtrée en flux : {format: csv|excel, columns: [...], filters: {...}}
+    filters reprend les paramètres de /api/players (dont sort_by / order)
+    """
+    data = request.get_json(silent=True) or {}
+    export_format = data.get("format", "csv")
+    if export_format not in ("csv", "excel"):
+        return jsonify({"error": "Format non supporté"}), 400
     
-    elif format == 'pdf':
-        output = BytesIO()
-        doc = SimpleDocTemplate(output, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24, spaceAfter=20, alignment=1)
-        elements.append(Paragraph(f"Fiche: {player.name}", title_style))
-        
-        # Données tabulaires
-        data = [['Catégorie', 'Attribut', 'Valeur']]
-        for key, value in player_data.items():
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    data.append([key, k, str(v)])
-            else:
-                data.append(['Général', key, str(value)])
-
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(table)
-        
-        doc.build(elements)
-        output.seek(0)
-        
-        return send_file(
-            output,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'{player.name.replace(" ", "_")}_stats.pdf'
-        )
+    # Les groupes (technical, mental...) sont éclatés en colonnes
+    columns = []
+    for field in data.get("columns") or BASIC_FIELDS:
+        names = Player.field_columns(field)
+        if names is None:
+            return jsonify({"error": f"Colonne inconnue : {field}"}), 400
+        columns.extend(names if field in DETAIL_GROUPS else [field])
+    columns = list(dict.fromkeys("id" if c == "uid" else c for c in columns))
+    labels = data.get("labels") or {}
+    header = [labels.get(c, c) for c in columns]
     
-    else:
-        return jsonify({"error": "Format non supporté"}), 400
+    args = MultiDict(data.get("filters") or {})
+    sort_column = Player.sortable_column(args.get("sort_by", "name")) or Player.name
+    statement = filtered_players_query(args) \
+        .with_entities(*[getattr(Player, c) for c in columns]) \
+        .order_by(*keyset_order(sort_column, Player.id, args.get("order") == "desc")).statement
+    # Curseur côté serveur, lu par lots sans passer par le chargement ORM
+    rows = db.session.connection().execution_options(
+        stream_results=True, yield_per=EXPORT_BATCH_SIZE
+    ).execute(statement)
+    
+    if export_format == "excel":
+        return send_file(xlsx_file(header, rows), mimetype=XLSX_MIMETYPE,
+                         as_attachment=True, download_name="sokrstat_export.xlsx")
+    
+    return Response(
+        stream_with_context(csv_stream(header, rows)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=sokrstat_export.csv"}
+    )
 
 # ====================
 # JOUEUR DÉTAILLÉ
@@ -218,13 +448,60 @@ def export_player(player_id, format):
 def get_player(player_id):
     """Récupère un joueur par ID"""
     try:
-        player = Player.query.filter(
+        fields = requested_fields(DETAIL_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        player = Player.query.options(Player.load_fields(fields)).filter(
             or_(Player.id == player_id, Player.id == int(player_id) if str(player_id).isdigit() else False)
         ).first_or_404()
-        return jsonify(player.to_dict(include_all_stats=True))
+        return jsonify(player.to_dict(fields=fields))
     except Exception:
          return jsonify({"error": "Joueur introuvable"}), 404
 
+@app.route("/api/players/<int:player_id>/similar")
+def similar_players(player_id):
+    """Joueurs au profil le plus proche (cosinus ou distance euclidienne sur les attributs notés)"""
+    k = max(1, min(request.args.get("k", 10, type=int), 50))
+    metric = request.args.get("metric", "cosine")
+    if metric not in ("cosine", "euclidean"):
+        return jsonify({"error": "metric doit valoir cosine ou euclidean"}), 400
+
+    snapshot = attribute_store.snapshot()
+    i = snapshot.row_of(player_id)
+    if i is None:
+        return jsonify({"error": "Joueur introuvable"}), 404
+
+    # position=same : même groupe de poste que le joueur ; sinon GK, DEF, MID, ATT
+    # ou une position FM dont on prend le groupe
+    position = request.args.get("position")
+    group = None
+    if position:
+        if position == "same":
+            code = snapshot.position_groups[i]
+            label = POSITION_GROUPS[code] if code >= 0 else None
+        elif position.upper() in POSITION_GROUPS:
+            label = position.upper()
+        else:
+            label = position_group(position)
+        if label is None:
+            return jsonify({"error": f"Position inconnue : {position}"}), 400
+        group = POSITION_GROUPS.index(label)
+
+    filters = store_filters(request.args)
+    filters["position"] = None
+    mask = snapshot.filter_mask(**filters) if any(filters.values()) else None
+
+    rows, scores = snapshot.nearest(i, k, metric=metric, group=group, mask=mask)
+    score_key = "similarity" if metric == "cosine" else "distance"
+    return jsonify({
+        "player": snapshot.describe(i),
+        "metric": metric,
+        "position_group": POSITION_GROUPS[group] if group is not None else None,
+        "results": [dict(snapshot.describe(r), **{score_key: round(float(s), 4)}) for r, s in zip(rows, scores)]
+    })
+
 # ====================
 # RECHERCHE
 # ====================
@@ -236,15 +513,148 @@ def search_players():
     
     if not query_text: return jsonify([])
     
-    players = Player.query.filter(
-        or_(
-            Player.name.ilike(f"%{query_text}%"),
-            Player.club.ilike(f"%{query_text}%"),
-            Player.nationality.ilike(f"%{query_text}%")
+    try:
+        fields = requested_fields(BASIC_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    load = Player.load_fields(fields)
+    
+    if app.config['SEARCH_BACKEND'] == 'memory':
+        # Index trigrammes en mémoire : seuls les résultats sont lus en base
+        ids = search_index.search(query_text, limit)
+        by_id = {p.id: p for p in Player.query.options(load).filter(Player.id.in_(ids)).all()} if ids else {}
+        players = [by_id[i] for i in ids if i in by_id]
+    else:
+        # Repli SQL (index GIN pg_trgm sur PostgreSQL, cf. init_db.py)
+        pattern = f"%{query_text}%"
+        rank = case(
+            (Player.name.ilike(f"{query_text}%"), 0),
+            (Player.name.ilike(pattern), 1),
+            (Player.club.ilike(pattern), 2),
+            else_=3
         )
-    ).limit(limit).all()
+        players = Player.query.options(load).filter(
+            or_(
+                Player.name.ilike(pattern),
+                Player.club.ilike(pattern),
+                Player.nationality.ilike(pattern)
+            )
+        ).order_by(rank, Player.name).limit(limit).all()
+    
+    return jsonify([p.to_dict(fields=fields) for p in players])
+
+# ====================
+# SCOUTING MULTI-CRITÈRES
+# ====================
+# Filtres de /api/players que la matrice en mémoire sait évaluer
+STORE_FILTER_KEYS = {"position", "nationality", "club", "preferred_foot", "min_age", "max_age"}
+
+def scout_predicates(args):
+    """Seuils min_<attribut> / max_<attribut> sur les attributs notés : [(attribut, borne, valeur)]"""
+    predicates = []
+    for attribute in RATED_ATTRIBUTES:
+        for bound in ("min", "max"):
+            value = args.get(f"{bound}_{attribute}", type=int)
+            if value is not None:
+                predicates.append((attribute, bound, value))
+    return predicates
+
+@app.route("/api/scout")
+def scout_players():
+    """
+    Recherche par seuils sur n'importe quel attribut noté, combinés aux filtres de /api/players
+    Ex : ?min_finishing=15&min_pace=14&max_age=23&position=ST&sort_by=finishing&order=desc
+    """
+    predicates = scout_predicates(request.args)
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = max(min(request.args.get("per_page", 50, type=int), 100), 1)
+    order = request.args.get("order", "asc")
+    sort_by = request.args.get("sort_by", "name")
+    if Player.sortable_column(sort_by) is None:
+        sort_by = "name"
+    
+    # Par défaut : fiche de liste + attributs utilisés par la requête
+    default_fields = BASIC_FIELDS + [a for a in dict.fromkeys([a for a, _, _ in predicates] + [sort_by])
+                                     if a in RATED_ATTRIBUTES]
+    try:
+        fields = requested_fields(default_fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    filters = player_filters(request.args)
+    in_memory = (app.config['SCOUT_BACKEND'] == 'memory'
+                 and filters.keys() <= STORE_FILTER_KEYS
+                 and (sort_by in RATED_ATTRIBUTES or sort_by in ("name", "age", "id")))
+    
+    if in_memory:
+        snapshot = attribute_store.snapshot()
+        mask = snapshot.threshold_mask(predicates, snapshot.filter_mask(**store_filters(request.args)))
+        total = int(mask.sum())
+        rows = snapshot.page(mask, sort_by, order == "desc", (page - 1) * per_page, per_page)
+        ids = [int(snapshot.ids[i]) for i in rows]
+        by_id = {p.id: p for p in Player.query.options(Player.load_fields(fields)).filter(Player.id.in_(ids))} if ids else {}
+        players = [by_id[i] for i in ids if i in by_id]
+    else:
+        # SQL généré : mêmes filtres que /api/players, puis les seuils
+        query = filtered_players_query(request.args)
+        for attribute, bound, value in predicates:
+            column = getattr(Player, attribute)
+            query = query.filter(column >= value if bound == "min" else column <= value)
+        query = query.order_by(*keyset_order(Player.sortable_column(sort_by), Player.id, order == "desc"))
+        signature = filter_signature(filters) + (("scout", tuple(predicates)),)
+        total, _ = count_players(query, signature)
+        players = query.options(Player.load_fields(fields)).limit(per_page).offset((page - 1) * per_page).all()
     
-    return jsonify([p.to_dict() for p in players])
+    return jsonify({
+        "players": [p.to_dict(fields=fields) for p in players],
+        "pagination": {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "pages": math.ceil(total / per_page)
+        }
+    })
+
+# ====================
+# RÔLES
+# ====================
+@app.route("/api/roles")
+@cached_response()
+def list_roles():
+    """Rôles notés : postes concernés, attributs clés et préférables"""
+    return jsonify([{
+        "role": key,
+        "label": role["label"],
+        "positions": role["positions"],
+        "key_attributes": role["key"],
+        "preferable_attributes": role["preferable"]
+    } for key, role in ROLES.items()])
+
+@app.route("/api/roles/<role>/top")
+def top_role_players(role):
+    """
+    Meilleures notes dans un rôle, parmi les joueurs de ses postes (ou de position=...)
+    Ex : /api/roles/inside_forward/top?age_max=21&limit=20
+    """
+    if role not in ROLES:
+        return jsonify({"error": f"Rôle inconnu : {role}"}), 404
+    limit = max(min(request.args.get("limit", 20, type=int), 100), 1)
+    
+    snapshot = attribute_store.snapshot()
+    filters = store_filters(request.args)
+    mask = snapshot.filter_mask(**filters)
+    if not filters["position"]:
+        mask &= snapshot.role_mask(role)
+    
+    ratings = snapshot.role_ratings[:, ROLE_INDEX[role]]
+    return jsonify({
+        "role": role,
+        "label": ROLES[role]["label"],
+        "players": [
+            {**snapshot.describe(i), "rating": round(float(ratings[i]), 1)}
+            for i in snapshot.top_role(role, limit, mask)
+        ]
+    })
 
 # ====================
 # 🔐 AUTHENTIFICATION ADMIN
@@ -252,14 +662,21 @@ def search_players():
 
 # Credentials admin (en production, utiliser des variables d'environnement)
 ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
-ADMIN_PASSWORD_HASH = os.environ.get('ADMIN_PASSWORD_HASH', 
-    generate_password_hash('admin123'))  # Changez ce mot de passe !
+ADMIN_PASSWORD_HASH = os.environ.get('ADMIN_PASSWORD_HASH')
 SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-prod')
 
+def admin_password_hash():
+    """Hash du mot de passe admin (celui par défaut, coûteux à calculer, seulement au premier login)"""
+    global ADMIN_PASSWORD_HASH
+    if ADMIN_PASSWORD_HASH is None:
+        ADMIN_PASSWORD_HASH = generate_password_hash('admin123')  # Changez ce mot de passe !
+    return ADMIN_PASSWORD_HASH
+
 def token_required(f):
     """Décorateur pour protéger les routes admin"""
     @wraps(f)
     def decorated(*args, **kwargs):
+        import jwt
         token = request.headers.get('Authorization')
         
         if not token:
@@ -286,6 +703,7 @@ def token_required(f):
 @app.route("/api/auth/login", methods=["POST"])
 def login():
     """Connexion admin"""
+    import jwt
     data = request.get_json()
     username = data.get('username')
     password = data.get('password')
@@ -294,7 +712,7 @@ def login():
         return jsonify({'error': 'Identifiants manquants'}), 400
     
     # Vérifier les credentials
-    if username == ADMIN_USERNAME and check_password_hash(ADMIN_PASSWORD_HASH, password):
+    if username == ADMIN_USERNAME and check_password_hash(admin_password_hash(), password):
         # Générer token JWT valide 24h
         token = jwt.encode({
             'username': username,
@@ -316,19 +734,29 @@ def verify_token():
     return jsonify({'message': 'Token valide'})
 
 # Ajouter un joueur
+ADD_PLAYER_ATTEMPTS = 5  # ajouts simultanés : ids déjà pris avant de renoncer (409)
+
 @app.route("/api/players", methods=["POST"])
 @token_required
 def add_player():
     data = request.get_json()
-    new_player = Player(
-        name=data['name'],
-        age=data['age'],
-        nationality=data['nationality'],
-        club=data['club'],
-        position=data['position']
-    )
-    db.session.add(new_player)
-    db.session.commit()
+    fields = {key: data[key] for key in ('name', 'age', 'nationality', 'club', 'position')}
+    # uid n'est pas auto-incrémenté (identifiant FM) : même attribution que bulk_upsert_players.
+    # Deux ajouts simultanés peuvent lire le même max : le perdant réessaie avec l'id suivant
+    for _ in range(ADD_PLAYER_ATTEMPTS):
+        next_id = (db.session.execute(db.select(func.max(Player.id))).scalar() or 0) + 1
+        new_player = Player(id=next_id, **fields)
+        new_player.refresh_averages()
+        new_player.refresh_positions()
+        db.session.add(new_player)
+        try:
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+    else:
+        return jsonify({"error": "Identifiant indisponible, réessayez"}), 409
+    notify_players_changed(players=[new_player])
     return jsonify({"message": "Joueur ajouté", "id": new_player.id}), 201
 
 # Modifier un joueur
@@ -341,8 +769,10 @@ def update_player(player_id):
     player.name = data.get('name', player.name)
     player.age = data.get('age', player.age)
     player.club = data.get('club', player.club)
+    player.refresh_averages()
     
     db.session.commit()
+    notify_players_changed(players=[player])
     return jsonify({"message": "Joueur mis à jour"})
 
 # Supprimer un joueur
@@ -352,6 +782,7 @@ def delete_player(player_id):
     player = Player.query.get_or_404(player_id)
     db.session.delete(player)
     db.session.commit()
+    notify_players_changed(deleted_ids=[player_id])
     return jsonify({"message": "Joueur supprimé"})
 
 # ====================
@@ -367,10 +798,32 @@ def compare_players():
         if not ids or len(ids) < 2:
             return jsonify({"error": "Minimum 2 joueurs requis"}), 400
         
-        players = Player.query.filter(Player.id.in_(ids)).all()
-        result = [p.to_dict(include_all_stats=True) for p in players]
+        try:
+            fields = requested_fields(DETAIL_FIELDS, data.get("fields"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        players = Player.query.options(Player.load_fields(fields)).filter(Player.id.in_(ids)).all()
+        
+        # Centile de chaque attribut comparé parmi les joueurs du même groupe de poste
+        snapshot = attribute_store.snapshot()
+        attributes = [a for f in fields for a in (DETAIL_GROUPS.get(f) or [f]) if a in RATED_ATTRIBUTES]
+        result = []
+        for p in players:
+            row = p.to_dict(fields=fields)
+            if attributes:
+                group = position_group(p.position)
+                row["percentiles"] = {
+                    "position_group": group,
+                    "attributes": snapshot.percentiles(
+                        {a: getattr(p, a) for a in attributes},
+                        POSITION_GROUPS.index(group) if group else None
+                    )
+                }
+            result.append(row)
         return jsonify(result)
     except Exception as e:
+        metrics.record_exception(e)
         print(f"Erreur Compare: {e}")
         return jsonify({"error": str(e)}), 500
 
@@ -378,6 +831,7 @@ def compare_players():
 # STATISTIQUES 
 # ====================
 @app.route("/api/stats/overview")
+@cached_response()
 def stats_overview():
     try:
         total_players = Player.query.count()
@@ -398,19 +852,38 @@ def stats_overview():
 
 @app.route("/api/stats/top-players")
 def get_top_players():
+    """Meilleurs joueurs sur un attribut, servis depuis la matrice en mémoire"""
     attribute = request.args.get("attribute", "finishing")
     limit = min(request.args.get("limit", 10, type=int), 50)
     
-    query = Player.query.filter(getattr(Player, attribute).isnot(None))
-    top_players = query.order_by(getattr(Player, attribute).desc()).limit(limit).all()
+    if attribute not in RATED_ATTRIBUTES:
+        return jsonify({"error": f"Attribut inconnu : {attribute}"}), 400
     
-    return jsonify([{
-        "id": p.id, "name": p.name, "club": p.club, 
-        "position": p.position, "nationality": p.nationality, 
-        "value": getattr(p, attribute, 0)
-    } for p in top_players])
+    snapshot = attribute_store.snapshot()
+    mask = snapshot.filter_mask(**store_filters(request.args))
+    return jsonify([snapshot.summary(i, attribute) for i in snapshot.top_n(attribute, limit, mask)])
+
+@app.route("/api/stats/distribution")
+@cached_response("attribute", "by", *STORE_FILTER_PARAMS)
+def attribute_distribution():
+    """
+    Histogramme 1-20, moyenne, médiane et quartiles d'un attribut noté, servis depuis la matrice en mémoire
+    Ex : ?attribute=pace&position=ST&age_max=21 ; by=position_group ajoute le détail par groupe de poste
+    """
+    attribute = request.args.get("attribute", "pace")
+    if attribute not in RATED_ATTRIBUTES:
+        return jsonify({"error": f"Attribut inconnu : {attribute}"}), 400
+    
+    snapshot = attribute_store.snapshot()
+    filters = store_filters(request.args)
+    counts = snapshot.distribution(attribute, snapshot.filter_mask(**filters) if any(filters.values()) else None)
+    result = {"attribute": attribute, **histogram_summary(counts[ALL_GROUPS])}
+    if request.args.get("by") == "position_group":
+        result["groups"] = {group: histogram_summary(counts[g]) for g, group in enumerate(POSITION_GROUPS)}
+    return jsonify(result)
 
 @app.route("/api/stats/nationalities")
+@cached_response("limit")
 def get_nationalities():
     limit = min(request.args.get("limit", 20, type=int), 50)
     nationalities = db.session.query(Player.nationality, func.count(Player.id).label('count')) \
@@ -420,33 +893,138 @@ def get_nationalities():
     return jsonify([{"nationality": nat, "count": count} for nat, count in nationalities])
 
 @app.route("/api/stats/positions")
+@cached_response()
 def get_positions():
-    positions = db.session.query(Player.position, func.count(Player.id).label('count')) \
-        .filter(Player.position.isnot(None)).group_by(Player.position).all()
+    """Joueurs par poste canonique (un joueur compte pour chacun de ses postes)"""
+    positions = db.session.query(PlayerPosition.position, func.count(PlayerPosition.player_id)) \
+        .group_by(PlayerPosition.position).all()
+    positions.sort(key=lambda row: POSITION_INDEX.get(row[0], len(POSITION_INDEX)))
     return jsonify([{"position": pos, "count": count} for pos, count in positions])
 
 # ====================
 # FILTRES
 # ====================
 @app.route("/api/filters/nationalities")
+@cached_response()
 def list_nationalities():
     nats = db.session.query(Player.nationality).distinct().order_by(Player.nationality).all()
     return jsonify([n[0] for n in nats if n[0]])
 
 @app.route("/api/filters/positions")
+@cached_response()
 def list_positions():
-    pos = db.session.query(Player.position).distinct().order_by(Player.position).all()
-    return jsonify([p[0] for p in pos if p[0]])
+    present = set(db.session.execute(db.select(PlayerPosition.position).distinct()).scalars())
+    return jsonify([p for p in CANONICAL_POSITIONS if p in present])
+
+@app.route("/api/facets")
+@cached_response("club_limit", *PLAYER_FILTER_PARAMS, *SCOUT_PARAMS)
+def get_facets():
+    """
+    Comptes par position, nationalité, club, pied fort et tranche d'âge sous les filtres courants
+    Mêmes filtres que /api/players (+ seuils min_/max_<attribut> de /api/scout) ; chaque facette
+    ignore son propre filtre, min_age / max_age étant celui des tranches d'âge
+    """
+    filters = player_filters(request.args)
+    unsupported = sorted(filters.keys() - STORE_FILTER_KEYS)
+    if unsupported:
+        return jsonify({"error": f"Filtres non disponibles pour les facettes : {', '.join(unsupported)}"}), 400
+    club_limit = max(min(request.args.get("club_limit", 50, type=int), 500), 1)
+    
+    snapshot = attribute_store.snapshot()
+    total, facets = snapshot.facet_counts(
+        **store_filters(request.args), predicates=scout_predicates(request.args), limits={"club": club_limit}
+    )
+    return jsonify({"total": total, "facets": facets})
 
 
 # ====================
 #  IMPORT CSV/EXCEL ADMIN
 # ====================
 
+IMPORT_EXTENSIONS = {'.csv', '.xlsx', '.xls'}
+IMPORT_REQUIRED_COLUMNS = {'name', 'age', 'nationality', 'position'}
+
+def read_import_file(data, filename):
+    """DataFrame d'un fichier CSV/Excel déposé, colonnes normalisées (ValueError si incomplet)"""
+    # pandas (~0,3 s à importer) n'est chargé que par les imports admin
+    import pandas as pd
+    from ingest import COLUMN_MAPPING
+    if filename.lower().endswith('.csv'):
+        df = pd.read_csv(BytesIO(data), encoding='utf-8')
+    else:  # Excel
+        df = pd.read_excel(BytesIO(data), engine='openpyxl')
+    
+    # En-têtes de l'export FM ("Nat", "Pos"...) ramenés aux noms du modèle, comme import_data.py
+    df = df.rename(columns=COLUMN_MAPPING)
+    # Nettoyer les colonnes
+    df.columns = df.columns.str.lower().str.replace(' ', '_').str.replace('-', '_')
+    
+    # Supprimer colonnes index
+    cols_to_drop = [col for col in df.columns if 'unnamed' in col.lower()]
+    if cols_to_drop:
+        df = df.drop(columns=cols_to_drop)
+    
+    # Vérifier colonnes obligatoires
+    missing_columns = IMPORT_REQUIRED_COLUMNS - set(df.columns)
+    if missing_columns:
+        raise ValueError(f'Colonnes manquantes : {", ".join(sorted(missing_columns))}')
+    return df
+
+def run_import_job(job, progress):
+    """Import par tranches validées une à une : progression, annulation et reprise entre deux tranches"""
+    from ingest import bulk_upsert_players
+    
+    progress.phase("reading")
+    if job.file_data is None:
+        raise ValueError("Fichier déposé introuvable")
+    df = read_import_file(job.file_data, job.filename)
+    
+    # Reprise après redémarrage : les tranches déjà validées ne sont pas rejouées
+    resumed_at = job.rows_processed or 0
+    totals = json.loads(job.result) if job.result else {
+        'imported': 0, 'inserted': 0, 'updated': 0, 'rejected': 0, 'merged_duplicates': 0
+    }
+    errors = json.loads(job.errors) if job.errors else []
+    error_count = job.error_count or 0
+    progress.phase("writing", rows_total=len(df))
+    
+    chunk_size = app.config['IMPORT_CHUNK_SIZE']
+    ids = []
+    try:
+        for start in range(resumed_at, len(df), chunk_size):
+            progress.check_cancelled()
+            report = bulk_upsert_players(df.iloc[start:start + chunk_size])
+            
+            ids.extend(report['ids'])
+            for key in totals:
+                totals[key] += report[key]
+            totals['ignored_columns'] = report['ignored_columns']
+            error_count += len(report['errors'])
+            errors = (errors + report['errors'])[:100]  # Max 100 erreurs détaillées
+            progress.advance(min(start + chunk_size, len(df)), result=json.dumps(totals),
+                             errors=json.dumps(errors), error_count=error_count)
+    finally:
+        # Les tranches validées sont en base, même si la tâche est annulée ou échoue
+        if resumed_at:
+            notify_players_changed()
+        elif ids:
+            notify_imported_players(ids)
+    
+    job.message = (f"Import terminé : {totals['imported']}/{len(df)} joueurs "
+                   f"({int(job.rows_per_second or 0):,} lignes/s)")
+
+import_jobs = JobRunner(
+    app, run_import_job,
+    workers=app.config['IMPORT_WORKERS'],
+    stale_after=app.config['IMPORT_STALE_AFTER'],
+    # Fichier illisible ou colonnes manquantes : une nouvelle tentative échouerait de la même façon
+    permanent_errors=(ValueError,)
+)
+
 @app.route("/api/admin/import", methods=["POST"])
 @token_required
 def import_data():
-    """Importer des joueurs depuis CSV/Excel"""
+    """Importer des joueurs depuis CSV/Excel : crée une tâche de fond et renvoie son id"""
     if 'file' not in request.files:
         return jsonify({'error': 'Aucun fichier fourni'}), 400
     
@@ -456,78 +1034,57 @@ def import_data():
         return jsonify({'error': 'Nom de fichier vide'}), 400
     
     # Vérifier l'extension
-    allowed_extensions = {'.csv', '.xlsx', '.xls'}
     file_ext = os.path.splitext(file.filename)[1].lower()
     
-    if file_ext not in allowed_extensions:
-        return jsonify({'error': f'Format non supporté. Utilisez {", ".join(allowed_extensions)}'}), 400
+    if file_ext not in IMPORT_EXTENSIONS:
+        return jsonify({'error': f'Format non supporté. Utilisez {", ".join(sorted(IMPORT_EXTENSIONS))}'}), 400
     
-    try:
-        # Lire le fichier
-        if file_ext == '.csv':
-            df = pd.read_csv(file, encoding='utf-8')
-        else:  # Excel
-            df = pd.read_excel(file, engine='openpyxl')
-        
-        # Nettoyer les colonnes
-        df.columns = df.columns.str.lower().str.replace(' ', '_').str.replace('-', '_')
-        
-        # Supprimer colonnes index
-        cols_to_drop = [col for col in df.columns if 'unnamed' in col.lower()]
-        if cols_to_drop:
-            df = df.drop(columns=cols_to_drop)
-        
-        # Vérifier colonnes obligatoires
-        required_columns = {'name', 'age', 'nationality', 'position'}
-        missing_columns = required_columns - set(df.columns)
-        
-        if missing_columns:
-            return jsonify({
-                'error': f'Colonnes manquantes : {", ".join(missing_columns)}'
-            }), 400
-        
-        # Import par batch
-        batch_size = 100
-        total = len(df)
-        imported = 0
-        errors = []
-        
-        for i in range(0, total, batch_size):
-            batch = df.iloc[i:i+batch_size]
-            
-            for idx, row in batch.iterrows():
-                try:
-                    # Vérifier si le joueur existe déjà (par nom)
-                    existing = Player.query.filter_by(name=row['name']).first()
-                    
-                    if existing:
-                        # Mise à jour
-                        for col in df.columns:
-                            if hasattr(existing, col) and pd.notna(row[col]):
-                                setattr(existing, col, row[col])
-                    else:
-                        # Création
-                        player_data = {col: row[col] for col in df.columns if hasattr(Player, col) and pd.notna(row[col])}
-                        new_player = Player(**player_data)
-                        db.session.add(new_player)
-                    
-                    imported += 1
-                    
-                except Exception as e:
-                    errors.append(f"Ligne {idx + 2}: {str(e)}")
-            
-            db.session.commit()
-        
-        return jsonify({
-            'message': f'Import terminé : {imported}/{total} joueurs',
-            'imported': imported,
-            'total': total,
-            'errors': errors[:10]  # Max 10 erreurs affichées
-        })
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': f'Erreur lors de l\'import : {str(e)}'}), 500
+    # Conservé en base (pas sur /tmp) : relu par une reprise ou une nouvelle tentative, sur un autre conteneur
+    job = ImportJob(status="queued", phase="queued", filename=file.filename, file_data=file.read())
+    db.session.add(job)
+    db.session.commit()
+    import_jobs.submit(job.id)
+    
+    return jsonify({
+        'message': f'Import de {file.filename} mis en file',
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/api/admin/jobs/{job.id}'
+    }), 202
+
+@app.route("/api/admin/jobs")
+@token_required
+def list_jobs():
+    """Dernières tâches d'import"""
+    limit = min(request.args.get("limit", 20, type=int), 100)
+    jobs = ImportJob.query.order_by(ImportJob.id.desc()).limit(limit).all()
+    return jsonify([job.to_dict() for job in jobs])
+
+@app.route("/api/admin/jobs/<int:job_id>")
+@token_required
+def get_job(job_id):
+    """État d'une tâche : phase, lignes traitées, débit, erreurs"""
+    return jsonify(db.get_or_404(ImportJob, job_id).to_dict())
+
+@app.route("/api/admin/jobs/<int:job_id>/cancel", methods=["POST"])
+@token_required
+def cancel_job(job_id):
+    """Annule une tâche (effective entre deux tranches si elle est en cours)"""
+    job = db.get_or_404(ImportJob, job_id)
+    if job.status in TERMINAL_STATUSES:
+        return jsonify({'error': f'Tâche déjà terminée ({job.status})'}), 409
+    return jsonify(import_jobs.cancel(job).to_dict())
+
+@app.route("/api/admin/metrics")
+def get_metrics():
+    """Métriques par route au format Prometheus (jeton admin, ou METRICS_TOKEN pour le scraper)"""
+    def render():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    scrape_token = app.config['METRICS_TOKEN']
+    if scrape_token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {scrape_token}'):
+        return render()
+    return token_required(render)()
 
 # ====================
 # RÉINITIALISATION MOT DE PASSE
@@ -608,7 +1165,9 @@ def reset_password():
 #  DÉMARRAGE SERVEUR
 # ====================
 if __name__ == "__main__":
-    with app.app_context():
-        pass
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"Erreur préchargement: {e}")
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=app.config.get('DEBUG', False))
\ No newline at end of file
@@ -0,0 +1,543 @@
+# attribute_store.py - Matrice d'attributs en mémoire (NumPy)
+"""
+Copie colonnaire des attributs notés de la table players.
+
+Chaque attribut est une colonne uint8 (0 = valeur absente, les notes FM vont
+de 1 à 20) et position / nationalité / club / pied fort sont stockés sous forme de codes
+catégoriels. Les classements et filtres se font par masques vectorisés et
+np.argpartition au lieu d'un ORDER BY sur toute la table.
+"""
+import threading
+from functools import cached_property
+import numpy as np
+from models import (db, Player, RATED_ATTRIBUTES, TECHNICAL_ATTRIBUTES, MENTAL_ATTRIBUTES,
+                    PHYSICAL_ATTRIBUTES, GOALKEEPER_ATTRIBUTES)
+from positions import CANONICAL_POSITIONS, POSITION_GROUPS, POSITION_INDEX, parse_positions, position_flags, position_group
+from facets import Facet, FacetIndex, AGE_BANDS, age_band_codes
+from roles import ROLES, ROLE_INDEX, rate_roles
+
+ATTRIBUTE_INDEX = {name: i for i, name in enumerate(RATED_ATTRIBUTES)}
+CATEGORICAL_FIELDS = ["position", "nationality", "club", "preferred_foot"]
+
+# Lignes supplémentaires des tables d'effectifs : sans groupe de poste, puis tous les joueurs
+NO_GROUP = len(POSITION_GROUPS)
+ALL_GROUPS = len(POSITION_GROUPS) + 1
+
+# Profil comparé par /api/players/<id>/similar (attributs cachés exclus)
+SIMILARITY_ATTRIBUTES = TECHNICAL_ATTRIBUTES + MENTAL_ATTRIBUTES + PHYSICAL_ATTRIBUTES + GOALKEEPER_ATTRIBUTES
+
+
+def _to_uint8(values):
+    """Convertit une note (None possible) en entier 0-255"""
+    return [min(max(int(v), 0), 255) if v is not None else 0 for v in values]
+
+
+def histogram_summary(counts, low=1, high=20):
+    """Histogramme low-high et statistiques (quartiles interpolés comme np.percentile) d'effectifs par note"""
+    values = np.arange(len(counts))
+    rated = counts[low:]
+    n = int(rated.sum())
+    summary = {
+        "count": n,
+        "histogram": [{"value": int(v), "count": int(counts[v])} for v in range(low, high + 1)]
+    }
+    if n == 0:
+        return {**summary, "mean": None, "min": None, "q1": None, "median": None, "q3": None, "max": None}
+
+    cumulative = np.cumsum(rated)
+
+    def quantile(q):
+        position = (n - 1) * q
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        # k-ième valeur du tableau trié implicite
+        x_lower, x_upper = (int(np.searchsorted(cumulative, k, side="right")) + low for k in (lower, upper))
+        return round(x_lower + (x_upper - x_lower) * (position - lower), 2)
+
+    return {
+        **summary,
+        "mean": round(float((values[low:] * rated).sum() / n), 2),
+        "min": quantile(0),
+        "q1": quantile(0.25),
+        "median": quantile(0.5),
+        "q3": quantile(0.75),
+        "max": quantile(1)
+    }
+
+
+class Categorical:
+    """Codes entiers pour une colonne texte (-1 = valeur absente)"""
+
+    def __init__(self, values):
+        self.categories = sorted({v for v in values if v})
+        self.index = {label: code for code, label in enumerate(self.categories)}
+        self.codes = np.fromiter(
+            (self.index.get(v, -1) if v else -1 for v in values), dtype=np.int32, count=len(values)
+        )
+
+    def code_for(self, value):
+        """Code d'une valeur, ajoutée aux catégories si elle est nouvelle"""
+        if not value:
+            return -1
+        if value not in self.index:
+            self.index[value] = len(self.categories)
+            self.categories.append(value)
+        return self.index[value]
+
+    def label(self, code):
+        return self.categories[code] if code >= 0 else None
+
+    def matching_codes(self, value, partial=False):
+        """Codes correspondant à une valeur exacte ou contenue (insensible à la casse)"""
+        if not partial:
+            code = self.index.get(value)
+            return np.array([] if code is None else [code], dtype=np.int32)
+        needle = value.lower()
+        return np.array([c for label, c in self.index.items() if needle in label.lower()], dtype=np.int32)
+
+    def copy(self):
+        clone = Categorical.__new__(Categorical)
+        clone.categories = list(self.categories)
+        clone.index = dict(self.index)
+        clone.codes = self.codes.copy()
+        return clone
+
+
+class AttributeSnapshot:
+    """Vue figée de la matrice ; remplacée d'un bloc à chaque écriture"""
+
+    def __init__(self, ids, names, ages, matrix, categoricals):
+        self.ids = ids                    # int64, trié
+        self.names = names                # object
+        self.ages = ages                  # int16, -1 = inconnu
+        self.matrix = matrix              # uint8 (n, attributs), ordre colonne
+        self.categoricals = categoricals  # {champ: Categorical}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, attribute):
+        return self.matrix[:, ATTRIBUTE_INDEX[attribute]]
+
+    def prepare(self):
+        """Calcule d'avance les structures dérivées (partagées par les workers si appelé avant le fork)"""
+        for name in ("position_groups", "position_flags", "peer_counts", "role_ratings", "facet_index",
+                     "_similarity", "_partitions", "_name_rank"):
+            getattr(self, name)
+        return self
+
+    def row_of(self, player_id):
+        """Indice de ligne d'un joueur, ou None"""
+        i = int(np.searchsorted(self.ids, player_id))
+        return i if i < len(self.ids) and self.ids[i] == player_id else None
+
+    def describe(self, i):
+        """Identité d'un joueur à partir de sa ligne"""
+        cats = self.categoricals
+        return {
+            "id": int(self.ids[i]),
+            "name": self.names[i],
+            "age": int(self.ages[i]) if self.ages[i] >= 0 else None,
+            "club": cats["club"].label(cats["club"].codes[i]),
+            "position": cats["position"].label(cats["position"].codes[i]),
+            "nationality": cats["nationality"].label(cats["nationality"].codes[i])
+        }
+
+    @cached_property
+    def position_groups(self):
+        """Code de groupe de poste par ligne (indice dans POSITION_GROUPS, -1 = inconnu)"""
+        position = self.categoricals["position"]
+        by_category = np.array(
+            [POSITION_GROUPS.index(g) if g else -1 for g in map(position_group, position.categories)] + [-1],
+            dtype=np.int8
+        )
+        # Le code -1 (position absente) pointe sur la dernière case
+        return by_category[position.codes]
+
+    @cached_property
+    def peer_counts(self):
+        """Effectifs par (groupe de poste, attribut, note 0-255), tenus à jour ligne à ligne par refresh_player
+
+        Lignes : groupes de POSITION_GROUPS, puis NO_GROUP et ALL_GROUPS (tous les joueurs)
+        """
+        counts = np.zeros((ALL_GROUPS + 1, len(RATED_ATTRIBUTES), 256), dtype=np.int32)
+        for a in range(len(RATED_ATTRIBUTES)):
+            counts[:, a] = self._group_counts(self.matrix[:, a], self._group_rows)
+        return counts
+
+    @cached_property
+    def _group_rows(self):
+        """Ligne de table d'effectifs de chaque joueur (NO_GROUP si groupe de poste inconnu)"""
+        return np.where(self.position_groups >= 0, self.position_groups, NO_GROUP).astype(np.intp)
+
+    @staticmethod
+    def _group_counts(values, groups):
+        """Effectifs (ALL_GROUPS + 1, 256) de notes uint8 selon le groupe de chaque ligne"""
+        counts = np.zeros((ALL_GROUPS + 1, 256), dtype=np.int32)
+        counts[:ALL_GROUPS] = np.bincount(groups * 256 + values, minlength=ALL_GROUPS * 256).reshape(ALL_GROUPS, 256)
+        counts[ALL_GROUPS] = counts[:ALL_GROUPS].sum(axis=0)
+        return counts
+
+    def distribution(self, attribute, mask=None):
+        """Effectifs par groupe de poste et par note d'un attribut (lignes du masque, sinon tables précalculées)"""
+        if mask is None:
+            return self.peer_counts[:, ATTRIBUTE_INDEX[attribute]]
+        return self._group_counts(self.column(attribute)[mask], self._group_rows[mask])
+
+    @cached_property
+    def _peer_cumulative(self):
+        return np.cumsum(self.peer_counts, axis=2)
+
+    def percentiles(self, values, group=None):
+        """
+        Rang centile (0-100, ex-aequo comptés pour moitié) de notes {attribut: valeur} parmi les joueurs
+        notés du groupe de poste (indice dans POSITION_GROUPS, None = tous) ; None si note ou pairs absents
+        """
+        row = ALL_GROUPS if group is None else group
+        counts, cumulative = self.peer_counts[row], self._peer_cumulative[row]
+        result = {}
+        for attribute, value in values.items():
+            a = ATTRIBUTE_INDEX[attribute]
+            peers = cumulative[a, 255] - counts[a, 0]
+            if not value or value < 1 or peers == 0:
+                result[attribute] = None
+                continue
+            v = min(int(value), 255)
+            below = cumulative[a, v - 1] - counts[a, 0]
+            result[attribute] = round(100.0 * (below + counts[a, v] / 2) / peers, 1)
+        return result
+
+    @cached_property
+    def _similarity(self):
+        """Profils float32 avec normes précalculées, partagés par toutes les requêtes"""
+        columns = [ATTRIBUTE_INDEX[a] for a in SIMILARITY_ATTRIBUTES]
+        features = self.matrix[:, columns].astype(np.float32)
+        squared = np.einsum("ij,ij->i", features, features)
+        norms = np.sqrt(squared)
+        unit = features / np.where(norms > 0, norms, 1)[:, None]
+        return features, squared, unit
+
+    @cached_property
+    def _partitions(self):
+        """Index partitionné : lignes et profils normés de chaque groupe de poste"""
+        features, squared, unit = self._similarity
+        partitions = {}
+        for code in range(len(POSITION_GROUPS)):
+            rows = np.flatnonzero(self.position_groups == code)
+            partitions[code] = (rows, features[rows], squared[rows], unit[rows])
+        return partitions
+
+    def nearest(self, i, k, metric="cosine", group=None, mask=None):
+        """Les k profils les plus proches de la ligne i : (lignes, scores).
+
+        cosine -> similarité décroissante ; euclidean -> distance croissante.
+        group restreint la recherche à une partition de poste, mask filtre en plus.
+        """
+        features, squared, unit = self._similarity
+        if group is None:
+            rows = None
+            candidates = (features, squared, unit)
+        else:
+            rows, *candidates = self._partitions[group]
+
+        if metric == "euclidean":
+            # |x - q|² = |x|² - 2 x.q + |q|², en un seul produit matriciel
+            scores = candidates[1] - 2 * (candidates[0] @ features[i]) + squared[i]
+            scores = np.sqrt(np.maximum(scores, 0))
+            keys = scores
+        else:
+            scores = candidates[2] @ unit[i]
+            keys = -scores
+
+        positions = np.arange(len(keys)) if rows is None else rows
+        keep = positions != i
+        if mask is not None:
+            keep &= mask[positions]
+        keys, scores, positions = keys[keep], scores[keep], positions[keep]
+
+        if len(keys) > k:
+            part = np.argpartition(keys, k - 1)[:k]
+            keys, scores, positions = keys[part], scores[part], positions[part]
+        order = np.argsort(keys, kind="stable")
+        return positions[order], scores[order]
+
+    @cached_property
+    def position_flags(self):
+        """Postes canoniques de chaque joueur en masque de bits (cf. positions.position_flags)"""
+        categories = self.categoricals["position"].categories
+        flags = np.array([position_flags(c) for c in categories] + [0], dtype=np.int32)
+        return flags[self.categoricals["position"].codes]  # code -1 -> 0
+
+    def filter_mask(self, position=None, nationality=None, club=None, min_age=None, max_age=None,
+                    preferred_foot=None):
+        """Masque booléen reprenant les filtres de /api/players"""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if position:
+            mask &= (self.position_flags & position_flags(position, expand=True)) != 0
+        if nationality:
+            mask &= np.isin(self.categoricals["nationality"].codes,
+                            self.categoricals["nationality"].matching_codes(nationality))
+        if club:
+            mask &= np.isin(self.categoricals["club"].codes,
+                            self.categoricals["club"].matching_codes(club, partial=True))
+        if preferred_foot:
+            mask &= np.isin(self.categoricals["preferred_foot"].codes,
+                            self.categoricals["preferred_foot"].matching_codes(preferred_foot))
+        if min_age:
+            mask &= self.ages >= min_age
+        if max_age:
+            mask &= (self.ages >= 0) & (self.ages <= max_age)
+        return mask
+
+    def threshold_mask(self, predicates, mask=None):
+        """Applique des seuils (attribut, "min" | "max", valeur) ; une note absente ne passe aucun seuil"""
+        mask = np.ones(len(self.ids), dtype=bool) if mask is None else mask.copy()
+        for attribute, bound, value in predicates:
+            column = self.column(attribute)
+            value = min(max(int(value), 0), 255)
+            if bound == "min":
+                mask &= column >= value
+            else:
+                mask &= (column <= value) & (column > 0)
+        return mask
+
+    @cached_property
+    def facet_index(self):
+        """Facettes de /api/facets (bitmaps construits au premier appel)"""
+        facets = {
+            field: Facet(self.categoricals[field].codes, list(self.categoricals[field].categories))
+            for field in ("nationality", "club", "preferred_foot")
+        }
+        facets["position"] = Facet.from_flags(self.position_flags, CANONICAL_POSITIONS, ordered=True)
+        facets["age_band"] = Facet(age_band_codes(self.ages), [label for _, _, label in AGE_BANDS], ordered=True)
+        return FacetIndex(facets, len(self.ids))
+
+    def facet_counts(self, position=None, nationality=None, club=None, preferred_foot=None,
+                     min_age=None, max_age=None, predicates=(), limits=None):
+        """Comptes par facette sous les filtres de /api/players, chaque facette ignorant le sien"""
+        index = self.facet_index
+        chosen = {}
+        if position:
+            tokens = parse_positions(position, expand=True)
+            codes = np.array([POSITION_INDEX[token] for token in tokens], dtype=np.int32)
+            chosen["position"] = index.select("position", codes)
+        for field, value, partial in (("nationality", nationality, False), ("club", club, True),
+                                      ("preferred_foot", preferred_foot, False)):
+            if value:
+                chosen[field] = index.select(field, self.categoricals[field].matching_codes(value, partial))
+        if min_age or max_age:
+            chosen["age_band"] = index.pack(self.filter_mask(min_age=min_age, max_age=max_age))
+        base = index.pack(self.threshold_mask(predicates)) if predicates else None
+        return index.count(chosen, base, limits)
+
+    @cached_property
+    def _name_rank(self):
+        """Rang alphabétique de chaque ligne (tri par nom sans comparer de chaînes)"""
+        ranks = np.empty(len(self.ids), dtype=np.int64)
+        ranks[np.argsort(self.names.astype(str), kind="stable")] = np.arange(len(self.ids))
+        return ranks
+
+    @cached_property
+    def _sort_keys(self):
+        return {}
+
+    def sort_key(self, sort_by):
+        """Clé int64 unique par ligne : valeur de tri puis id (départage comme en SQL)"""
+        key = self._sort_keys.get(sort_by)
+        if key is None:
+            if sort_by in ATTRIBUTE_INDEX:
+                values = self.column(sort_by).astype(np.int64)
+            elif sort_by == "age":
+                values = self.ages.astype(np.int64)
+            elif sort_by == "name":
+                values = self._name_rank
+            else:
+                values = np.zeros(len(self.ids), dtype=np.int64)
+            # Les valeurs absentes (0 / -1) passent en tête du tri croissant, comme NULL sous SQLite
+            values = np.maximum(values, -1) + 1
+            key = values * (int(self.ids.max(initial=0)) + 1) + self.ids
+            self._sort_keys[sort_by] = key
+        return key
+
+    def page(self, mask, sort_by, descending=False, offset=0, limit=50):
+        """Lignes de la page demandée parmi celles du masque"""
+        rows = np.flatnonzero(mask)
+        key = self.sort_key(sort_by)[rows]
+        if descending:
+            key = -key
+        wanted = offset + limit
+        if wanted < len(rows):
+            # Sélection partielle O(n) des `wanted` premières, puis tri de celles-ci seulement
+            part = np.argpartition(key, wanted - 1)[:wanted]
+            order = part[np.argsort(key[part])]
+        else:
+            order = np.argsort(key)
+        return rows[order[offset:offset + limit]]
+
+    @cached_property
+    def role_ratings(self):
+        """Note de chaque joueur dans chaque rôle de roles.ROLES (n, rôles), en un produit matriciel"""
+        return np.asfortranarray(rate_roles(self.matrix))
+
+    def role_mask(self, role):
+        """Joueurs ayant l'un des postes du rôle"""
+        bits = 0
+        for position in ROLES[role]["positions"]:
+            bits |= 1 << POSITION_INDEX[position]
+        return (self.position_flags & bits) != 0
+
+    def top_role(self, role, limit, mask=None):
+        """Indices des `limit` meilleures notes dans un rôle"""
+        return self._top(self.role_ratings[:, ROLE_INDEX[role]], limit, mask)
+
+    def top_n(self, attribute, limit, mask=None):
+        """Indices des `limit` meilleures valeurs (décroissant, puis par id)"""
+        return self._top(self.column(attribute), limit, mask)
+
+    def _top(self, values, limit, mask=None):
+        """Indices des `limit` plus grandes valeurs non nulles du masque (décroissant, puis par id)"""
+        valid = values > 0 if mask is None else mask & (values > 0)
+        candidates = np.flatnonzero(valid)
+        if limit <= 0 or len(candidates) == 0:
+            return candidates[:0]
+        if len(candidates) > limit:
+            # Sélection partielle O(n) puis tri des seuls survivants
+            kth = len(candidates) - limit
+            part = np.argpartition(values[candidates], kth)[kth:]
+            threshold = values[candidates[part]].min()
+            # On garde les ex-aequo au seuil pour un départage stable par id
+            candidates = candidates[values[candidates] >= threshold]
+        order = np.lexsort((self.ids[candidates], -values[candidates].astype(np.float32)))
+        return candidates[order[:limit]]
+
+    def summary(self, i, attribute):
+        """Ligne de classement au format de /api/stats/top-players"""
+        row = self.describe(i)
+        del row["age"]
+        row["value"] = int(self.column(attribute)[i])
+        return row
+
+
+class AttributeStore:
+    """Détient l'instantané courant et le tient à jour après les écritures admin"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def snapshot(self):
+        """Instantané courant, construit au premier accès"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build()
+                snapshot = self._snapshot
+        return snapshot
+
+    def invalidate(self):
+        """Force une reconstruction complète au prochain accès (imports)"""
+        self._snapshot = None
+
+    def _build(self):
+        fields = [Player.id, Player.name, Player.age] + [getattr(Player, f) for f in CATEGORICAL_FIELDS]
+        attributes = [getattr(Player, a) for a in RATED_ATTRIBUTES]
+        rows = db.session.execute(db.select(*fields, *attributes).order_by(Player.id)).all()
+        n = len(rows)
+
+        matrix = np.zeros((n, len(RATED_ATTRIBUTES)), dtype=np.uint8, order="F")
+        if n:
+            matrix[:] = np.array([_to_uint8(r[len(fields):]) for r in rows], dtype=np.uint8)
+
+        return AttributeSnapshot(
+            ids=np.fromiter((r[0] for r in rows), dtype=np.int64, count=n),
+            names=np.array([r[1] for r in rows], dtype=object),
+            ages=np.fromiter((r[2] if r[2] is not None else -1 for r in rows), dtype=np.int16, count=n),
+            matrix=matrix,
+            categoricals={
+                field: Categorical([r[3 + k] for r in rows]) for k, field in enumerate(CATEGORICAL_FIELDS)
+            }
+        )
+
+    def refresh_player(self, player):
+        """Insère ou remplace la ligne d'un joueur sans tout recharger"""
+        with self._lock:
+            current = self._snapshot
+            if current is None:
+                return
+            cats = {field: c.copy() for field, c in current.categoricals.items()}
+            codes = [cats[field].code_for(getattr(player, field)) for field in CATEGORICAL_FIELDS]
+            values = _to_uint8(getattr(player, a) for a in RATED_ATTRIBUTES)
+            age = player.age if player.age is not None else -1
+
+            i = current.row_of(player.id)
+            if i is not None:
+                names, ages, matrix = current.names.copy(), current.ages.copy(), current.matrix.copy(order="F")
+                ids = current.ids
+                names[i], ages[i], matrix[i] = player.name, age, values
+                for field, code in zip(CATEGORICAL_FIELDS, codes):
+                    cats[field].codes[i] = code
+                change = "replace"
+            else:
+                i = int(np.searchsorted(current.ids, player.id))
+                ids = np.insert(current.ids, i, player.id)
+                names = np.insert(current.names, i, player.name)
+                ages = np.insert(current.ages, i, age)
+                matrix = np.asfortranarray(np.insert(current.matrix, i, values, axis=0))
+                for field, code in zip(CATEGORICAL_FIELDS, codes):
+                    cats[field].codes = np.insert(cats[field].codes, i, code)
+                change = "insert"
+
+            snapshot = AttributeSnapshot(ids, names, ages, matrix, cats)
+            self._carry_derived(current, snapshot, i, change)
+            self._snapshot = snapshot
+
+    def remove_player(self, player_id):
+        """Retire la ligne d'un joueur supprimé"""
+        with self._lock:
+            current = self._snapshot
+            if current is None:
+                return
+            i = current.row_of(player_id)
+            if i is None:
+                return
+            cats = {field: c.copy() for field, c in current.categoricals.items()}
+            for c in cats.values():
+                c.codes = np.delete(c.codes, i)
+            snapshot = AttributeSnapshot(
+                np.delete(current.ids, i), np.delete(current.names, i), np.delete(current.ages, i),
+                np.asfortranarray(np.delete(current.matrix, i, axis=0)), cats
+            )
+            self._carry_derived(current, snapshot, i, "delete")
+            self._snapshot = snapshot
+
+    @staticmethod
+    def _carry_derived(current, snapshot, i, change):
+        """Reporte sur le nouvel instantané les notes de rôle et effectifs déjà calculés, en ne traitant que la ligne i"""
+        if "role_ratings" in current.__dict__:
+            ratings = current.role_ratings
+            if change == "delete":
+                ratings = np.delete(ratings, i, axis=0)
+            else:
+                row = rate_roles(snapshot.matrix[i:i + 1])[0]
+                if change == "insert":
+                    ratings = np.insert(ratings, i, row, axis=0)
+                else:
+                    ratings = ratings.copy(order="F")
+                    ratings[i] = row
+            snapshot.__dict__["role_ratings"] = np.asfortranarray(ratings)
+
+        if "peer_counts" in current.__dict__:
+            counts = current.peer_counts.copy()
+            attributes = np.arange(len(RATED_ATTRIBUTES))
+            if change != "insert":
+                group = current.position_groups[i]
+                counts[group if group >= 0 else NO_GROUP, attributes, current.matrix[i]] -= 1
+                counts[ALL_GROUPS, attributes, current.matrix[i]] -= 1
+            if change != "delete":
+                group = snapshot.position_groups[i]
+                counts[group if group >= 0 else NO_GROUP, attributes, snapshot.matrix[i]] += 1
+                counts[ALL_GROUPS, attributes, snapshot.matrix[i]] += 1
+            snapshot.__dict__["peer_counts"] = counts
+
+
+store = AttributeStore()
@@ -0,0 +1,695 @@
+# backend/benchmark.py - Latence de chaque route sur une base SQLite synthétique
+"""
+Construit (une fois, puis réutilise) une base SQLite au schéma de models.Player à
+l'échelle voulue de FM2023, puis appelle toutes les routes de app.py via le client
+de test Flask avec des paramètres variés : filtres, tris, pages profondes,
+recherches, comparaisons, exports et écritures admin (en dernier, nettoyées après).
+
+Pour chaque scénario : p50 / p95 / p99 en ms, requêtes SQL par appel, taille des
+réponses et statuts inattendus. Les résultats sont enregistrés en JSON ; avec
+BENCH_BASELINE, un scénario dont le p95 dépasse BENCH_TOLERANCE x la référence
+(ou qui fait plus de requêtes SQL ou d'erreurs) est signalé et le code de sortie
+vaut 1.
+
+    python benchmark.py
+    BENCH_SCALES=1,10,100 python benchmark.py
+    BENCH_BASELINE=baseline.json BENCH_OUTPUT=current.json python benchmark.py
+    BENCH_METRICS_OVERHEAD=1 BENCH_SCALES=0.2 python benchmark.py
+
+Variables d'environnement :
+    BENCH_SCALES        échelles (x 90 000 joueurs), séparées par des virgules (défaut 1)
+    BENCH_ITERATIONS    appels par scénario (défaut 30)
+    BENCH_DIR           bases générées et fichiers de travail (défaut <tmp>/sokrstat-bench)
+    BENCH_OUTPUT        fichier JSON des résultats (défaut BENCH_DIR/results.json)
+    BENCH_BASELINE      résultats de référence à comparer (optionnel)
+    BENCH_TOLERANCE     ratio de p95 toléré avant régression (défaut 1.25)
+    BENCH_SEED          graine des données et des paramètres (défaut 2023)
+    BENCH_METRICS_OVERHEAD  1 : mesure en plus le surcoût des métriques par route sur les scénarios
+                            en lecture (blocs alternés avec / sans, mêmes requêtes, même processus)
+    BENCH_OVERHEAD_ROUNDS   paires de blocs par scénario (défaut 20, blocs de 5 appels)
+    BENCH_OVERHEAD_LIMIT    surcoût médian toléré en % (défaut 5), au-delà le code de sortie vaut 1
+
+Chaque échelle tourne dans un processus séparé (une base par processus) ; à 100x
+la matrice en mémoire et l'index de similarité demandent plusieurs Go de RAM.
+"""
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+FM2023_PLAYERS = 90_000
+
+SCALES = [float(s) for s in os.environ.get('BENCH_SCALES', '1').split(',') if s.strip()]
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 30))
+BENCH_DIR = os.environ.get('BENCH_DIR') or os.path.join(tempfile.gettempdir(), 'sokrstat-bench')
+OUTPUT = os.environ.get('BENCH_OUTPUT') or os.path.join(BENCH_DIR, 'results.json')
+BASELINE = os.environ.get('BENCH_BASELINE')
+TOLERANCE = float(os.environ.get('BENCH_TOLERANCE', 1.25))
+SEED = int(os.environ.get('BENCH_SEED', 2023))
+METRICS_OVERHEAD = os.environ.get('BENCH_METRICS_OVERHEAD') == '1'
+OVERHEAD_ROUNDS = int(os.environ.get('BENCH_OVERHEAD_ROUNDS', 20))
+OVERHEAD_BLOCK = 5
+OVERHEAD_LIMIT = float(os.environ.get('BENCH_OVERHEAD_LIMIT', 5))
+
+# Écart absolu en dessous duquel une hausse de p95 est du bruit
+MIN_REGRESSION_MS = 1.0
+BUILD_CHUNK_SIZE = 5000
+# Joueurs créés par les scénarios d'écriture, au-delà des identifiants générés
+SCRATCH_OFFSET = 10_000_000
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def scale_label(scale):
+    return f"{scale:g}x"
+
+
+# ====================
+# DONNÉES SYNTHÉTIQUES
+# ====================
+def build_database(n):
+    """Crée la base à n joueurs si celle du fichier n'a pas déjà ce nombre de lignes"""
+    import pandas as pd
+    from app import db
+    from models import Player, PlayerPosition
+    from ingest import compute_category_averages, compute_shadow_columns, frame_records, model_fields, position_records
+    from generate_players import PlayerGenerator
+    from init_db import upgrade_schema
+
+    db.create_all()
+    # Base réutilisée d'une exécution précédente : colonnes ajoutées depuis au modèle
+    upgrade_schema()
+    if db.session.query(Player.id).count() == n:
+        return False
+    db.drop_all()
+    db.create_all()
+
+    fields = model_fields()
+    generator = PlayerGenerator(seed=SEED, clubs=max(n // 30, 50))
+    for start, chunk in zip(range(0, n, BUILD_CHUNK_SIZE), generator.chunks(n, BUILD_CHUNK_SIZE)):
+        chunk = pd.concat([chunk, compute_category_averages(chunk), compute_shadow_columns(chunk)], axis=1)
+        rows = chunk.rename(columns=fields)
+        db.session.execute(Player.__table__.insert(), frame_records(rows))
+        db.session.execute(PlayerPosition.__table__.insert(), position_records(rows['uid'], rows['position']))
+        db.session.commit()
+        print(f"   {min(start + BUILD_CHUNK_SIZE, n):,} / {n:,} joueurs", end="\r", flush=True)
+    print()
+    return True
+
+
+# ====================
+# SCÉNARIOS
+# ====================
+SCENARIOS = []
+
+
+def scenario(name, expect=(200,)):
+    """Déclare un scénario : la fonction reçoit le contexte et renvoie (méthode, url, kwargs du client)"""
+    def register(build):
+        SCENARIOS.append((name, build, set(expect)))
+        return build
+    return register
+
+
+class BenchContext:
+    """Échantillons de la base et état partagé entre scénarios (jeton, tâches, joueurs temporaires)"""
+
+    def __init__(self, rng, players, nationalities, clubs):
+        self.rng = rng
+        self.players = players  # [(id, name, age, club)]
+        self.nationalities = nationalities
+        self.clubs = clubs
+        self.token = None
+        self.cursor = None
+        self.job_id = None
+        self.scratch_ids = []
+        self.import_file = None
+
+    def pick(self, values):
+        return values[int(self.rng.integers(len(values)))]
+
+    def player(self):
+        return self.pick(self.players)
+
+    def ids(self, low, high):
+        rows = self.rng.choice(len(self.players), size=int(self.rng.integers(low, high + 1)), replace=False)
+        return [self.players[i][0] for i in rows]
+
+    def age_range(self):
+        low = int(self.rng.integers(16, 30))
+        return low, low + int(self.rng.integers(3, 12))
+
+    def auth(self):
+        return {"headers": {"Authorization": f"Bearer {self.token}"}}
+
+
+SORTS = ["name", "age", "finishing", "pace", "passing", "avg_technical", "value_max", "height_cm"]
+ATTRIBUTES = ["finishing", "pace", "passing", "tackling", "vision", "acceleration", "heading", "reflexes"]
+POSITION_FILTERS = ["GK", "D (C)", "D", "DM", "M (C)", "AM", "ST", "D (RL)", "WB"]
+FEET = ["Right", "Left", "Either"]
+ROLES = ["goalkeeper", "central_defender", "wing_back", "deep_lying_playmaker", "winger", "poacher"]
+
+
+@scenario("home")
+def home(ctx):
+    return "GET", "/", {}
+
+
+@scenario("players_default")
+def players_default(ctx):
+    return "GET", "/api/players", {}
+
+
+@scenario("players_filtered_sorted")
+def players_filtered(ctx):
+    low, high = ctx.age_range()
+    query = {"position": ctx.pick(POSITION_FILTERS), "min_age": low, "max_age": high,
+             "sort_by": ctx.pick(SORTS), "order": ctx.pick(["asc", "desc"]), "page": int(ctx.rng.integers(1, 5))}
+    if ctx.rng.random() < 0.5:
+        query["nationality"] = ctx.pick(ctx.nationalities)
+    return "GET", "/api/players", {"query_string": query}
+
+
+@scenario("players_numeric_filters")
+def players_numeric(ctx):
+    query = {"min_avg_technical": int(ctx.rng.integers(8, 14)), "min_height_cm": int(ctx.rng.integers(170, 190)),
+             "max_value_max": int(ctx.pick([1e6, 5e6, 2e7])), "sort_by": "value_max", "order": "desc"}
+    return "GET", "/api/players", {"query_string": query}
+
+
+@scenario("players_club_search")
+def players_club(ctx):
+    club = ctx.pick(ctx.clubs)
+    return "GET", "/api/players", {"query_string": {"club": club.split()[0][:5]}}
+
+
+@scenario("players_deep_offset")
+def players_deep(ctx):
+    pages = len(ctx.players) // 50
+    return "GET", "/api/players", {"query_string": {"page": int(ctx.rng.integers(pages // 2, pages)),
+                                                    "sort_by": ctx.pick(SORTS)}}
+
+
+@scenario("players_cursor_walk")
+def players_cursor(ctx):
+    query = {"cursor": ctx.cursor or "", "sort_by": "age", "order": "desc"}
+    return "GET", "/api/players", {"query_string": query}
+
+
+@scenario("players_fields")
+def players_fields(ctx):
+    return "GET", "/api/players", {"query_string": {"fields": "name,age,club,technical", "per_page": 100}}
+
+
+@scenario("player_detail")
+def player_detail(ctx):
+    return "GET", f"/api/players/{ctx.player()[0]}", {}
+
+
+@scenario("player_similar")
+def player_similar(ctx):
+    query = {"metric": ctx.pick(["cosine", "euclidean"]), "position": ctx.pick(["same", "", "ATT"])}
+    return "GET", f"/api/players/{ctx.player()[0]}/similar", {"query_string": query}
+
+
+@scenario("player_export_csv")
+def player_export_csv(ctx):
+    return "GET", f"/api/players/{ctx.player()[0]}/export/csv", {}
+
+
+@scenario("player_export_excel")
+def player_export_excel(ctx):
+    return "GET", f"/api/players/{ctx.player()[0]}/export/excel", {}
+
+
+# 501 : ReportLab non installé
+@scenario("player_export_pdf", expect=(200, 501))
+def player_export_pdf(ctx):
+    return "GET", f"/api/players/{ctx.player()[0]}/export/pdf", {}
+
+
+@scenario("export_csv_filtered")
+def export_csv(ctx):
+    body = {"format": "csv", "columns": ["uid", "name", "age", "club", "technical"],
+            "filters": {"nationality": ctx.pick(ctx.nationalities), "sort_by": "age"}}
+    return "POST", "/api/export/csv", {"json": body}
+
+
+@scenario("export_excel_filtered")
+def export_excel(ctx):
+    low, high = ctx.age_range()
+    body = {"format": "excel", "filters": {"nationality": ctx.pick(ctx.nationalities[20:]),
+                                           "min_age": low, "max_age": high}}
+    return "POST", "/api/export/csv", {"json": body}
+
+
+@scenario("search")
+def search(ctx):
+    _, name, _, club = ctx.player()
+    words = name.split() + (club.split() if club else [])
+    term = ctx.pick(words)
+    return "GET", "/api/search", {"query_string": {"q": term[:int(ctx.rng.integers(min(3, len(term)), len(term) + 1))]}}
+
+
+@scenario("scout_memory")
+def scout_memory(ctx):
+    first, second = ctx.rng.choice(ATTRIBUTES, size=2, replace=False)
+    query = {f"min_{first}": int(ctx.rng.integers(12, 17)), f"min_{second}": int(ctx.rng.integers(10, 15)),
+             "max_age": int(ctx.rng.integers(21, 30)), "position": ctx.pick(POSITION_FILTERS),
+             "sort_by": first, "order": "desc", "page": int(ctx.rng.integers(1, 3))}
+    return "GET", "/api/scout", {"query_string": query}
+
+
+@scenario("scout_sql")
+def scout_sql(ctx):
+    # Filtre hors matrice : repli SQL
+    query = {f"min_{ctx.pick(ATTRIBUTES)}": int(ctx.rng.integers(12, 17)),
+             "min_avg_mental": int(ctx.rng.integers(9, 13)), "sort_by": "avg_mental", "order": "desc"}
+    return "GET", "/api/scout", {"query_string": query}
+
+
+@scenario("roles")
+def roles(ctx):
+    return "GET", "/api/roles", {}
+
+
+@scenario("role_top")
+def role_top(ctx):
+    low, high = ctx.age_range()
+    return "GET", f"/api/roles/{ctx.pick(ROLES)}/top", {"query_string": {"min_age": low, "max_age": high}}
+
+
+@scenario("compare")
+def compare(ctx):
+    return "POST", "/api/compare", {"json": {"players": ctx.ids(2, 4)}}
+
+
+@scenario("stats_overview")
+def stats_overview(ctx):
+    return "GET", "/api/stats/overview", {}
+
+
+@scenario("stats_top_players")
+def stats_top(ctx):
+    return "GET", "/api/stats/top-players", {"query_string": {"attribute": ctx.pick(ATTRIBUTES), "limit": 20}}
+
+
+@scenario("stats_distribution")
+def stats_distribution(ctx):
+    query = {"attribute": ctx.pick(ATTRIBUTES)}
+    if ctx.rng.random() < 0.5:
+        query["by"] = "position_group"
+    if ctx.rng.random() < 0.5:
+        query["nationality"] = ctx.pick(ctx.nationalities)
+    return "GET", "/api/stats/distribution", {"query_string": query}
+
+
+@scenario("stats_nationalities")
+def stats_nationalities(ctx):
+    return "GET", "/api/stats/nationalities", {}
+
+
+@scenario("stats_positions")
+def stats_positions(ctx):
+    return "GET", "/api/stats/positions", {}
+
+
+@scenario("filters_nationalities")
+def filters_nationalities(ctx):
+    return "GET", "/api/filters/nationalities", {}
+
+
+@scenario("filters_positions")
+def filters_positions(ctx):
+    return "GET", "/api/filters/positions", {}
+
+
+@scenario("facets")
+def facets(ctx):
+    low, high = ctx.age_range()
+    query = {"min_age": low, "max_age": high}
+    if ctx.rng.random() < 0.5:
+        query["position"] = ctx.pick(POSITION_FILTERS)
+    if ctx.rng.random() < 0.3:
+        query["preferred_foot"] = ctx.pick(FEET)
+    return "GET", "/api/facets", {"query_string": query}
+
+
+@scenario("auth_login")
+def auth_login(ctx):
+    return "POST", "/api/auth/login", {"json": {"username": "admin", "password": "admin123"}}
+
+
+@scenario("auth_verify")
+def auth_verify(ctx):
+    return "GET", "/api/auth/verify", ctx.auth()
+
+
+@scenario("auth_forgot_password")
+def forgot_password(ctx):
+    return "POST", "/api/auth/forgot-password", {"json": {"username": "admin"}}
+
+
+# Code volontairement faux : le mot de passe admin ne change pas
+@scenario("auth_reset_password", expect=(400,))
+def reset_password(ctx):
+    return "POST", "/api/auth/reset-password", {"json": {"username": "admin", "code": "x", "new_password": "x"}}
+
+
+# ---- Écritures admin (en dernier : elles invalident les caches) ----
+@scenario("admin_update_player")
+def update_player(ctx):
+    # Mêmes valeurs : la base reste identique d'une exécution à l'autre
+    player_id, name, age, club = ctx.player()
+    return "PUT", f"/api/players/{player_id}", dict(ctx.auth(), json={"name": name, "age": age, "club": club})
+
+
+@scenario("admin_add_player", expect=(201,))
+def add_player(ctx):
+    body = {"name": "Bench Player", "age": 20, "nationality": "FRA", "club": None, "position": "ST (C)"}
+    return "POST", "/api/players", dict(ctx.auth(), json=body)
+
+
+@scenario("admin_delete_player")
+def delete_player(ctx):
+    return "DELETE", f"/api/players/{ctx.scratch_ids.pop()}", ctx.auth()
+
+
+@scenario("admin_import", expect=(202,))
+def admin_import(ctx):
+    data = {"file": (io.BytesIO(ctx.import_file), "bench.csv")}
+    return "POST", "/api/admin/import", dict(ctx.auth(), data=data, content_type="multipart/form-data")
+
+
+@scenario("admin_jobs")
+def admin_jobs(ctx):
+    return "GET", "/api/admin/jobs", ctx.auth()
+
+
+@scenario("admin_job_status")
+def admin_job_status(ctx):
+    return "GET", f"/api/admin/jobs/{ctx.job_id}", ctx.auth()
+
+
+# 409 : tâche déjà terminée
+@scenario("admin_job_cancel", expect=(200, 409))
+def admin_job_cancel(ctx):
+    return "POST", f"/api/admin/jobs/{ctx.job_id}/cancel", ctx.auth()
+
+
+@scenario("admin_metrics")
+def admin_metrics(ctx):
+    return "GET", "/api/admin/metrics", ctx.auth()
+
+
+# ====================
+# EXÉCUTION D'UNE ÉCHELLE
+# ====================
+def prepare_context(n):
+    """Échantillon de joueurs, valeurs de filtres, jeton admin, joueurs et fichier temporaires"""
+    import pandas as pd
+    from app import db
+    from models import Player
+    from ingest import compute_category_averages, compute_shadow_columns, frame_records, model_fields
+    from generate_players import PlayerGenerator
+
+    rng = np.random.default_rng(SEED + 1)
+    sample = rng.choice(np.arange(1, n + 1), size=min(n, 2000), replace=False).tolist()
+    players = db.session.execute(
+        db.select(Player.id, Player.name, Player.age, Player.club).where(Player.id.in_(sample))
+    ).all()
+    nationalities = db.session.execute(
+        db.select(Player.nationality).group_by(Player.nationality).order_by(db.func.count().desc())
+    ).scalars().all()
+    clubs = sorted({club for _, _, _, club in players if club})
+    ctx = BenchContext(rng, [tuple(p) for p in players], nationalities, clubs)
+
+    # Joueurs supprimés par admin_delete_player, fichier importé par admin_import
+    scratch = PlayerGenerator(seed=SEED + 2, clubs=50).chunk(0, SCRATCH_OFFSET, ITERATIONS * 2)
+    deleted = scratch.iloc[:ITERATIONS]
+    rows = pd.concat([deleted, compute_category_averages(deleted), compute_shadow_columns(deleted)], axis=1)
+    db.session.execute(Player.__table__.insert(), frame_records(rows.rename(columns=model_fields())))
+    db.session.commit()
+    ctx.scratch_ids = deleted["id"].tolist()
+    ctx.import_file = scratch.iloc[ITERATIONS:].to_csv(index=False).encode()
+    return ctx
+
+
+def wait_for_imports(timeout=120):
+    """Attend la fin des tâches d'import lancées par admin_import"""
+    from app import db
+    from models import ImportJob
+
+    deadline = time.time() + timeout
+    while time.time() < deadline and db.session.execute(
+        db.select(db.func.count()).select_from(ImportJob).where(ImportJob.status.in_(["queued", "running"]))
+    ).scalar():
+        db.session.rollback()
+        time.sleep(0.2)
+
+
+def cleanup(n):
+    """Retire les joueurs et tâches créés par les écritures, une fois les imports terminés"""
+    from app import db
+    from models import ImportJob, Player, PlayerPosition
+
+    wait_for_imports()
+    db.session.execute(db.delete(PlayerPosition).where(PlayerPosition.player_id > n))
+    db.session.execute(db.delete(Player).where(Player.id > n))
+    db.session.execute(db.delete(ImportJob))
+    db.session.commit()
+
+
+def summarize(latencies, queries, sizes, statuses, errors):
+    latencies = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "mean_ms": round(float(latencies.mean()), 2),
+        "queries_per_request": round(float(np.mean(queries)), 2),
+        "mean_bytes": int(np.mean(sizes))
+    }
+
+
+def run_scenario(client, ctx, build, expect, statements):
+    latencies, queries, sizes, statuses, errors = [], [], [], {}, 0
+    method = None
+    for _ in range(ITERATIONS):
+        method, url, kwargs = build(ctx)
+        before = statements[0]
+        started = time.perf_counter()
+        try:
+            response = client.open(url, method=method, **kwargs)
+            body = response.get_data()
+            status = response.status_code
+        except Exception as e:
+            # Exceptions propagées par Flask : comptées comme erreurs
+            body, status = b"", type(e).__name__
+        latencies.append(time.perf_counter() - started)
+        queries.append(statements[0] - before)
+        sizes.append(len(body))
+        statuses[status] = statuses.get(status, 0) + 1
+        if status not in expect:
+            errors += 1
+        elif url.startswith("/api/auth/login"):
+            ctx.token = json.loads(body)["token"]
+        elif "cursor" in kwargs.get("query_string", {}):
+            ctx.cursor = json.loads(body)["pagination"]["next_cursor"]
+        elif url == "/api/admin/import":
+            ctx.job_id = json.loads(body)["job_id"]
+    return {"method": method, **summarize(latencies, queries, sizes, statuses, errors)}
+
+
+def measure_metrics_overhead(client, ctx, results):
+    """Surcoût des métriques par route : {scénario: latences avec / sans}, écart médian
+
+    Comparer deux processus mesure surtout le bruit de la machine : ici, les mêmes requêtes
+    sont rejouées par blocs alternés dans ce processus, metrics.enabled basculé entre deux
+    blocs, et la médiane des blocs de chaque mode est retenue. Scénarios GET seulement (sans
+    écriture), hors /api/admin/metrics.
+    """
+    from metrics import metrics
+
+    scenarios = {}
+    print(f"\n   {'surcoût des métriques':<28} {'sans':>10} {'avec':>10} {'écart':>9}")
+    for name, build, _ in SCENARIOS:
+        if name == "admin_metrics" or results[name]["method"] != "GET":
+            continue
+        timings = {False: [], True: []}
+        for round_index in range(OVERHEAD_ROUNDS):
+            block = [build(ctx) for _ in range(OVERHEAD_BLOCK)]
+            for enabled in ((False, True) if round_index % 2 == 0 else (True, False)):
+                metrics.enabled = enabled
+                started = time.perf_counter()
+                for method, url, kwargs in block:
+                    client.open(url, method=method, **kwargs).get_data()
+                timings[enabled].append((time.perf_counter() - started) / OVERHEAD_BLOCK * 1000)
+        metrics.enabled = True
+        without, with_metrics = statistics.median(timings[False]), statistics.median(timings[True])
+        delta = round(100 * (with_metrics - without) / without, 1)
+        scenarios[name] = {"ms_without": round(without, 3), "ms_with": round(with_metrics, 3),
+                           "delta_us": round((with_metrics - without) * 1000), "delta_pct": delta}
+        print(f"   {name:<28} {without:>7.2f} ms {with_metrics:>7.2f} ms {delta:>+8.1f}%", flush=True)
+    overhead = round(statistics.median(s["delta_pct"] for s in scenarios.values()), 1)
+    print(f"\n   Surcoût médian des métriques : {overhead:+.1f}% "
+          f"({statistics.median(s['delta_us'] for s in scenarios.values()):+.0f} µs par requête)")
+    return {"rounds": OVERHEAD_ROUNDS, "block": OVERHEAD_BLOCK, "overhead_pct": overhead,
+            "scenarios": scenarios}
+
+
+def run_scale(scale):
+    """Une échelle, dans ce processus (base désignée par DATABASE_URL)"""
+    n = max(int(round(FM2023_PLAYERS * scale)), 200)
+    from sqlalchemy import event
+    from app import app, db, warm_up
+
+    # Requêtes SQL exécutées (toutes connexions confondues)
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    with app.app_context():
+        started = time.perf_counter()
+        built = build_database(n)
+        build_seconds = time.perf_counter() - started
+        event.listen(db.engine, "before_cursor_execute", count)
+        ctx = prepare_context(n)
+
+    started = time.perf_counter()
+    warm_up(resume_jobs=False)
+    warm_up_seconds = time.perf_counter() - started
+
+    # Les exceptions des routes sont comptées dans le rapport, pas journalisées
+    app.logger.setLevel(logging.CRITICAL)
+    client = app.test_client()
+    ctx.token = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"}).json["token"]
+    scenarios = {}
+    for name, build, expect in SCENARIOS:
+        scenarios[name] = run_scenario(client, ctx, build, expect, statements)
+        result = scenarios[name]
+        print(f"   {name:<28} p50 {result['p50_ms']:>8.1f} ms   p95 {result['p95_ms']:>8.1f} ms"
+              f"   p99 {result['p99_ms']:>8.1f} ms   {result['queries_per_request']:>5.1f} req. SQL"
+              + (f"   ⚠️ {result['errors']} erreurs" if result['errors'] else ""), flush=True)
+
+    overhead = None
+    if METRICS_OVERHEAD:
+        # Imports en arrière-plan terminés : ils prendraient du CPU à l'un des deux modes
+        with app.app_context():
+            wait_for_imports()
+        overhead = measure_metrics_overhead(client, ctx, scenarios)
+
+    with app.app_context():
+        cleanup(n)
+    return {
+        "players": n,
+        "database_built": built,
+        "build_seconds": round(build_seconds, 1),
+        "warm_up_seconds": round(warm_up_seconds, 2),
+        "scenarios": scenarios,
+        "metrics_overhead": overhead
+    }
+
+
+# ====================
+# ORCHESTRATION ET RÉFÉRENCE
+# ====================
+def run_in_subprocess(scale):
+    """Lance une échelle dans un processus neuf pointé sur sa propre base"""
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    label = scale_label(scale)
+    output = os.path.join(BENCH_DIR, f"run-{label}.json")
+    env = dict(os.environ)
+    if METRICS_OVERHEAD:
+        # Hooks installés pour pouvoir les basculer (metrics.enabled)
+        env['METRICS_ENABLED'] = '1'
+    env.update(FLASK_ENV='production',
+               DATABASE_URL='sqlite:///' + os.path.join(BENCH_DIR, f"players-{label}.db"),
+               DATA_VERSION_FILE=os.path.join(BENCH_DIR, f"version-{label}"),
+               METRICS_DIR=os.path.join(BENCH_DIR, "metrics"),
+               BENCH_CHILD_SCALE=str(scale),
+               BENCH_CHILD_OUTPUT=output)
+    subprocess.run([sys.executable, os.path.abspath(__file__)], cwd=BACKEND_DIR, env=env, check=True)
+    with open(output) as f:
+        return json.load(f)
+
+
+def compare_with_baseline(results, baseline):
+    """Régressions par rapport à une exécution de référence : [(échelle, scénario, motif)]"""
+    regressions = []
+    for label, run in results["scales"].items():
+        reference = baseline.get("scales", {}).get(label)
+        if reference is None:
+            continue
+        for name, current in run["scenarios"].items():
+            previous = reference["scenarios"].get(name)
+            if previous is None:
+                continue
+            if (current["p95_ms"] > previous["p95_ms"] * TOLERANCE
+                    and current["p95_ms"] - previous["p95_ms"] > MIN_REGRESSION_MS):
+                regressions.append((label, name, f"p95 {previous['p95_ms']} -> {current['p95_ms']} ms"))
+            if current["queries_per_request"] > previous["queries_per_request"]:
+                regressions.append((label, name, f"requêtes SQL {previous['queries_per_request']}"
+                                                 f" -> {current['queries_per_request']}"))
+            if current["errors"] > previous["errors"]:
+                regressions.append((label, name, f"erreurs {previous['errors']} -> {current['errors']}"))
+    return regressions
+
+
+def benchmark():
+    results = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": ITERATIONS,
+        "seed": SEED,
+        "scales": {}
+    }
+    for scale in SCALES:
+        label = scale_label(scale)
+        print(f"\n📊 Échelle {label} ({int(round(FM2023_PLAYERS * scale)):,} joueurs)")
+        run = run_in_subprocess(scale)
+        overhead = run.pop("metrics_overhead")
+        if overhead is not None:
+            results.setdefault("metrics_overhead", {})[label] = overhead
+        results["scales"][label] = run
+
+    os.makedirs(os.path.dirname(os.path.abspath(OUTPUT)), exist_ok=True)
+    with open(OUTPUT, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Résultats enregistrés dans {OUTPUT}")
+
+    regressions = [(label, "métriques", f"surcoût {overhead['overhead_pct']}% > {OVERHEAD_LIMIT}%")
+                   for label, overhead in results.get("metrics_overhead", {}).items()
+                   if overhead["overhead_pct"] > OVERHEAD_LIMIT]
+    if BASELINE:
+        with open(BASELINE) as f:
+            regressions += compare_with_baseline(results, json.load(f))
+    for label, name, reason in regressions:
+        print(f"❌ {label} {name} : {reason}")
+    if not regressions and BASELINE:
+        print(f"✅ Aucune régression par rapport à {BASELINE}")
+    return not regressions
+
+
+if __name__ == "__main__":
+    if os.environ.get("BENCH_CHILD_SCALE"):
+        run = run_scale(float(os.environ["BENCH_CHILD_SCALE"]))
+        with open(os.environ["BENCH_CHILD_OUTPUT"], "w") as f:
+            json.dump(run, f)
+    else:
+        sys.exit(0 if benchmark() else 1)
@@ -0,0 +1,317 @@
+# cache.py - Caches en mémoire du processus et cache de réponses
+"""Caches invalidés par les écritures admin (voir notify_players_changed)"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows : serveur de développement mono-processus
+    fcntl = None
+
+
+class LRUCache:
+    """Dictionnaire borné : le moins récemment utilisé est évincé en premier"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SizedLRUCache(LRUCache):
+    """LRU borné par la taille cumulée des valeurs (bytes) plutôt que par leur nombre"""
+
+    def __init__(self, maxbytes):
+        super().__init__(maxsize=None)
+        self.maxbytes = maxbytes
+        self.size = 0
+
+    def set(self, key, value):
+        if len(value) > self.maxbytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._data[key] = value
+            self.size += len(value)
+            while self.size > self.maxbytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def pop(self, key):
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                self.size -= len(value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+# Nombre de joueurs par combinaison de filtres de /api/players
+count_cache = LRUCache(maxsize=1024)
+
+
+# ====================
+# BACKENDS DU CACHE DE RÉPONSES
+# ====================
+class MemoryBackend:
+    """LRU en mémoire, propre à chaque processus"""
+
+    shared = False
+
+    def __init__(self, maxsize=512):
+        self._entries = LRUCache(maxsize)
+        self._generation = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires < time.time():
+            self._entries.pop(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        self._entries.set(key, (time.time() + ttl if ttl else None, value))
+
+    def generation(self):
+        return self._generation
+
+    def bump_generation(self):
+        self._generation += 1
+        self._entries.clear()
+
+
+class DiskBackend:
+    """Fichiers pickle dans un répertoire local, partagés entre workers
+
+    Borné en nombre d'entrées et en octets : au-delà, les fichiers les moins récemment
+    lus (mtime, rafraîchi à chaque lecture) sont supprimés.
+    """
+
+    GENERATION_FILE = "GENERATION"
+    shared = True
+
+    def __init__(self, directory, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+
+    def _write(self, path, data):
+        # Écriture atomique : un lecteur ne voit jamais de fichier partiel
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires is not None and expires < time.time():
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value, ttl):
+        data = pickle.dumps((time.time() + ttl if ttl else None, value))
+        if len(data) > self.max_bytes:
+            return
+        self._write(self._path(key), data)
+        self._evict()
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment lues au-delà des bornes"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if len(entries) <= self.max_entries and total <= self.max_bytes:
+            return
+        entries.sort()
+        for count, (_, size, path) in enumerate(entries):
+            if len(entries) - count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def generation(self):
+        try:
+            with open(os.path.join(self.directory, self.GENERATION_FILE)) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump_generation(self):
+        self._write(os.path.join(self.directory, self.GENERATION_FILE),
+                    str(self.generation() + 1).encode())
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                self._remove(entry.path)
+
+
+class ResponseCache:
+    """Cache clé/valeur avec TTL, invalidation par génération et anti-stampede"""
+
+    # Verrous répartis par hachage de la clé : nombre fixe, quelles que soient les clés demandées
+    LOCK_STRIPES = 64
+
+    def __init__(self, backend, default_ttl=3600):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+    def _key_lock(self, key):
+        return self._locks[hash(key) % self.LOCK_STRIPES]
+
+    def get_or_set(self, key, compute, ttl=None):
+        """Valeur en cache, sinon calculée par un seul thread à la fois pour cette clé.
+
+        compute() peut renvoyer None pour ne rien mettre en cache (erreurs).
+        """
+        full_key = f"{self.backend.generation()}:{key}"
+        value = self.backend.get(full_key)
+        if value is not None:
+            return value
+
+        with self._key_lock(key):
+            # Un autre thread a pu remplir l'entrée pendant l'attente
+            value = self.backend.get(full_key)
+            if value is not None:
+                return value
+            value = compute()
+            if value is not None and self.backend.generation() == int(full_key.split(":", 1)[0]):
+                self.backend.set(full_key, value, ttl if ttl is not None else self.default_ttl)
+            return value
+
+    def invalidate(self):
+        """Périme toutes les entrées (écriture sur la table players)"""
+        self.backend.bump_generation()
+
+    def invalidate_local(self):
+        """Périme les entrées propres à ce processus (écriture faite par un autre worker)"""
+        if not self.backend.shared:
+            self.backend.bump_generation()
+
+
+def create_response_cache(config):
+    """Cache de réponses selon CACHE_BACKEND ('memory' ou 'disk')"""
+    if config.get("CACHE_BACKEND") == "disk":
+        backend = DiskBackend(config["CACHE_DIR"], max_entries=config.get("CACHE_MAX_ENTRIES", 512),
+                              max_bytes=config.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    else:
+        backend = MemoryBackend(maxsize=config.get("CACHE_MAX_ENTRIES", 512))
+    return ResponseCache(backend, default_ttl=config.get("CACHE_DEFAULT_TTL", 3600))
+
+
+# ====================
+# VERSION DES DONNÉES ENTRE WORKERS
+# ====================
+class SharedVersion:
+    """Compteur d'écritures partagé par les workers d'une même machine (fichier local)
+
+    Chaque worker retient la dernière version qu'il a appliquée : une version plus
+    récente signifie qu'un autre worker a modifié la base et que ses structures en
+    mémoire sont périmées.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._mtime = None
+        self._seen = self.current()
+
+    def current(self):
+        try:
+            with open(self.path) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump(self):
+        """Signale une écriture de ce worker"""
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            previous = self.current()
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(str(previous + 1))
+            os.replace(tmp, self.path)
+        # Si un autre worker avait écrit entre-temps, sa modification reste à appliquer ici
+        if previous == self._seen:
+            self._seen = previous + 1
+
+    def changed(self):
+        """True (une seule fois) si un autre worker a écrit depuis le dernier appel"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        current = self.current()
+        if current == self._seen:
+            return False
+        self._seen = current
+        return True
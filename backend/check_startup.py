@@ -0,0 +1,101 @@
+# backend/check_startup.py - Temps de démarrage à froid de l'API (python check_startup.py)
+"""
+Lance plusieurs processus neufs qui importent app.py sous `python -X importtime`
+puis servent une première requête GET / ; garde le meilleur essai et échoue
+(code de sortie 1) si le démarrage dépasse le budget ou si un module lourd
+réservé aux imports/exports est chargé au démarrage.
+
+Variables d'environnement :
+    STARTUP_BUDGET_MS   budget import + première réponse (défaut 1500)
+    STARTUP_RUNS        nombre d'essais (défaut 3)
+    STARTUP_REPORT      fichier JSON où enregistrer la mesure (optionnel)
+"""
+import json
+import os
+import subprocess
+import sys
+
+BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
+RUNS = int(os.environ.get('STARTUP_RUNS', 3))
+REPORT = os.environ.get('STARTUP_REPORT')
+
+# Chargés seulement par les imports admin et les exports
+LAZY_MODULES = ['pandas', 'openpyxl', 'reportlab']
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.app.test_client().get('/')
+answered = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_request_ms': (answered - imported) * 1000,
+    'loaded': [m for m in %r if m in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+
+def parse_importtime(stderr):
+    """Lignes `import time: self | cumulé | module` -> [(module, self_us, cumul_us, profondeur)]"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def measure():
+    """Un démarrage dans un processus neuf"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE],
+                            cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    run = json.loads(result.stdout.strip().splitlines()[-1])
+    run['total_ms'] = run['import_ms'] + run['first_request_ms']
+    modules = parse_importtime(result.stderr)
+    # Modules importés directement par app.py (listés avant lui, après le module racine précédent)
+    end = next(i for i, m in enumerate(modules) if m[0] == 'app' and m[3] == 0)
+    start = max([i for i, m in enumerate(modules[:end]) if m[3] == 0], default=-1) + 1
+    top_level = [m for m in modules[start:end] if m[3] == 1]
+    run['slowest'] = [{'module': name, 'cumulative_ms': round(cumulative / 1000, 1)}
+                      for name, _, cumulative, _ in sorted(top_level, key=lambda m: -m[2])[:10]]
+    return run
+
+
+def check_startup():
+    print(f"Démarrage à froid de app.py ({RUNS} essais, budget {BUDGET_MS:.0f} ms)...")
+    runs = [measure() for _ in range(RUNS)]
+    best = min(runs, key=lambda r: r['total_ms'])
+
+    print(f"\n Import : {best['import_ms']:.0f} ms | première requête : {best['first_request_ms']:.0f} ms"
+          f" | total : {best['total_ms']:.0f} ms")
+    print("\n MODULES LES PLUS COÛTEUX :")
+    print("-" * 30)
+    for entry in best['slowest']:
+        print(f"- {entry['module']} ({entry['cumulative_ms']} ms)")
+
+    if REPORT:
+        with open(REPORT, 'w') as f:
+            json.dump({'budget_ms': BUDGET_MS, 'runs': runs, 'best': best}, f, indent=2)
+
+    failures = []
+    if best['loaded']:
+        failures.append(f"modules chargés au démarrage : {', '.join(best['loaded'])}")
+    if best['total_ms'] > BUDGET_MS:
+        failures.append(f"{best['total_ms']:.0f} ms > budget de {BUDGET_MS:.0f} ms")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("\n✅ Démarrage dans le budget")
+    return not failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_startup() else 1)
@@ -1,5 +1,6 @@
 # backend/config.py
 import os
+import tempfile
 from dotenv import load_dotenv
 
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -14,6 +15,42 @@ class Config:
     # Pagination
     ITEMS_PER_PAGE = 50
     MAX_ITEMS_PER_PAGE = 100
+    
+    # Recherche : index trigrammes en mémoire ('memory') ou ILIKE en base ('sql')
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'memory')
+    
+    # Scouting multi-critères : masques sur la matrice en mémoire ('memory') ou SQL ('sql')
+    SCOUT_BACKEND = os.environ.get('SCOUT_BACKEND', 'memory')
+    
+    # Cache des réponses /api/stats/* et /api/filters/* ('memory' ou 'disk')
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'sokrstat-cache')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 3600))
+    CACHE_MAX_ENTRIES = 512
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    
+    # Exports par joueur : rendus hors requête dans un pool de processus borné
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 2))
+    EXPORT_MAX_PENDING = int(os.environ.get('EXPORT_MAX_PENDING', 8))
+    EXPORT_TIMEOUT = int(os.environ.get('EXPORT_TIMEOUT', 30))
+    EXPORT_CACHE_BYTES = int(os.environ.get('EXPORT_CACHE_BYTES', 64 * 1024 * 1024))
+    
+    # Imports admin en tâche de fond (fichiers déposés conservés en base jusqu'à la fin de la tâche)
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 1))
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))
+    IMPORT_STALE_AFTER = int(os.environ.get('IMPORT_STALE_AFTER', 300))
+    
+    # Compteur d'écritures partagé par les workers gunicorn d'une même machine
+    DATA_VERSION_FILE = os.environ.get('DATA_VERSION_FILE') or \
+        os.path.join(tempfile.gettempdir(), 'sokrstat-data', 'VERSION')
+    
+    # Métriques par route (/api/admin/metrics) : un fichier par worker, réécrit au plus toutes les
+    # METRICS_FLUSH_INTERVAL secondes et fusionné à la lecture
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'sokrstat-metrics')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    # Jeton statique pour le scraper Prometheus (sinon jeton admin JWT)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
 
 class DevelopmentConfig(Config):
     """Configuration Développement"""
@@ -27,6 +64,15 @@ class ProductionConfig(Config):
     """Configuration Production"""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    # Une connexion par thread de worker (gunicorn.conf.py renseigne DB_POOL_SIZE) ; les
+    # connexions inactives sont recyclées avant d'être coupées côté Postgres hébergé
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 4)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+        'pool_timeout': 10,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': True
+    }
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '').split(',')
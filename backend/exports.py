@@ -0,0 +1,191 @@
+# exports.py - Écriture des exports de joueurs
+"""
+Exports en masse : les lignes arrivent d'un curseur serveur et sont écrites au
+fil de l'eau, la mémoire reste constante quelle que soit la taille de l'export.
+
+Fiches joueur : rendues dans un pool de processus borné et mises en cache par
+(joueur, version du contenu, format).
+"""
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from cache import SizedLRUCache
+
+# Lignes lues par aller-retour avec la base
+EXPORT_BATCH_SIZE = 1000
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def csv_stream(header, rows, flush_every=EXPORT_BATCH_SIZE):
+    """Générateur de morceaux CSV (BOM UTF-8 pour Excel, comme les exports existants)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if n % flush_every == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def xlsx_file(header, rows, sheet_name="Joueurs"):
+    """Classeur openpyxl en mode écriture seule, dans un fichier temporaire prêt à être lu"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(header)
+    for row in rows:
+        sheet.append(tuple(row))
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+# ====================
+# FICHE JOUEUR (csv, excel, pdf)
+# ====================
+# Les fonctions de rendu tournent dans un processus du pool : elles ne reçoivent
+# que des types simples et n'importent openpyxl / ReportLab que là-bas.
+PLAYER_EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "excel": (XLSX_MIMETYPE, "xlsx"),
+    "pdf": ("application/pdf", "pdf")
+}
+
+
+def player_rows(player_data):
+    """(catégorie, attribut, valeur) à plat pour une fiche to_dict(include_all_stats=True)"""
+    for key, value in player_data.items():
+        if isinstance(value, dict):
+            for k, v in value.items():
+                yield key, k, str(v)
+        else:
+            yield "Général", key, str(value)
+
+
+def render_player_csv(name, player_data):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(["Attribut", "Valeur"])
+    for category, key, value in player_rows(player_data):
+        writer.writerow([key if category == "Général" else f"{category}_{key}", value])
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def render_player_xlsx(name, player_data):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Statistiques")
+    sheet.append(["Catégorie", "Attribut", "Valeur"])
+    for row in player_rows(player_data):
+        sheet.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def render_player_pdf(name, player_data):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    output = io.BytesIO()
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24, spaceAfter=20, alignment=1)
+
+    table = Table([['Catégorie', 'Attribut', 'Valeur']] + [list(row) for row in player_rows(player_data)])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    doc.build([Paragraph(f"Fiche: {name}", title_style), table])
+    return output.getvalue()
+
+
+RENDERERS = {"csv": render_player_csv, "excel": render_player_xlsx, "pdf": render_player_pdf}
+
+
+def render_player(export_format, name, player_data):
+    """Point d'entrée exécuté dans le pool"""
+    return RENDERERS[export_format](name, player_data)
+
+
+def player_version(player_data):
+    """Empreinte du contenu de la fiche : change dès qu'une valeur exportée change"""
+    payload = json.dumps(player_data, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+
+class ExportBusy(RuntimeError):
+    """Trop de rendus en attente : la requête est refusée plutôt que mise en file"""
+
+
+class PlayerExporter:
+    """Rendu des fiches dans un pool de processus borné, avec cache LRU des fichiers"""
+
+    def __init__(self, workers=2, max_pending=8, timeout=30, cache_bytes=64 * 1024 * 1024):
+        self.workers = workers
+        self.timeout = timeout
+        self.cache = SizedLRUCache(cache_bytes)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            workers=config.get("EXPORT_WORKERS", 2),
+            max_pending=config.get("EXPORT_MAX_PENDING", 8),
+            timeout=config.get("EXPORT_TIMEOUT", 30),
+            cache_bytes=config.get("EXPORT_CACHE_BYTES", 64 * 1024 * 1024)
+        )
+
+    def _executor(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # spawn : les workers ne copient ni connexions ni threads du processus web
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._pool
+
+    def render(self, player_id, export_format, name, player_data):
+        """Contenu du fichier, depuis le cache si la fiche n'a pas changé"""
+        key = (player_id, player_version(player_data), export_format)
+        content = self.cache.get(key)
+        if content is not None:
+            return content
+
+        if not self._slots.acquire(blocking=False):
+            raise ExportBusy("Trop d'exports en cours, réessayez dans un instant")
+        try:
+            future = self._executor().submit(render_player, export_format, name, player_data)
+            content = future.result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+        self.cache.set(key, content)
+        return content
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,115 @@
+# facets.py - Comptages par facette pour le panneau de filtres
+"""
+Chaque valeur d'une facette peu variée (pied, tranche d'âge...) a son bitmap
+compressé (np.packbits, 1 bit par joueur) : son comptage sous les filtres
+courants est un ET suivi d'un popcount. Les facettes très variées (clubs)
+sont comptées par np.bincount sur leurs codes.
+
+Les comptes sont disjonctifs : une facette ignore son propre filtre, pour que
+le panneau montre ce qu'on obtiendrait en changeant de valeur.
+"""
+import numpy as np
+
+# Au-delà, un bitmap par valeur coûte plus cher qu'un bincount sur les codes
+BITMAP_MAX_VALUES = 64
+
+# Bits à 1 de chaque octet
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+AGE_BANDS = [(0, 17, "≤17"), (18, 21, "18-21"), (22, 25, "22-25"), (26, 29, "26-29"),
+             (30, 33, "30-33"), (34, 200, "34+")]
+
+
+def age_band_codes(ages):
+    """Code de tranche d'âge par joueur (-1 = âge inconnu)"""
+    edges = np.array([low for low, _, _ in AGE_BANDS[1:]])
+    codes = np.digitize(ages, edges).astype(np.int32)
+    codes[ages < 0] = -1
+    return codes
+
+
+class Facet:
+    """Codes d'une facette (-1 = absent) et, si peu de valeurs, un bitmap par valeur
+
+    ordered : les libellés sont déjà dans l'ordre d'affichage (sinon tri par compte décroissant)
+    """
+
+    def __init__(self, codes, labels, ordered=False):
+        self.codes = codes
+        self.labels = labels
+        self.ordered = ordered
+        self.bitmaps = None
+        if len(labels) <= BITMAP_MAX_VALUES:
+            values = np.arange(len(labels), dtype=codes.dtype)
+            self.bitmaps = np.packbits(codes[None, :] == values[:, None], axis=1)
+
+    @classmethod
+    def from_flags(cls, flags, labels, ordered=False):
+        """Facette multivaluée : le bit i de flags indique que le joueur a la valeur i"""
+        facet = cls.__new__(cls)
+        facet.codes = None
+        facet.labels = labels
+        facet.ordered = ordered
+        bits = np.arange(len(labels), dtype=flags.dtype)
+        facet.bitmaps = np.packbits((flags[None, :] >> bits[:, None]) & 1, axis=1)
+        return facet
+
+    def selection(self, wanted):
+        """Bitmap des joueurs ayant l'une des valeurs demandées"""
+        if self.bitmaps is None:
+            return np.packbits(np.isin(self.codes, wanted))
+        if not len(wanted):
+            return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[wanted], axis=0)
+
+    def counts(self, packed, n):
+        """Nombre de joueurs par valeur parmi ceux du bitmap `packed`"""
+        if self.bitmaps is not None:
+            return POPCOUNT[self.bitmaps & packed].sum(axis=1, dtype=np.int64)
+        selected = np.unpackbits(packed, count=n).view(bool)
+        codes = self.codes[selected]
+        return np.bincount(codes[codes >= 0], minlength=len(self.labels))
+
+
+class FacetIndex:
+    """Facettes d'un instantané de la matrice d'attributs"""
+
+    def __init__(self, facets, n):
+        self.facets = facets  # {nom: Facet}
+        self.n = n
+
+    def pack(self, mask):
+        """Masque booléen -> bitmap compressé"""
+        return np.packbits(mask)
+
+    def select(self, name, codes):
+        """Bitmap des joueurs ayant l'une des valeurs `codes` de la facette `name`"""
+        return self.facets[name].selection(codes)
+
+    def count(self, chosen, base=None, limits=None):
+        """
+        Comptes disjonctifs : chosen = {facette: bitmap de sa sélection}, base = bitmap des
+        filtres hors facettes. Renvoie (total, {facette: [{"value", "count"}]}).
+        """
+        limits = limits or {}
+        everyone = base if base is not None else self.pack(np.ones(self.n, dtype=bool))
+
+        def combined(excluded=None):
+            packed = everyone
+            for name, bits in chosen.items():
+                if name != excluded:
+                    packed = packed & bits
+            return packed
+
+        total = int(POPCOUNT[combined()].sum(dtype=np.int64))
+        result = {}
+        for name, facet in self.facets.items():
+            counts = facet.counts(combined(name), self.n)
+            present = np.flatnonzero(counts)
+            if not facet.ordered:
+                # Les plus fréquentes d'abord
+                present = present[np.lexsort((present, -counts[present]))]
+            if name in limits:
+                present = present[:limits[name]]
+            result[name] = [{"value": facet.labels[i], "count": int(counts[i])} for i in present]
+        return total, result
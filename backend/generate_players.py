@@ -0,0 +1,380 @@
+# generate_players.py - Joueurs FM synthétiques pour les tests de charge
+"""
+Génère des joueurs au format de l'export FM, par lots à mémoire bornée :
+
+    python generate_players.py --rows 2000000 --output players.csv
+    python generate_players.py --rows 500000 --output players.parquet --seed 7
+    python generate_players.py --rows 10000 --headers model --output import.csv
+
+--headers fm (défaut) écrit les en-têtes de l'export FM, lus tels quels par
+import_data.py et /api/admin/import ; --headers model écrit les noms d'attributs
+du modèle (/api/admin/import seulement).
+
+Même graine et même taille de lot : fichier identique à l'octet près. Les
+attributs (1-20) dépendent du niveau du joueur, de son âge et de ses postes :
+les attributs clés et préférables des rôles FM de ses postes (roles.py) sont
+relevés, ceux de gardien effondrés chez les joueurs de champ et inversement.
+Nationalités et clubs suivent des lois de Zipf, les clubs ayant un pays.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import COLUMN_MAPPING
+from models import GOALKEEPER_ATTRIBUTES, HIDDEN_ATTRIBUTES, MENTAL_ATTRIBUTES, PHYSICAL_ATTRIBUTES, \
+    RATED_ATTRIBUTES, TECHNICAL_ATTRIBUTES
+from positions import POSITION_INDEX, parse_positions
+from roles import ROLES, role_weights
+
+DEFAULT_CHUNK_SIZE = 50_000
+# Date de référence des âges (sortie de FM2023)
+REFERENCE_DATE = np.datetime64("2022-11-08")
+
+# ====================
+# POSTES
+# ====================
+# Rôle FM -> côtés possibles, dans l'ordre d'écriture de FM
+ROLE_SIDES = {"GK": "", "D": "RLC", "WB": "RL", "DM": "", "M": "RLC", "AM": "RLC", "ST": "C"}
+ROLE_ORDER = list(ROLE_SIDES)
+PRIMARY_ROLES = {"GK": 0.09, "D": 0.29, "WB": 0.06, "DM": 0.09, "M": 0.2, "AM": 0.13, "ST": 0.14}
+SIDE_CHOICES = {
+    "D": {"C": 0.5, "R": 0.19, "L": 0.17, "RC": 0.04, "LC": 0.04, "RLC": 0.06},
+    "WB": {"R": 0.5, "L": 0.44, "RL": 0.06},
+    "M": {"C": 0.52, "R": 0.15, "L": 0.13, "RL": 0.1, "RLC": 0.1},
+    "AM": {"C": 0.36, "R": 0.19, "L": 0.17, "RL": 0.23, "RLC": 0.05},
+    "ST": {"C": 1.0}
+}
+# Second poste voisin du premier, tiré dans 45 % des cas
+SECONDARY_RATE = 0.45
+NEIGHBOURS = {"GK": [], "D": ["WB", "DM"], "WB": ["D", "M"], "DM": ["M", "D"], "M": ["AM", "DM"],
+              "AM": ["M", "ST"], "ST": ["AM"]}
+
+
+def _sides_for(role, sides):
+    """Côtés d'un poste secondaire : ceux du principal qu'il admet, sinon les siens par défaut"""
+    allowed = ROLE_SIDES[role]
+    if not allowed:
+        return [""]
+    shared = "".join(s for s in allowed if s in sides)
+    if shared:
+        return [shared]
+    return ["C"] if "C" in allowed else ["R", "L"]
+
+
+def _format_positions(parts):
+    """[(rôle, côtés)] -> chaîne FM ("D/WB (R)", "AM (RL), ST (C)", "DM, M (C)")"""
+    parts = sorted(parts, key=lambda p: ROLE_ORDER.index(p[0]))
+    merged = []
+    for role, sides in parts:
+        if merged and sides and merged[-1][1] == sides:
+            merged[-1] = (f"{merged[-1][0]}/{role}", sides)
+        else:
+            merged.append((role, sides))
+    return ", ".join(f"{role} ({sides})" if sides else role for role, sides in merged)
+
+
+def position_catalogue():
+    """Chaînes de poste possibles et leur probabilité"""
+    catalogue = {}
+    for role, weight in PRIMARY_ROLES.items():
+        for sides, side_weight in (SIDE_CHOICES.get(role) or {"": 1.0}).items():
+            base = weight * side_weight
+            neighbours = NEIGHBOURS[role]
+            options = [([(role, sides)], 1.0 - SECONDARY_RATE if neighbours else 1.0)]
+            for other in neighbours:
+                choices = _sides_for(other, sides)
+                for other_sides in choices:
+                    share = SECONDARY_RATE / len(neighbours) / len(choices)
+                    options.append(([(role, sides), (other, other_sides)], share))
+            for parts, share in options:
+                text = _format_positions(parts)
+                catalogue[text] = catalogue.get(text, 0.0) + base * share
+    labels = list(catalogue)
+    probabilities = np.array([catalogue[label] for label in labels])
+    return labels, probabilities / probabilities.sum()
+
+
+def position_offsets(labels):
+    """Décalage (postes x attributs) : rôles FM des postes de chaque chaîne"""
+    canonical_weights = np.zeros((len(POSITION_INDEX), len(RATED_ATTRIBUTES)))
+    for role in ROLES:
+        weights = role_weights(role)
+        for position in ROLES[role]["positions"]:
+            for name, weight in weights.items():
+                i, j = POSITION_INDEX[position], RATED_ATTRIBUTES.index(name)
+                canonical_weights[i, j] = max(canonical_weights[i, j], weight)
+
+    goalkeeping = [RATED_ATTRIBUTES.index(a) for a in GOALKEEPER_ATTRIBUTES]
+    outfield = [RATED_ATTRIBUTES.index(a) for a in TECHNICAL_ATTRIBUTES if a not in ("kicking",)]
+    offsets = np.zeros((len(labels), len(RATED_ATTRIBUTES)))
+    for k, label in enumerate(labels):
+        tokens = parse_positions(label)
+        offsets[k] = 2.0 * canonical_weights[[POSITION_INDEX[t] for t in tokens]].mean(axis=0)
+        if tokens == ["GK"]:
+            offsets[k, outfield] -= 5
+        else:
+            offsets[k, goalkeeping] -= 8
+    return offsets
+
+
+# ====================
+# NATIONALITÉS ET CLUBS
+# ====================
+NATIONALITIES = [
+    "ENG", "ESP", "FRA", "ITA", "GER", "BRA", "ARG", "NED", "POR", "USA", "MEX", "BEL", "TUR", "SCO", "JPN",
+    "SWE", "NOR", "DEN", "POL", "RUS", "COL", "CRO", "SRB", "SUI", "AUT", "CHI", "URU", "KOR", "CHN", "IRL",
+    "WAL", "NGA", "GHA", "SEN", "CIV", "CMR", "MAR", "ALG", "EGY", "TUN", "AUS", "CAN", "ECU", "PAR", "PER",
+    "VEN", "GRE", "CZE", "SVK", "SVN", "HUN", "ROU", "BUL", "UKR", "FIN", "ISL", "ISR", "KSA", "IRN", "QAT",
+    "RSA", "ZAM", "MLI", "GUI", "BFA", "COD", "ANG", "JAM", "CRC", "HON", "PAN", "BOL", "NZL", "IND", "THA",
+    "VIE", "IDN", "MAS", "UZB", "GEO"
+]
+# Part des joueurs ayant la nationalité du pays de leur club
+HOME_NATION_RATE = 0.65
+FREE_AGENT_RATE = 0.06
+CLUB_SUFFIXES = ["FC", "United", "City", "Athletic", "SC", "Rovers", "Sporting", "Real", "Dynamo", "AC"]
+
+SYLLABLES = np.array(["ma", "ri", "ké", "lo", "sté", "an", "ur", "ba", "mül", "ler", "gon", "za", "vic", "to",
+                      "o", "ne", "mar", "tín", "ez", "da", "sil", "va", "ko", "vač", "ić", "jo", "han", "sen",
+                      "ber", "gé", "ra", "ul", "son", "ny", "ki", "ø", "ya", "ssa", "el", "di", "mo", "ro"])
+
+
+def zipf(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def random_names(rng, size, low, high):
+    """Noms de low à high syllabes, en capitales initiales"""
+    lengths = rng.integers(low, high + 1, size=size)
+    picks = SYLLABLES[rng.integers(0, len(SYLLABLES), size=(size, high))]
+    names = picks[:, 0]
+    for k in range(1, high):
+        names = np.char.add(names, np.where(lengths > k, picks[:, k], ""))
+    return np.char.capitalize(names)
+
+
+def club_table(rng, count):
+    """Clubs (noms uniques) et pays de chaque club"""
+    names = pd.Series(np.char.add(np.char.add(random_names(rng, count, 2, 3), " "),
+                                  rng.choice(CLUB_SUFFIXES, size=count)))
+    # Homonymes numérotés ("Maribo FC 2")
+    repeat = names.groupby(names).cumcount()
+    names = np.where(repeat > 0, names + " " + (repeat + 1).astype(str), names)
+    countries = rng.choice(len(NATIONALITIES), size=count, p=zipf(len(NATIONALITIES), 1.0))
+    return names, countries
+
+
+# ====================
+# GÉNÉRATION
+# ====================
+class PlayerGenerator:
+    """Lots de joueurs aux noms d'attributs du modèle (id, name, ..., valeurs texte comme dans l'export FM)"""
+
+    def __init__(self, seed=2023, clubs=3000, first_uid=1):
+        self.seed = seed
+        self.first_uid = first_uid
+        setup = np.random.default_rng([seed, 1])
+        self.positions, self.position_probabilities = position_catalogue()
+        self.offsets = position_offsets(self.positions)
+        self.goalkeepers = np.array([p == "GK" for p in self.positions])
+        self.left_sided = np.array([("L" in p and "R" not in p) for p in self.positions])
+        self.club_names, self.club_countries = club_table(setup, clubs)
+        self.club_probabilities = zipf(clubs, 0.35)
+
+    def chunks(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        for index, start in enumerate(range(0, rows, chunk_size)):
+            yield self.chunk(index, self.first_uid + start, min(chunk_size, rows - start))
+
+    def chunk(self, index, first_uid, size):
+        rng = np.random.default_rng([self.seed, 2, index])
+        position = rng.choice(len(self.positions), size=size, p=self.position_probabilities)
+        goalkeeper = self.goalkeepers[position]
+
+        # Âge : 30 % de jeunes des centres de formation, le reste autour de 26 ans
+        age = np.where(rng.random(size) < 0.3, rng.integers(15, 20, size=size),
+                       np.clip(rng.normal(26, 4.5, size=size).round(), 17, 41)).astype(int)
+        days = rng.integers(0, 365, size=size)
+        birth = REFERENCE_DATE - (age * 365.25 + days).astype("timedelta64[D]")
+
+        # Niveau : progression jusqu'à 24 ans, déclin physique après 31
+        level = rng.normal(9.5, 2.2, size=size) - 0.35 * np.clip(24 - age, 0, None)
+        height = (rng.normal(181, 6.5, size=size) + np.where(goalkeeper, 7, 0)).round()
+        ratings = self.ratings(rng, level, age, position, height)
+
+        club = rng.choice(len(self.club_names), size=size, p=self.club_probabilities)
+        home = rng.random(size) < HOME_NATION_RATE
+        nation = np.where(home, self.club_countries[club],
+                          rng.choice(len(NATIONALITIES), size=size, p=zipf(len(NATIONALITIES), 1.1)))
+        free = rng.random(size) < FREE_AGENT_RATE
+
+        frame = pd.DataFrame({
+            "id": np.arange(first_uid, first_uid + size),
+            "name": np.char.add(np.char.add(random_names(rng, size, 1, 3), " "), random_names(rng, size, 2, 4)),
+            "date_of_birth": [f"{d.day}/{d.month}/{d.year} ({a} years old)"
+                              for d, a in zip(pd.DatetimeIndex(birth), age)],
+            "age": age,
+            "nationality": np.array(NATIONALITIES)[nation],
+            "club": np.where(free, None, self.club_names[club]),
+            "based": np.where(free, None, np.array(NATIONALITIES)[self.club_countries[club]]),
+            "team": np.where(free, None, np.where(age < 19, "U19", np.where(age < 21, "U21", "First Team"))),
+            "position": np.array(self.positions)[position],
+            "height": pd.Series(height.astype(int)).astype(str) + " cm",
+            "weight": pd.Series((height - 105 + rng.normal(0, 5, size=size)).round().astype(int)).astype(str)
+            + " kg",
+            "transfer_value": self.transfer_values(rng, level, age),
+            "media_description": self.media_descriptions(age, level, goalkeeper),
+            **self.feet(rng, position),
+            **self.career(rng, age, level, goalkeeper, ratings)
+        })
+        return pd.concat([frame, pd.DataFrame(ratings, columns=RATED_ATTRIBUTES)], axis=1)
+
+    def ratings(self, rng, level, age, position, height):
+        """Attributs 1-20 : niveau + profil des postes + forme par catégorie + bruit"""
+        size = len(level)
+        values = level[:, None] + self.offsets[position] + rng.normal(0, 1.8, size=(size, len(RATED_ATTRIBUTES)))
+        for group, shift in ((TECHNICAL_ATTRIBUTES, 0), (MENTAL_ATTRIBUTES, 0.12 * (age - 24)),
+                             (PHYSICAL_ATTRIBUTES, -0.45 * np.clip(age - 31, 0, None))):
+            columns = [RATED_ATTRIBUTES.index(a) for a in group]
+            values[:, columns] += (rng.normal(0, 1.3, size=size) + shift)[:, None]
+        # Les grands gagnent en jeu aérien
+        for name in ("heading", "jumping", "aerial_reach"):
+            values[:, RATED_ATTRIBUTES.index(name)] += 0.2 * (height - 181)
+        # Personnalité : indépendante du niveau
+        hidden = [RATED_ATTRIBUTES.index(a) for a in HIDDEN_ATTRIBUTES]
+        values[:, hidden] = rng.normal(11, 4, size=(size, len(hidden)))
+        return np.clip(values.round(), 1, 20).astype(np.uint8)
+
+    def feet(self, rng, position):
+        size = len(position)
+        left = rng.random(size) < np.where(self.left_sided[position], 0.6, 0.18)
+        either = rng.random(size) < 0.07
+        strengths = np.array(["Very Weak", "Weak", "Reasonable", "Fairly Strong", "Strong", "Very Strong"])
+        weak = strengths[rng.choice(5, size=size, p=[0.2, 0.35, 0.25, 0.15, 0.05])]
+        strong = np.where(either, strengths[rng.integers(4, 6, size=size)], "Very Strong")
+        weak = np.where(either, strong, weak)
+        return {
+            "preferred_foot": np.where(either, "Either", np.where(left, "Left", "Right")),
+            "left_foot": np.where(left, strong, weak),
+            "right_foot": np.where(left, weak, strong)
+        }
+
+    def transfer_values(self, rng, level, age):
+        """Fourchettes "€1.2M - €1.8M" croissantes avec le niveau, plus chères jeunes"""
+        value = np.exp(8.0 + 0.55 * level - 0.06 * np.clip(age - 27, 0, None) ** 2 + rng.normal(0, 0.5, len(level)))
+        low = np.where(value >= 1e6, np.round(value / 1e5) * 1e5, np.round(value / 1e3) * 1e3)
+        text = [f"{_money(a)} - {_money(a * 1.5)}" if a > 0 else "€0" for a in low]
+        return np.where(rng.random(len(level)) < 0.02, "Not for Sale", text)
+
+    def media_descriptions(self, age, level, goalkeeper):
+        role = np.where(goalkeeper, "Goalkeeper", "Player")
+        return np.where((age < 21) & (level > 9), np.char.add("Highly-Rated Young ", role),
+                        np.where(age > 32, np.char.add("Veteran ", role),
+                                 np.where(level > 13, np.char.add("World-Class ", role), role)))
+
+    def career(self, rng, age, level, goalkeeper, ratings):
+        """Sélections, matchs "titulaire (entrées)" et buts (selon la finition)"""
+        size = len(age)
+        seasons = np.clip(age - 17, 0, None)
+        starts = rng.poisson(seasons * np.clip(level, 1, None) * 2.2)
+        subs = rng.poisson(seasons * 3.0)
+        finishing = ratings[:, RATED_ATTRIBUTES.index("finishing")].astype(float)
+        goals = rng.poisson((starts + subs) * np.where(goalkeeper, 0.001, (finishing / 20) ** 3 * 0.45))
+        league = rng.uniform(0.6, 0.85, size=size)
+        youth = rng.poisson(np.where(level > 11, 12, 0.5))
+        return {
+            "caps": rng.poisson(np.clip(level - 11, 0, None) * seasons * 0.9),
+            "career_apps": _apps(starts, subs),
+            "career_goals": goals.astype(str),
+            "league_apps": _apps((starts * league).astype(int), (subs * league).astype(int)),
+            "league_goals": (goals * league).astype(int).astype(str),
+            "youth_apps": youth.astype(str),
+            "youth_goals": rng.binomial(youth, 0.08).astype(str)
+        }
+
+
+def _money(amount):
+    if amount >= 1_000_000:
+        return f"€{amount / 1_000_000:.3g}M"
+    return f"€{amount / 1_000:.0f}K"
+
+
+def _apps(starts, subs):
+    """"120 (15)" : titularisations et entrées ; "120" sans entrée"""
+    text = pd.Series(starts).astype(str)
+    return np.where(subs > 0, text + " (" + pd.Series(subs).astype(str) + ")", text)
+
+
+# ====================
+# ÉCRITURE
+# ====================
+def fm_headers(frame):
+    """Noms d'attributs du modèle -> en-têtes de l'export FM (colonnes sans équivalent retirées)"""
+    headers = {("id" if attr == "uid" else attr): column for column, attr in COLUMN_MAPPING.items()}
+    return frame[[c for c in headers if c in frame.columns]].rename(columns=headers)
+
+
+def write_players(output, rows, seed=2023, headers="fm", file_format=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  clubs=None, first_uid=1):
+    """Écrit `rows` joueurs lot par lot ; renvoie le nombre de lignes écrites"""
+    file_format = file_format or ("parquet" if output.endswith(".parquet") else "csv")
+    if file_format == "parquet":
+        import pyarrow.parquet  # Dépendance optionnelle : échoue avant d'écrire quoi que ce soit
+    generator = PlayerGenerator(seed=seed, clubs=clubs or max(rows // 30, 50), first_uid=first_uid)
+    writer = None
+    written = 0
+    try:
+        for chunk in generator.chunks(rows, chunk_size):
+            if headers == "fm":
+                chunk = fm_headers(chunk)
+            if file_format == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    # Types du premier lot imposés aux suivants (colonnes texte toujours en string)
+                    schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                                        for f in table.schema])
+                    writer = pq.ParquetWriter(output, schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(output, mode="w" if written == 0 else "a", header=written == 0, index=False)
+            written += len(chunk)
+            print(f"   {written:,} / {rows:,} joueurs", end="\r", file=sys.stderr, flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    print(file=sys.stderr)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des joueurs FM synthétiques (CSV ou Parquet)")
+    parser.add_argument("--rows", type=int, default=90_000, help="nombre de joueurs (défaut 90 000)")
+    parser.add_argument("--output", default="synthetic_players.csv", help="fichier .csv ou .parquet")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="défaut : d'après l'extension")
+    parser.add_argument("--headers", choices=["fm", "model"], default="fm",
+                        help="fm : import_data.py et /api/admin/import ; model : /api/admin/import")
+    parser.add_argument("--seed", type=int, default=2023)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--clubs", type=int, help="nombre de clubs (défaut : un pour 30 joueurs)")
+    parser.add_argument("--first-uid", type=int, default=1, help="UID du premier joueur")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        written = write_players(args.output, args.rows, seed=args.seed, headers=args.headers,
+                                file_format=args.format, chunk_size=args.chunk_size, clubs=args.clubs,
+                                first_uid=args.first_uid)
+    except ImportError as e:
+        sys.exit(f"❌ Export Parquet indisponible ({e}) : pip install pyarrow")
+    elapsed = time.perf_counter() - started
+    print(f"✅ {written:,} joueurs écrits dans {args.output} en {elapsed:.1f}s "
+          f"({os.path.getsize(args.output) / 1e6:.1f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# gunicorn.conf.py - Serveur de production (gunicorn -c gunicorn.conf.py app:app)
+"""
+L'application est chargée une seule fois dans le processus maître (preload_app),
+qui construit aussi la matrice d'attributs et ses structures dérivées avant le
+fork : les workers partagent ces pages en copie sur écriture au lieu de les
+reconstruire chacun. gc.freeze() évite que le ramasse-miettes ne les touche.
+
+Variables d'environnement :
+    GUNICORN_MODE     gthread (défaut) ou sync
+    WEB_CONCURRENCY   nombre de workers (défaut 2)
+    GUNICORN_THREADS  threads par worker en mode gthread (défaut 4), aussi taille
+                      du pool SQLAlchemy (DB_POOL_SIZE)
+    GUNICORN_PRELOAD  0 pour charger l'application dans chaque worker (comparaison)
+
+Mesures (90 000 joueurs, SQLite, 1 vCPU, 2 workers, 8 clients pendant 25 s sur
+/api/players, /api/facets, /api/roles/<rôle>/top et /api/compare avec paramètres
+aléatoires, deux manches par mode ; PSS = pages partagées divisées entre les
+processus qui les partagent) :
+
+    mode      preload   req/s     latence moy.   RSS / worker   PSS / worker   1re réponse
+    sync      non       22-26     309-362 ms     254 Mo         235 Mo         10 s
+    sync      oui       20-21     386-404 ms     243 Mo         100 Mo         5-6 s
+    gthread   non       18-19     429-444 ms     255-265 Mo     236-246 Mo     13 s
+    gthread   oui       17-19     424-473 ms     235-257 Mo     86-109 Mo      6 s
+
+Sur un seul vCPU, le débit est borné par le SQL de /api/players, et les écarts de
+req/s entre modes ne dépassent pas ceux d'une manche à l'autre. Le maître
+préchargé pèse ~110 Mo de PSS : avec deux workers, le total est de ~320 Mo contre ~470 Mo,
+et l'écart croît avec WEB_CONCURRENCY. gthread évite qu'une requête en mémoire
+(facettes, rôles : 2-5 ms de service) n'attende derrière une requête SQL lente.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = os.environ.get("GUNICORN_MODE", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4)) if worker_class == "gthread" else 1
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+timeout = 60
+keepalive = 5
+
+# Lu par ProductionConfig au chargement de l'application : une connexion par thread
+os.environ.setdefault("DB_POOL_SIZE", str(threads))
+
+
+def when_ready(server):
+    """Maître : structures en mémoire construites une fois avant le fork"""
+    if not preload_app:
+        return
+    from app import app, warm_up
+    from models import db
+    try:
+        warm_up(resume_jobs=False)
+    except Exception as e:
+        server.log.warning(f"Erreur préchargement: {e}")
+    # Les connexions ouvertes par le maître ne doivent pas être partagées avec les workers
+    with app.app_context():
+        db.engine.dispose()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Worker : pool de connexions propre, puis reprise des imports interrompus"""
+    from app import app, import_jobs, warm_up
+    from models import db
+    if not preload_app:
+        try:
+            warm_up()
+        except Exception as e:
+            worker.log.warning(f"Erreur préchargement: {e}")
+        return
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # Les workers forkés démarrent ensemble : sur SQLite l'un peut trouver la base verrouillée,
+    # l'autre reprend alors les tâches (une exception ici arrêterait tout le serveur)
+    try:
+        import_jobs.resume()
+    except Exception as e:
+        worker.log.warning(f"Reprise des imports : {e}")
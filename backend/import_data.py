@@ -1,125 +1,51 @@
 # import_data.py - Import Football Manager 2023 Dataset
 import os
+import time
 import pandas as pd
 from app import app, db
-from models import Player
+from models import Player, PlayerPosition, RATED_ATTRIBUTES
+from ingest import (COLUMN_MAPPING, compute_category_averages, compute_shadow_columns, frame_records, model_fields,
+                    position_records)
 
 # === CONFIGURATION ===
 CSV_PATH = "data/fm2023/merged_players (1).csv"
+CHUNK_SIZE = 5000  # lignes lues, nettoyées et insérées à la fois
 
-# Mapping des colonnes CSV vers les attributs du modèle
-COLUMN_MAPPING = {
-    'UID': 'uid',
-    'Name': 'name',
-    'DOB': 'date_of_birth',
-    'Age': 'age',
-    'Nat': 'nationality',
-    'Club': 'club',
-    'Based': 'based',
-    'Team': 'team',
-    'Position': 'position',
-    'Height': 'height',
-    'Weight': 'weight',
-    'Transfer Value': 'transfer_value',
-    'Media Description': 'media_description',
-    'Media Handling': 'media_handling',
-    'Preferred Foot': 'preferred_foot',
-    'Left Foot': 'left_foot',
-    'Right Foot': 'right_foot',
-    'Inj Pr': 'injury_proneness',
-    'Rc Injury': 'recent_injury',
-    'Rec': 'recommendation',
-    'Inf': 'information',
-    
-    # Carrière
-    'Caps': 'caps',
-    'AT Apps': 'career_apps',
-    'AT Gls': 'career_goals',
-    'AT Lge Apps': 'league_apps',
-    'AT Lge Gls': 'league_goals',
-    'Yth Apps': 'youth_apps',
-    'Yth Gls': 'youth_goals',
-    
-    # Technique
-    'Cor': 'corners',
-    'Cro': 'crossing',
-    'Dri': 'dribbling',
-    'Fin': 'finishing',
-    'Fir': 'first_touch',
-    'Fre': 'free_kicks',
-    'Hea': 'heading',
-    'Lon': 'long_shots',
-    'L Th': 'long_throws',
-    'Mar': 'marking',
-    'Pas': 'passing',
-    'Pen': 'penalty_taking',
-    'Tck': 'tackling',
-    'Tec': 'technique',
-    
-    # Mental
-    'Agg': 'aggression',
-    'Ant': 'anticipation',
-    'Bra': 'bravery',
-    'Cmp': 'composure',
-    'Cnt': 'concentration',
-    'Dec': 'decisions',
-    'Det': 'determination',
-    'Fla': 'flair',
-    'Ldr': 'leadership',
-    'OtB': 'off_the_ball',
-    'Pos': 'positioning',
-    'Tea': 'teamwork',
-    'Vis': 'vision',
-    'Wor': 'work_rate',
-    
-    # Physique
-    'Acc': 'acceleration',
-    'Agi': 'agility',
-    'Bal': 'balance',
-    'Jum': 'jumping',
-    'Pac': 'pace',
-    'Sta': 'stamina',
-    'Str': 'strength',
+# Colonnes texte à faible cardinalité : stockées en catégories pandas
+CATEGORICAL_COLUMNS = {'nationality', 'club', 'position'}
+
+def csv_dtypes():
+    """Types explicites pour read_csv, dérivés de COLUMN_MAPPING"""
+    dtypes = {}
+    for csv_col, model_attr in COLUMN_MAPPING.items():
+        if model_attr in RATED_ATTRIBUTES or model_attr == 'age':
+            dtypes[csv_col] = 'UInt8'
+        elif model_attr == 'caps':
+            dtypes[csv_col] = 'UInt16'
+        elif model_attr == 'uid':
+            dtypes[csv_col] = 'Int64'
+        elif model_attr in CATEGORICAL_COLUMNS:
+            dtypes[csv_col] = 'category'
+        else:
+            dtypes[csv_col] = 'string'
+    return dtypes
+
+def clean_chunk(chunk):
+    """Nettoyage vectorisé d'un lot : noms du modèle, textes épurés, moyennes"""
+    fields = model_fields()
+    chunk = chunk.rename(columns=COLUMN_MAPPING).rename(columns={'uid': 'id'})
+    chunk = chunk[[col for col in chunk.columns if col in fields]]
     
-    # Gardien
-    'Aer': 'aerial_reach',
-    'Cmd': 'command_of_area',
-    'Com': 'communication',
-    'Ecc': 'eccentricity',
-    'Han': 'handling',
-    'Kic': 'kicking',
-    '1v1': 'one_on_ones',
-    'Ref': 'reflexes',
-    'TRO': 'rushing_out',
-    'Pun': 'tendency_to_punch',
-    'Thr': 'throwing',
+    for col in chunk.columns:
+        if isinstance(chunk[col].dtype, (pd.StringDtype, pd.CategoricalDtype)):
+            text = chunk[col].astype('string').str.strip()
+            chunk[col] = text.mask(text.isin(['', 'nan']))
     
-    # Personnalité
-    'Ada': 'adaptability',
-    'Amb': 'ambition',
-    'Cons': 'consistency',
-    'Cont': 'controversy',
-    'Dirt': 'dirtiness',
-    'Imp M': 'important_matches',
-    'Loy': 'loyalty',
-    'Pres': 'pressure',
-    'Prof': 'professionalism',
-    'Spor': 'sportsmanship',
-    'Temp': 'temperament',
-    'Vers': 'versatility'
-}
-
-def clean_value(value):
-    """Nettoie les valeurs avant insertion"""
-    if pd.isna(value):
-        return None
-    if isinstance(value, str):
-        value = value.strip()
-        return None if value == '' or value == 'nan' else value
-    return value
+    chunk = pd.concat([chunk, compute_category_averages(chunk), compute_shadow_columns(chunk)], axis=1)
+    return chunk.rename(columns=fields)
 
 def import_players():
-    """Importe tous les joueurs depuis le CSV"""
+    """Importe tous les joueurs depuis le CSV, par lots à mémoire bornée"""
     
     print("="*70)
     print("IMPORT FOOTBALL MANAGER 2023 DATASET")
@@ -130,10 +56,11 @@ def import_players():
         print(f"❌ ERREUR: Fichier non trouvé: {CSV_PATH}")
         return
     
-    # Lecture du CSV
-    print(f"\n📖 Lecture du fichier {CSV_PATH}...")
-    df = pd.read_csv(CSV_PATH)
-    print(f"✅ {len(df):,} joueurs trouvés dans le CSV")
+    # Seules les colonnes connues sont lues, avec des types explicites
+    header = pd.read_csv(CSV_PATH, nrows=0).columns
+    usecols = [col for col in header if col in COLUMN_MAPPING]
+    dtypes = {col: dtype for col, dtype in csv_dtypes().items() if col in usecols}
+    print(f"\n📖 Lecture du fichier {CSV_PATH} par lots de {CHUNK_SIZE:,} lignes...")
     
     # Création de la base de données
     with app.app_context():
@@ -146,29 +73,33 @@ def import_players():
         print(f"\n⚙️ Import des joueurs en cours...")
         imported = 0
         errors = 0
-        batch_size = 1000
+        next_id = 1
+        started = time.perf_counter()
+        table = Player.__table__
         
-        for index, row in df.iterrows():
+        for chunk in pd.read_csv(CSV_PATH, usecols=usecols, dtype=dtypes, chunksize=CHUNK_SIZE):
+            rows = clean_chunk(chunk)
+            
+            # Sans UID dans le fichier, les identifiants sont attribués à la suite
+            if 'uid' not in rows.columns:
+                rows.insert(0, 'uid', range(next_id, next_id + len(rows)))
+            next_id += len(rows)
+            
             try:
-                player_data = {}
-                for csv_col, model_attr in COLUMN_MAPPING.items():
-                    if csv_col in df.columns:
-                        player_data[model_attr] = clean_value(row[csv_col])
-                
-                player = Player(**player_data)
-                db.session.add(player)
-                
-                imported += 1
-                
-                if imported % batch_size == 0:
-                    db.session.commit()
-                    print(f"   ⏳ {imported:,} joueurs importés...")
-                
+                db.session.execute(table.insert(), frame_records(rows))
+                if 'position' in rows.columns:
+                    positions = position_records(rows['uid'], rows['position'])
+                    if positions:
+                        db.session.execute(PlayerPosition.__table__.insert(), positions)
+                db.session.commit()
+                imported += len(rows)
             except Exception as e:
-                errors += 1
-                if errors < 10:
-                    print(f"   ⚠️ Erreur ligne {index}: {str(e)[:100]}")
                 db.session.rollback()
+                errors += len(rows)
+                print(f"   ⚠️ Lot rejeté ({len(rows)} lignes): {str(e)[:100]}")
+            
+            elapsed = time.perf_counter() - started
+            print(f"   ⏳ {imported:,} joueurs importés ({imported / elapsed:,.0f} lignes/s)")
         
         # Commit final
         try:
@@ -0,0 +1,461 @@
+# ingest.py - Traitements vectorisés partagés par les imports
+"""
+Calculs appliqués à des DataFrames dont les colonnes portent les noms
+d'attributs du modèle Player (name, finishing, ...). Utilisé par
+import_data.py, /api/admin/import et init_db.py.
+"""
+import time
+import numpy as np
+import pandas as pd
+from models import db, Player, PlayerPosition, AVERAGE_GROUPS, RATED_ATTRIBUTES
+from positions import parse_positions
+from units import SHADOW_COLUMNS, SHADOW_FIELDS
+
+
+# ====================
+# COLONNES DE L'EXPORT FM
+# ====================
+# En-têtes du CSV exporté de FM -> attributs du modèle (import_data.py, generate_players.py)
+COLUMN_MAPPING = {
+    'UID': 'uid',
+    'Name': 'name',
+    'DOB': 'date_of_birth',
+    'Age': 'age',
+    'Nat': 'nationality',
+    'Club': 'club',
+    'Based': 'based',
+    'Team': 'team',
+    'Position': 'position',
+    'Height': 'height',
+    'Weight': 'weight',
+    'Transfer Value': 'transfer_value',
+    'Media Description': 'media_description',
+    'Media Handling': 'media_handling',
+    'Preferred Foot': 'preferred_foot',
+    'Left Foot': 'left_foot',
+    'Right Foot': 'right_foot',
+    'Inj Pr': 'injury_proneness',
+    'Rc Injury': 'recent_injury',
+    'Rec': 'recommendation',
+    'Inf': 'information',
+    
+    # Carrière
+    'Caps': 'caps',
+    'AT Apps': 'career_apps',
+    'AT Gls': 'career_goals',
+    'AT Lge Apps': 'league_apps',
+    'AT Lge Gls': 'league_goals',
+    'Yth Apps': 'youth_apps',
+    'Yth Gls': 'youth_goals',
+    
+    # Technique
+    'Cor': 'corners',
+    'Cro': 'crossing',
+    'Dri': 'dribbling',
+    'Fin': 'finishing',
+    'Fir': 'first_touch',
+    'Fre': 'free_kicks',
+    'Hea': 'heading',
+    'Lon': 'long_shots',
+    'L Th': 'long_throws',
+    'Mar': 'marking',
+    'Pas': 'passing',
+    'Pen': 'penalty_taking',
+    'Tck': 'tackling',
+    'Tec': 'technique',
+    
+    # Mental
+    'Agg': 'aggression',
+    'Ant': 'anticipation',
+    'Bra': 'bravery',
+    'Cmp': 'composure',
+    'Cnt': 'concentration',
+    'Dec': 'decisions',
+    'Det': 'determination',
+    'Fla': 'flair',
+    'Ldr': 'leadership',
+    'OtB': 'off_the_ball',
+    'Pos': 'positioning',
+    'Tea': 'teamwork',
+    'Vis': 'vision',
+    'Wor': 'work_rate',
+    
+    # Physique
+    'Acc': 'acceleration',
+    'Agi': 'agility',
+    'Bal': 'balance',
+    'Jum': 'jumping',
+    'Pac': 'pace',
+    'Sta': 'stamina',
+    'Str': 'strength',
+    
+    # Gardien
+    'Aer': 'aerial_reach',
+    'Cmd': 'command_of_area',
+    'Com': 'communication',
+    'Ecc': 'eccentricity',
+    'Han': 'handling',
+    'Kic': 'kicking',
+    '1v1': 'one_on_ones',
+    'Ref': 'reflexes',
+    'TRO': 'rushing_out',
+    'Pun': 'tendency_to_punch',
+    'Thr': 'throwing',
+    
+    # Personnalité
+    'Ada': 'adaptability',
+    'Amb': 'ambition',
+    'Cons': 'consistency',
+    'Cont': 'controversy',
+    'Dirt': 'dirtiness',
+    'Imp M': 'important_matches',
+    'Loy': 'loyalty',
+    'Pres': 'pressure',
+    'Prof': 'professionalism',
+    'Spor': 'sportsmanship',
+    'Temp': 'temperament',
+    'Vers': 'versatility'
+}
+
+
+def compute_category_averages(df):
+    """Moyennes avg_* par ligne, calculées en une passe vectorisée"""
+    averages = pd.DataFrame(index=df.index)
+    for group, names in AVERAGE_GROUPS.items():
+        present = [name for name in names if name in df.columns]
+        if present:
+            values = df[present]
+            if not all(pd.api.types.is_numeric_dtype(t) for t in values.dtypes):
+                values = values.apply(pd.to_numeric, errors="coerce")
+            averages[f"avg_{group}"] = values.mean(axis=1, skipna=True).round(1).fillna(0.0)
+        else:
+            averages[f"avg_{group}"] = 0.0
+    return averages
+
+
+def backfill_category_averages(chunk_size=5000):
+    """Remplit les colonnes avg_* des lignes qui ne les ont pas encore"""
+    attributes = sorted({name for names in AVERAGE_GROUPS.values() for name in names})
+    columns = [Player.id] + [getattr(Player, name) for name in attributes]
+    updated = 0
+
+    last_id = None
+    while True:
+        query = db.select(*columns).where(Player.avg_technical.is_(None)).order_by(Player.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(Player.id > last_id)
+        rows = db.session.execute(query).all()
+        if not rows:
+            break
+
+        chunk = pd.DataFrame(rows, columns=["id"] + attributes)
+        averages = compute_category_averages(chunk)
+        averages["id"] = chunk["id"]
+        db.session.execute(db.update(Player), averages.to_dict("records"))
+        db.session.commit()
+
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+    return updated
+
+
+def compute_shadow_columns(df):
+    """Colonnes numériques dérivées (height_cm, value_min...) des champs texte présents"""
+    shadows = pd.DataFrame(index=df.index)
+    for source, (columns, parse) in SHADOW_FIELDS.items():
+        if source not in df.columns:
+            continue
+        values = df[source].astype(object).where(df[source].notna(), None)
+        # Une conversion par valeur distincte : ces colonnes FM sont très répétitives
+        uniques = values.dropna().unique()
+        parsed = pd.DataFrame([parse(v) for v in uniques], index=uniques, columns=list(columns), dtype="float64")
+        for column in columns:
+            shadows[column] = values.map(parsed[column]).astype("Int64")
+    return shadows
+
+
+def backfill_shadow_columns(chunk_size=5000):
+    """Remplit les colonnes numériques dérivées des lignes importées avant leur création.
+
+    Les textes sans valeur numérique ("Not for Sale") restent NULL et sont relus à chaque passage.
+    """
+    sources = list(SHADOW_FIELDS)
+    pending = db.or_(*(
+        db.and_(getattr(Player, source).isnot(None), getattr(Player, columns[0]).is_(None))
+        for source, (columns, _) in SHADOW_FIELDS.items()
+    ))
+    updated = 0
+
+    last_id = None
+    while True:
+        query = db.select(Player.id, *[getattr(Player, s) for s in sources]) \
+            .where(pending).order_by(Player.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(Player.id > last_id)
+        rows = db.session.execute(query).all()
+        if not rows:
+            break
+
+        chunk = pd.DataFrame(rows, columns=["id"] + sources)
+        shadows = compute_shadow_columns(chunk)
+        shadows["id"] = chunk["id"]
+        db.session.execute(db.update(Player), frame_records(shadows))
+        db.session.commit()
+
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+    return updated
+
+
+# ====================
+# UPSERT ENSEMBLISTE
+# ====================
+# Colonnes entières hors notes FM
+INTEGER_FIELDS = {"id", "age", "caps"}
+# Taille des lots envoyés en executemany
+UPSERT_BATCH_SIZE = 2000
+# Taille des listes IN (SQLite accepte 32 766 paramètres)
+LOOKUP_BATCH_SIZE = 5000
+
+
+def model_fields():
+    """Attributs mappés de Player -> nom de colonne en base"""
+    return {prop.key: prop.columns[0].name for prop in Player.__mapper__.column_attrs}
+
+
+def _chunks(values, size):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def validate_players_frame(df):
+    """Conversion vectorisée des types ; renvoie (df typé, masque des lignes valides, erreurs)"""
+    df = df.copy()
+    errors = []
+    invalid = pd.Series(False, index=df.index)
+
+    def flag(mask, column, message):
+        nonlocal invalid
+        for idx in df.index[mask]:
+            errors.append({"row": int(idx) + 2, "column": column, "error": message})
+        invalid |= mask
+
+    if "name" in df.columns:
+        df["name"] = df["name"].astype("string").str.strip()
+        flag(df["name"].isna() | (df["name"] == ""), "name", "Nom manquant")
+
+    for column in df.columns:
+        if column in INTEGER_FIELDS or column in RATED_ATTRIBUTES:
+            raw = df[column]
+            numeric = pd.to_numeric(raw, errors="coerce")
+            flag(raw.notna() & numeric.isna(), column, "Valeur non numérique")
+            if column in RATED_ATTRIBUTES:
+                flag(numeric.notna() & ((numeric < 1) | (numeric > 20)), column, "Note hors de l'échelle 1-20")
+            df[column] = numeric.round().astype("Int64")
+        elif df[column].dtype == object:
+            df[column] = df[column].astype("string").str.strip().replace("", pd.NA)
+
+    return df, ~invalid, errors
+
+
+def _match_existing(df):
+    """Associe chaque ligne à un uid existant (colonne id, sinon nom) en une passe"""
+    ids = df["id"] if "id" in df.columns else pd.Series(pd.NA, index=df.index, dtype="Int64")
+    known = set()
+    if ids.notna().any():
+        wanted = [int(i) for i in ids.dropna().unique()]
+        for chunk in _chunks(wanted, LOOKUP_BATCH_SIZE):
+            known.update(db.session.execute(db.select(Player.id).where(Player.id.in_(chunk))).scalars())
+
+    by_name = {}
+    names = df.loc[ids.isna(), "name"].dropna().unique().tolist()
+    for chunk in _chunks(names, LOOKUP_BATCH_SIZE):
+        rows = db.session.execute(
+            db.select(Player.name, db.func.min(Player.id)).where(Player.name.in_(chunk)).group_by(Player.name)
+        ).all()
+        by_name.update(rows)
+
+    matched = ids.astype("Int64").fillna(df["name"].map(by_name).astype("Int64"))
+    existing = matched.notna() & (matched.isin(known) | ids.isna())
+    return matched, existing
+
+
+def _upsert_statement(table, columns):
+    """INSERT ... ON CONFLICT (uid) DO UPDATE ; une colonne absente (NULL) ne remplace rien"""
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    stmt = insert(table)
+    updates = {c: db.func.coalesce(stmt.excluded[c], table.c[c]) for c in columns if c != "uid"}
+    return stmt.on_conflict_do_update(index_elements=[table.c.uid], set_=updates)
+
+
+def _stored_attributes(player_ids, attributes):
+    """Valeurs en base des attributs donnés, indexées par uid (float, NaN si absent)"""
+    columns = [Player.id] + [getattr(Player, name) for name in attributes]
+    frames = []
+    for chunk in _chunks([int(i) for i in player_ids], LOOKUP_BATCH_SIZE):
+        rows = db.session.execute(db.select(*columns).where(Player.id.in_(chunk))).all()
+        frames.append(pd.DataFrame(rows, columns=["id"] + attributes))
+    if not frames:
+        return pd.DataFrame(columns=attributes, dtype="float64")
+    return pd.concat(frames).set_index("id").astype("float64")
+
+
+def frame_records(df):
+    """Lignes d'un DataFrame en dicts de types Python (NaN / NA -> None)"""
+    values = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+    columns = list(df.columns)
+    return [dict(zip(columns, row)) for row in values]
+
+
+def bulk_upsert_players(df, progress=None):
+    """Importe un DataFrame (colonnes = attributs de Player) par lots INSERT ... ON CONFLICT.
+
+    progress(traités, total) est appelé après chaque lot. Renvoie le rapport d'import.
+    """
+    started = time.perf_counter()
+    total = len(df)
+    fields = model_fields()
+
+    if "uid" in df.columns and "id" not in df.columns:
+        df = df.rename(columns={"uid": "id"})
+    ignored = [c for c in df.columns if c not in fields or c.startswith("avg_") or c in SHADOW_COLUMNS]
+    df = df.drop(columns=ignored)
+
+    df, valid, errors = validate_players_frame(df)
+    df = df[valid]
+
+    # Doublons dans le fichier : comme un import ligne à ligne, les valeurs non vides
+    # des dernières lignes l'emportent
+    key = df["id"].astype("string").fillna("name:" + df["name"]) if "id" in df.columns else df["name"]
+    duplicates = int(key.duplicated().sum())
+    if duplicates:
+        df = df.groupby(key.values, sort=False).last()
+    df = df.reset_index(drop=True)
+
+    matched, existing = _match_existing(df)
+    new_rows = matched.isna()
+    if new_rows.any():
+        # Au-delà des ids de la base et des ids explicites du fichier (nouveaux joueurs compris)
+        next_id = max(db.session.execute(db.select(db.func.max(Player.id))).scalar() or 0,
+                      int(matched.max()) if matched.notna().any() else 0) + 1
+        matched.loc[new_rows] = np.arange(next_id, next_id + int(new_rows.sum()), dtype=np.int64)
+    df["id"] = matched
+
+    # Moyennes sur les valeurs après fusion : celles du fichier, complétées par la base
+    attributes = sorted({name for names in AVERAGE_GROUPS.values() for name in names})
+    basis = df.reindex(columns=attributes).astype("float64")
+    if existing.any():
+        stored = _stored_attributes(df.loc[existing, "id"], attributes)
+        stored = stored.reindex(df.loc[existing, "id"].astype("int64").to_numpy())
+        basis.loc[existing] = basis.loc[existing].fillna(stored.set_axis(basis.index[existing]))
+    df = pd.concat([df, compute_category_averages(basis), compute_shadow_columns(df)], axis=1)
+
+    table = Player.__table__
+    records = frame_records(df.rename(columns=fields))
+    # Toutes les lignes rejetées : rien à écrire (ON CONFLICT exige au moins une colonne à mettre à jour)
+    stmt = _upsert_statement(table, list(records[0])) if records else None
+
+    done = 0
+    for batch in _chunks(records, UPSERT_BATCH_SIZE):
+        if stmt is not None:
+            db.session.execute(stmt, batch)
+        else:
+            # Autres bases : UPDATE par clé primaire puis INSERT des nouvelles lignes
+            existing_ids = {i for i in db.session.execute(
+                db.select(Player.id).where(Player.id.in_([r["uid"] for r in batch]))).scalars()}
+            for r in batch:
+                if r["uid"] in existing_ids:
+                    db.session.execute(table.update().where(table.c.uid == r["uid"]).values(
+                        {k: v for k, v in r.items() if v is not None}))
+                else:
+                    db.session.execute(table.insert().values(r))
+        done += len(batch)
+        if progress:
+            progress(done, len(records))
+
+    # Postes canoniques des lignes dont le fichier fournit la position
+    if "position" in df.columns:
+        positioned = df[df["position"].notna()]
+        replace_player_positions(positioned["id"].astype(int).tolist(), positioned["position"].tolist())
+
+    updated_ids = df.loc[existing, "id"].astype(int).tolist()
+    db.session.commit()
+
+    duration = time.perf_counter() - started
+    imported = len(records)
+    return {
+        "total": total,
+        "imported": imported,
+        "inserted": imported - len(updated_ids),
+        "updated": len(updated_ids),
+        "merged_duplicates": duplicates,
+        "rejected": total - int(valid.sum()),
+        "ignored_columns": ignored,
+        "errors": errors,
+        "ids": df["id"].astype(int).tolist(),
+        "duration_s": round(duration, 3),
+        "rows_per_second": round(imported / duration) if duration > 0 else imported
+    }
+
+
+# ====================
+# POSTES CANONIQUES
+# ====================
+def position_records(player_ids, positions):
+    """Lignes de player_positions pour des joueurs et leurs chaînes de position"""
+    parsed = {}
+    records = []
+    for player_id, position in zip(player_ids, positions):
+        if not isinstance(position, str):
+            continue
+        if position not in parsed:
+            parsed[position] = parse_positions(position)
+        records.extend({"player_uid": int(player_id), "position": token} for token in parsed[position])
+    return records
+
+
+def replace_player_positions(player_ids, positions):
+    """Remplace les postes canoniques des joueurs donnés (commit à la charge de l'appelant)"""
+    table = PlayerPosition.__table__
+    for chunk in _chunks([int(i) for i in player_ids], LOOKUP_BATCH_SIZE):
+        db.session.execute(table.delete().where(table.c.player_uid.in_(chunk)))
+    for batch in _chunks(position_records(player_ids, positions), UPSERT_BATCH_SIZE):
+        db.session.execute(table.insert(), batch)
+
+
+def backfill_player_positions(chunk_size=5000):
+    """Remplit player_positions pour les joueurs qui n'y ont encore aucune ligne.
+
+    Les positions sans poste reconnu n'y ont jamais de ligne et sont relues à chaque passage.
+    """
+    missing = ~db.exists().where(PlayerPosition.player_id == Player.id)
+    table = PlayerPosition.__table__
+    updated = 0
+
+    last_id = None
+    while True:
+        query = db.select(Player.id, Player.position) \
+            .where(Player.position.isnot(None), missing).order_by(Player.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(Player.id > last_id)
+        rows = db.session.execute(query).all()
+        if not rows:
+            break
+
+        records = position_records([r[0] for r in rows], [r[1] for r in rows])
+        if records:
+            db.session.execute(table.insert(), records)
+        db.session.commit()
+
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+    return updated
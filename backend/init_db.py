@@ -1,19 +1,83 @@
 # backend/init_db.py
 """Script d'initialisation de la base de données"""
 
+from sqlalchemy import inspect, text
 from app import app, db
 
+def upgrade_schema():
+    """Ajoute à une table existante les colonnes et index déclarés dans models.py"""
+    from models import ImportJob, Player
+
+    inspector = inspect(db.engine)
+    for table in (Player.__table__, ImportJob.__table__):
+        existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+        existing_indexes = {idx['name'] for idx in inspector.get_indexes(table.name)}
+
+        with db.engine.begin() as conn:
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                    print(f" Colonne ajoutée : {table.name}.{column.name}")
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    print(f" Index créé : {index.name}")
+
+    table = Player.__table__
+
+    if db.engine.dialect.name == 'postgresql':
+        # Tables créées par pandas.to_sql : pas de clé primaire, requise par ON CONFLICT (uid)
+        if not inspector.get_pk_constraint(table.name).get('constrained_columns'):
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD PRIMARY KEY (uid)'))
+            print(" Clé primaire ajoutée : uid")
+        create_trigram_indexes()
+
+def create_trigram_indexes():
+    """Index GIN pg_trgm pour le repli SQL de /api/search (PostgreSQL)"""
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for column in ('name', 'club', 'nat'):
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_players_{column}_trgm "
+                    f"ON players USING gin ({column} gin_trgm_ops)"
+                ))
+        print(" Index trigrammes pg_trgm créés")
+    except Exception as e:
+        print(f" pg_trgm indisponible : {e}")
+
 def init_database():
     """Créer toutes les tables"""
     with app.app_context():
+        from models import Player, PlayerPosition
+
         print(" Création des tables...")
+        # player_positions référence players.uid : créée une fois la clé primaire ajoutée
+        # par upgrade_schema aux tables issues de pandas.to_sql (import_auto.py, import_production.py)
+        db.metadata.create_all(db.engine, tables=[
+            table for table in db.metadata.sorted_tables if table is not PlayerPosition.__table__
+        ])
+        upgrade_schema()
         db.create_all()
         print("Tables créées avec succès!")
-        
+
         # Vérifier que la table existe
-        from models import Player
         count = Player.query.count()
         print(f"Nombre de joueurs : {count}")
 
+        # Colonnes dérivées des lignes importées avant leur apparition
+        from ingest import backfill_category_averages, backfill_shadow_columns, backfill_player_positions
+        filled = backfill_category_averages()
+        if filled:
+            print(f"Moyennes calculées pour {filled} joueurs")
+        parsed = backfill_shadow_columns()
+        if parsed:
+            print(f"Taille, poids, valeur et statistiques converties pour {parsed} joueurs")
+        tokenized = backfill_player_positions()
+        if tokenized:
+            print(f"Postes canoniques extraits pour {tokenized} joueurs")
+
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    init_database()
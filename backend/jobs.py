@@ -0,0 +1,165 @@
+# jobs.py - Tâches de fond locales, état persisté en base
+"""
+Les imports admin sont enregistrés dans la table import_jobs puis exécutés par
+un pool de threads du processus web : la base de l'application sert de file,
+sans broker externe.
+
+Une tâche est réclamée par un UPDATE conditionnel (un seul worker l'exécute),
+écrit sa progression en base à chaque lot et reprend après un redémarrage :
+les tâches en file et celles dont le battement de cœur s'est arrêté sont
+relancées par resume(). Une tâche en échec est remise en file (avec un délai
+croissant) tant qu'il lui reste des tentatives ; le fichier déposé n'est effacé
+qu'une fois la tâche dans un état final.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from models import db, ImportJob
+
+TERMINAL_STATUSES = {"done", "failed", "cancelled"}
+
+
+class JobCancelled(Exception):
+    """Annulation demandée par un administrateur"""
+
+
+class JobProgress:
+    """Suivi passé au gestionnaire d'une tâche : phase, progression, annulation"""
+
+    def __init__(self, job):
+        self.job = job
+        self._started = time.perf_counter()
+        self._rows_at_start = job.rows_processed or 0
+
+    def phase(self, name, **fields):
+        self.job.phase = name
+        self._save(fields)
+
+    def advance(self, rows_processed, **fields):
+        """Enregistre l'avancement (à appeler après le commit du lot traité)"""
+        elapsed = time.perf_counter() - self._started
+        self.job.rows_processed = rows_processed
+        if elapsed > 0:
+            self.job.rows_per_second = round((rows_processed - self._rows_at_start) / elapsed)
+        self._save(fields)
+
+    def check_cancelled(self):
+        requested = db.session.execute(
+            db.select(ImportJob.cancel_requested).where(ImportJob.id == self.job.id)
+        ).scalar()
+        if requested:
+            raise JobCancelled()
+
+    def _save(self, fields):
+        for key, value in fields.items():
+            setattr(self.job, key, value)
+        self.job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+
+class JobRunner:
+    """Pool de threads exécutant les tâches d'import de ce processus"""
+
+    def __init__(self, app, handler, workers=1, stale_after=300, max_attempts=3, retry_delay=5,
+                 permanent_errors=()):
+        self.app = app
+        self.handler = handler
+        self.workers = workers
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Exceptions qu'une nouvelle tentative ne corrigerait pas (fichier invalide...)
+        self.permanent_errors = permanent_errors
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import-job")
+        return self._pool
+
+    def submit(self, job_id):
+        self._executor().submit(self._run, job_id)
+
+    def cancel(self, job):
+        """Annule une tâche en file immédiatement, ou demande l'arrêt d'une tâche en cours"""
+        now = datetime.utcnow()
+        db.session.execute(
+            db.update(ImportJob)
+            .where(ImportJob.id == job.id, ImportJob.status == "queued")
+            .values(status="cancelled", phase="cancelled", cancel_requested=True, finished_at=now,
+                    file_data=None)
+        )
+        db.session.execute(
+            db.update(ImportJob)
+            .where(ImportJob.id == job.id, ImportJob.status == "running")
+            .values(cancel_requested=True)
+        )
+        db.session.commit()
+        db.session.refresh(job)
+        return job
+
+    def resume(self):
+        """Relance les tâches en file et celles interrompues par un arrêt du processus"""
+        with self.app.app_context():
+            cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+            db.session.execute(
+                db.update(ImportJob)
+                .where(ImportJob.status == "running", ImportJob.heartbeat_at < cutoff)
+                .values(status="queued", phase="requeued")
+            )
+            db.session.commit()
+            pending = db.session.execute(
+                db.select(ImportJob.id).where(ImportJob.status == "queued").order_by(ImportJob.id)
+            ).scalars().all()
+        for job_id in pending:
+            self.submit(job_id)
+        return pending
+
+    def _claim(self, job_id):
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            db.update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status == "queued")
+            .values(status="running", phase="starting", started_at=now, heartbeat_at=now,
+                    attempts=ImportJob.attempts + 1)
+        ).rowcount == 1
+        db.session.commit()
+        return claimed
+
+    def _retry_later(self, job_id, attempts):
+        """Nouvelle tentative après un délai croissant (resume() la relance si le processus s'arrête avant)"""
+        timer = threading.Timer(self.retry_delay * 2 ** (attempts - 1), self.submit, [job_id])
+        timer.daemon = True
+        timer.start()
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            try:
+                if not self._claim(job_id):
+                    return
+                job = db.session.get(ImportJob, job_id)
+                try:
+                    if job.attempts > self.max_attempts:
+                        raise RuntimeError(f"Abandon après {self.max_attempts} tentatives")
+                    self.handler(job, JobProgress(job))
+                    job.status, job.phase = "done", "done"
+                except JobCancelled:
+                    db.session.rollback()
+                    job.status, job.phase = "cancelled", "cancelled"
+                    job.message = f"Import annulé après {job.rows_processed or 0} lignes"
+                except Exception as e:
+                    db.session.rollback()
+                    job.message = str(e)
+                    if job.attempts < self.max_attempts and not isinstance(e, self.permanent_errors):
+                        # Le fichier reste en base : la tentative suivante reprend après la dernière tranche validée
+                        job.status, job.phase = "queued", "retrying"
+                        db.session.commit()
+                        self._retry_later(job_id, job.attempts)
+                        return
+                    job.status = "failed"
+                job.finished_at = datetime.utcnow()
+                job.file_data = None
+                db.session.commit()
+            finally:
+                db.session.remove()
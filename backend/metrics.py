@@ -0,0 +1,270 @@
+# metrics.py - Métriques par route au format texte Prometheus
+"""Nombre de requêtes, latence, taille des réponses et requêtes SQL par route (voir /api/admin/metrics)"""
+import glob
+import os
+import pickle
+import threading
+import time
+from bisect import bisect_left
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Bornes supérieures des histogrammes (secondes, octets) ; +Inf est ajouté à l'exposition
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+SQL_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Route non reconnue (404) : un seul libellé plutôt qu'un par chemin demandé
+UNMATCHED = "unmatched"
+
+
+def _histogram(buckets):
+    """[compte par borne..., compte +Inf, somme]"""
+    return [0] * (len(buckets) + 1) + [0.0]
+
+
+def _observe(histogram, buckets, value):
+    histogram[bisect_left(buckets, value)] += 1
+    histogram[-1] += value
+
+
+def _merge(target, source):
+    for key, value in source.items():
+        if key not in target:
+            target[key] = list(value) if isinstance(value, list) else value
+        elif isinstance(value, list):
+            target[key] = [a + b for a, b in zip(target[key], value)]
+        else:
+            target[key] += value
+
+
+class RequestMetrics:
+    """Compteurs du processus, partagés entre workers gunicorn par un fichier par pid dans directory
+
+    La latence couvre before_request -> after_request ; pour une réponse en streaming (exports
+    CSV/Excel), elle va jusqu'au dernier morceau envoyé, avec la taille et les requêtes SQL du
+    corps, et le délai avant le premier octet est mesuré à part. Les requêtes SQL ne sont
+    comptées que dans le thread qui sert la requête (pas celles des tâches d'import en arrière-plan).
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_flush = 0.0
+        # False : les hooks restent installés mais n'enregistrent rien (mesure du surcoût, benchmark.py)
+        self.enabled = True
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}        # (route, méthode, statut) -> nombre
+            self.latency = {}         # (route, méthode) -> histogramme en secondes
+            self.sizes = {}           # (route, méthode) -> histogramme en octets
+            self.first_byte = {}      # (route, méthode) -> histogramme en secondes (streaming)
+            self.sql_statements = {}  # (route, méthode) -> histogramme de requêtes SQL par requête
+            self.sql_seconds = {}     # (route, méthode) -> temps SQL cumulé
+            self.exceptions = {}      # (route, exception) -> nombre
+
+    def init_app(self, app):
+        """À appeler avant les autres before_request pour qu'ils soient inclus dans la latence"""
+        if not app.config['METRICS_ENABLED']:
+            return
+        self.directory = app.config['METRICS_DIR']
+        self.flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+
+    # ----- Cycle d'une requête -----
+    def _start(self):
+        # [début, requêtes SQL, temps SQL, début de la requête SQL en cours]
+        self._local.current = [time.perf_counter(), 0, 0.0, 0.0] if self.enabled else None
+
+    def _finish(self, response):
+        current = getattr(self._local, 'current', None)
+        if current is None:
+            return response
+        self._local.current = None
+        rule = request.url_rule
+        key = (rule.rule if rule is not None else UNMATCHED, request.method)
+        size = response.content_length
+        if size is None and response.is_streamed:
+            # Corps produit après after_request : mesuré pendant l'itération
+            response.response = self._measure_stream(response.response, key, response.status_code, current)
+            return response
+        self._record(key, response.status_code, time.perf_counter() - current[0], size, current)
+        return response
+
+    def _measure_stream(self, body, key, status, current):
+        """Itère le corps en comptant octets, premier octet et requêtes SQL ; enregistre à la fin (ou à la coupure)"""
+        size = 0
+        first_byte = None
+        iterator = iter(body)
+        try:
+            while True:
+                self._local.current = current
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    self._local.current = None
+                if first_byte is None:
+                    first_byte = time.perf_counter() - current[0]
+                size += len(chunk) if isinstance(chunk, bytes) else len(chunk.encode())
+                yield chunk
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+            self._record(key, status, time.perf_counter() - current[0], size, current, first_byte)
+
+    def _record(self, key, status, elapsed, size, current, first_byte=None):
+        with self._lock:
+            status_key = key + (status,)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            if key not in self.latency:
+                self.latency[key] = _histogram(LATENCY_BUCKETS)
+                self.sizes[key] = _histogram(SIZE_BUCKETS)
+                self.sql_statements[key] = _histogram(SQL_BUCKETS)
+                self.sql_seconds[key] = 0.0
+            _observe(self.latency[key], LATENCY_BUCKETS, elapsed)
+            if size is not None:
+                _observe(self.sizes[key], SIZE_BUCKETS, size)
+            _observe(self.sql_statements[key], SQL_BUCKETS, current[1])
+            self.sql_seconds[key] += current[2]
+            if first_byte is not None:
+                if key not in self.first_byte:
+                    self.first_byte[key] = _histogram(LATENCY_BUCKETS)
+                _observe(self.first_byte[key], LATENCY_BUCKETS, first_byte)
+        self._maybe_flush()
+
+    def _teardown(self, exc):
+        # Exception non gérée : after_request a déjà compté la réponse 500
+        if exc is not None:
+            self.record_exception(exc)
+        self._local.current = None
+
+    def record_exception(self, exc):
+        """Exception d'une route, gérée ou non"""
+        rule = request.url_rule
+        key = (rule.rule if rule is not None else UNMATCHED, type(exc).__name__)
+        with self._lock:
+            self.exceptions[key] = self.exceptions.get(key, 0) + 1
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        current = getattr(self._local, 'current', None)
+        if current is not None:
+            current[3] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        current = getattr(self._local, 'current', None)
+        if current is not None and current[3]:
+            current[1] += 1
+            current[2] += time.perf_counter() - current[3]
+            current[3] = 0.0
+
+    # ----- Partage entre processus -----
+    def _snapshot(self):
+        with self._lock:
+            return {name: {key: list(value) if isinstance(value, list) else value
+                           for key, value in getattr(self, name).items()}
+                    for name in ('requests', 'latency', 'sizes', 'first_byte', 'sql_statements', 'sql_seconds',
+                                 'exceptions')}
+
+    def _maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Écrit les compteurs de ce processus (remplacement atomique du fichier du pid)"""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}.pickle")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(self._snapshot(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def collect(self):
+        """Compteurs de tous les workers vivants (ceux des processus terminés sont supprimés)"""
+        merged = self._snapshot()
+        if not self.directory:
+            return merged
+        self.flush()
+        for path in glob.glob(os.path.join(self.directory, '*.pickle')):
+            pid = int(os.path.basename(path).split('.')[0])
+            if pid == os.getpid():
+                continue
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                os.remove(path)
+                continue
+            except PermissionError:
+                pass
+            try:
+                with open(path, 'rb') as f:
+                    other = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+            for name, values in other.items():
+                _merge(merged.setdefault(name, {}), values)
+        return merged
+
+    # ----- Exposition -----
+    def render(self):
+        """Texte au format d'exposition Prometheus 0.0.4"""
+        data = self.collect()
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, buckets, values, help_text):
+            header(name, 'histogram', help_text)
+            for (route, method), counts in sorted(values.items()):
+                labels = f'route="{_escape(route)}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), counts[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {counts[-1]:.6g}')
+                lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+        header('sokrstat_http_requests_total', 'counter', 'Requêtes servies par route, méthode et statut')
+        for (route, method, status), count in sorted(data['requests'].items()):
+            lines.append(f'sokrstat_http_requests_total{{route="{_escape(route)}",method="{method}",'
+                         f'status="{status}"}} {count}')
+        histogram('sokrstat_http_request_duration_seconds', LATENCY_BUCKETS, data['latency'],
+                  'Latence de la route (jusqu\'au dernier octet pour le streaming)')
+        histogram('sokrstat_http_response_size_bytes', SIZE_BUCKETS, data['sizes'],
+                  'Taille des réponses')
+        histogram('sokrstat_http_stream_first_byte_seconds', LATENCY_BUCKETS, data['first_byte'],
+                  'Délai avant le premier octet des réponses en streaming')
+        histogram('sokrstat_http_request_sql_statements', SQL_BUCKETS, data['sql_statements'],
+                  'Requêtes SQL exécutées par requête HTTP')
+        header('sokrstat_http_request_sql_seconds_total', 'counter', 'Temps passé dans les requêtes SQL')
+        for (route, method), seconds in sorted(data['sql_seconds'].items()):
+            lines.append(f'sokrstat_http_request_sql_seconds_total{{route="{_escape(route)}",'
+                         f'method="{method}"}} {seconds:.6g}')
+        header('sokrstat_http_exceptions_total', 'counter', 'Exceptions levées par les routes')
+        for (route, exception), count in sorted(data['exceptions'].items()):
+            lines.append(f'sokrstat_http_exceptions_total{{route="{_escape(route)}",'
+                         f'exception="{exception}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+metrics = RequestMetrics()
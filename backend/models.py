@@ -1,9 +1,65 @@
 # models.py - Football Manager 2023
+import json
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import or_
+from sqlalchemy.orm import deferred, load_only
+from positions import parse_positions
 
 db = SQLAlchemy()
 
+# === GROUPES D'ATTRIBUTS NOTÉS (échelle FM de 1 à 20) ===
+TECHNICAL_ATTRIBUTES = [
+    "corners", "crossing", "dribbling", "finishing", "first_touch", "free_kicks", "heading",
+    "long_shots", "long_throws", "marking", "passing", "penalty_taking", "tackling", "technique"
+]
+MENTAL_ATTRIBUTES = [
+    "aggression", "anticipation", "bravery", "composure", "concentration", "decisions", "determination",
+    "flair", "leadership", "off_the_ball", "positioning", "teamwork", "vision", "work_rate"
+]
+PHYSICAL_ATTRIBUTES = [
+    "acceleration", "agility", "balance", "jumping", "natural_fitness", "pace", "stamina", "strength"
+]
+GOALKEEPER_ATTRIBUTES = [
+    "aerial_reach", "command_of_area", "communication", "eccentricity", "handling", "kicking",
+    "one_on_ones", "reflexes", "rushing_out", "tendency_to_punch", "throwing"
+]
+HIDDEN_ATTRIBUTES = [
+    "adaptability", "ambition", "consistency", "controversy", "dirtiness", "important_matches",
+    "loyalty", "pressure", "professionalism", "sportsmanship", "temperament", "versatility"
+]
+RATED_ATTRIBUTES = (TECHNICAL_ATTRIBUTES + MENTAL_ATTRIBUTES + PHYSICAL_ATTRIBUTES
+                    + GOALKEEPER_ATTRIBUTES + HIDDEN_ATTRIBUTES)
+
+# Attributs retenus pour les moyennes par catégorie (colonnes avg_*)
+AVERAGE_GROUPS = {
+    "technical": [a for a in TECHNICAL_ATTRIBUTES if a != "long_throws"],
+    "mental": MENTAL_ATTRIBUTES,
+    "physical": [a for a in PHYSICAL_ATTRIBUTES if a != "natural_fitness"],
+    "goalkeeper": [a for a in GOALKEEPER_ATTRIBUTES if a not in ("eccentricity", "tendency_to_punch")]
+}
+
+# Sous-objets détaillés de to_dict(include_all_stats=True)
+DETAIL_GROUPS = {
+    "technical": [a for a in TECHNICAL_ATTRIBUTES if a != "long_throws"],
+    "mental": MENTAL_ATTRIBUTES,
+    "physical": [a for a in PHYSICAL_ATTRIBUTES if a != "natural_fitness"],
+    "goalkeeper": GOALKEEPER_ATTRIBUTES,
+    "feet": ["preferred_foot", "left_foot", "right_foot"]
+}
+FEET_KEYS = {"preferred_foot": "preferred", "left_foot": "left", "right_foot": "right"}
+
+# Champs de to_dict : fiche de liste (par défaut) et fiche détaillée
+BASIC_FIELDS = [
+    "id", "uid", "name", "age", "nationality", "club", "position", "height", "weight",
+    "transfer_value", "preferred_foot", "career_apps", "career_goals"
+]
+DETAIL_FIELDS = BASIC_FIELDS + [
+    "caps", "league_apps", "league_goals",
+    "avg_technical", "avg_mental", "avg_physical", "avg_goalkeeper",
+    "technical", "mental", "physical", "goalkeeper", "feet"
+]
+
 class Player(db.Model):
     """Joueurs Football Manager 2023 - Adapté à la structure CSV importée"""
     __tablename__ = "players"
@@ -24,8 +80,9 @@ class Player(db.Model):
     based = db.Column("based", db.Text)
     team = db.Column("team", db.Text)
     
-    # Position
+    # Position (chaîne FM) et postes canoniques qui en sont tirés (table player_positions)
     position = db.Column("position", db.Text, index=True)
+    position_tokens = db.relationship("PlayerPosition", cascade="all, delete-orphan")
     
     # Physique (Texte dans la DB car importé du CSV avec unités parfois)
     height = db.Column("height", db.Text) 
@@ -127,6 +184,61 @@ class Player(db.Model):
     temperament = db.Column("temp", db.BigInteger)
     versatility = db.Column("vers", db.BigInteger)
 
+    # === MOYENNES MATÉRIALISÉES (calculées à l'import et à la mise à jour) ===
+    avg_technical = db.Column("avg_technical", db.Float, index=True)
+    avg_mental = db.Column("avg_mental", db.Float, index=True)
+    avg_physical = db.Column("avg_physical", db.Float, index=True)
+    avg_goalkeeper = db.Column("avg_goalkeeper", db.Float, index=True)
+
+    # === VALEURS NUMÉRIQUES DÉRIVÉES DES CHAMPS TEXTE (cf. units.py) ===
+    height_cm = db.Column("height_cm", db.Integer, index=True)
+    weight_kg = db.Column("weight_kg", db.Integer, index=True)
+    value_min = db.Column("value_min", db.BigInteger, index=True)   # euros
+    value_max = db.Column("value_max", db.BigInteger, index=True)   # euros
+    career_apps_count = db.Column("career_apps_count", db.Integer, index=True)
+    career_goals_count = db.Column("career_goals_count", db.Integer, index=True)
+    league_apps_count = db.Column("league_apps_count", db.Integer, index=True)
+    league_goals_count = db.Column("league_goals_count", db.Integer, index=True)
+    youth_apps_count = db.Column("youth_apps_count", db.Integer, index=True)
+    youth_goals_count = db.Column("youth_goals_count", db.Integer, index=True)
+
+    @classmethod
+    def sortable_column(cls, name):
+        """Colonne mappée utilisable pour trier, ou None"""
+        if name in cls.__mapper__.column_attrs:
+            return getattr(cls, name)
+        return None
+
+    @classmethod
+    def field_columns(cls, field):
+        """Attributs mappés nécessaires à un champ de to_dict, ou None s'il est inconnu"""
+        if field == "uid":
+            return ["id"]
+        if field in DETAIL_GROUPS:
+            return DETAIL_GROUPS[field]
+        if field in cls.__mapper__.column_attrs:
+            return [field]
+        return None
+
+    @classmethod
+    def parse_fields(cls, value, default):
+        """Liste de champs d'un paramètre fields= ("a,b" ou liste) ; ValueError si inconnu"""
+        if not value:
+            return default
+        fields = value.split(",") if isinstance(value, str) else list(value)
+        fields = list(dict.fromkeys(f.strip() for f in fields if f and f.strip()))
+        unknown = [f for f in fields if cls.field_columns(f) is None]
+        if unknown:
+            raise ValueError(f"Champs inconnus : {', '.join(unknown)}")
+        return fields or default
+
+    @classmethod
+    def load_fields(cls, fields, *extra):
+        """Option de requête ne chargeant que les colonnes utiles (les autres restent différées)"""
+        names = {name for field in fields for name in cls.field_columns(field)}
+        names.update(extra)
+        return load_only(*[getattr(cls, name) for name in sorted(names)])
+
     def calculate_averages(self):
         """Calcule les moyennes d'attributs par catégorie"""
         def get_val(val):
@@ -136,144 +248,104 @@ class Player(db.Model):
             except:
                 return 0
 
-        technical = [
-            self.corners, self.crossing, self.dribbling, self.finishing,
-            self.first_touch, self.free_kicks, self.heading, self.long_shots,
-            self.marking, self.passing, self.penalty_taking, self.tackling, self.technique
-        ]
-        
-        mental = [
-            self.aggression, self.anticipation, self.bravery, self.composure,
-            self.concentration, self.decisions, self.determination, self.flair,
-            self.leadership, self.off_the_ball, self.positioning, self.teamwork,
-            self.vision, self.work_rate
-        ]
-        
-        physical = [
-            self.acceleration, self.agility, self.balance, self.jumping,
-            self.pace, self.stamina, self.strength
-        ]
-        
-        goalkeeper = [
-            self.aerial_reach, self.command_of_area, self.communication,
-            self.handling, self.kicking, self.one_on_ones, self.reflexes,
-            self.rushing_out, self.throwing
-        ]
-        
         def avg(attrs):
             valid = [get_val(a) for a in attrs if a is not None]
             return round(sum(valid) / len(valid), 1) if valid else 0
         
         return {
-            "technical": avg(technical),
-            "mental": avg(mental),
-            "physical": avg(physical),
-            "goalkeeper": avg(goalkeeper)
+            group: avg([getattr(self, name) for name in names])
+            for group, names in AVERAGE_GROUPS.items()
         }
 
-    def to_dict(self, include_all_stats=False):
-        """Conversion en dictionnaire pour l'API"""
-        basic_data = {
+    def refresh_averages(self):
+        """Recalcule les colonnes avg_* après modification des attributs"""
+        for group, value in self.calculate_averages().items():
+            setattr(self, f"avg_{group}", value)
+
+    def refresh_positions(self):
+        """Recalcule les postes canoniques après modification de la position"""
+        self.position_tokens = [PlayerPosition(position=token) for token in parse_positions(self.position)]
+
+    def field_value(self, field):
+        """Valeur d'un champ de to_dict"""
+        if field == "uid":
+            return self.id  # On renvoie l'ID comme UID aussi
+        if field == "feet":
+            return {FEET_KEYS[name]: getattr(self, name) for name in DETAIL_GROUPS["feet"]}
+        if field in DETAIL_GROUPS:
+            return {name: getattr(self, name) for name in DETAIL_GROUPS[field]}
+        if field.startswith("avg_") and field[4:] in AVERAGE_GROUPS:
+            value = getattr(self, field)
+            return value if value is not None else self.calculate_averages()[field[4:]]
+        return getattr(self, field)
+
+    def to_dict(self, include_all_stats=False, fields=None):
+        """Conversion en dictionnaire pour l'API (fields : sous-ensemble de champs)"""
+        if fields is None:
+            fields = DETAIL_FIELDS if include_all_stats else BASIC_FIELDS
+        return {field: self.field_value(field) for field in fields}
+
+    def __repr__(self):
+        return f"<Player {self.name} ({self.position})>"
+
+
+class PlayerPosition(db.Model):
+    """Poste canonique d'un joueur ("D (R)", "DM"...), tiré de sa chaîne de position"""
+    __tablename__ = "player_positions"
+
+    player_id = db.Column("player_uid", db.BigInteger, db.ForeignKey("players.uid", ondelete="CASCADE"),
+                          primary_key=True)
+    position = db.Column(db.Text, primary_key=True)
+
+    # Filtre par poste : parcours de l'index, sans lire la table players
+    __table_args__ = (db.Index("ix_player_positions_position", "position", "player_uid"),)
+
+
+class ImportJob(db.Model):
+    """Tâche d'import admin exécutée en arrière-plan (état persisté, cf. jobs.py)"""
+    __tablename__ = "import_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.Text, nullable=False, default="queued", index=True)  # queued, running, done, failed, cancelled
+    phase = db.Column(db.Text, default="queued")
+    filename = db.Column(db.Text)
+    # Fichier déposé, gardé en base jusqu'à l'état final : survit à un redémarrage sur un conteneur neuf
+    file_data = deferred(db.Column(db.LargeBinary))
+
+    rows_total = db.Column(db.Integer)
+    rows_processed = db.Column(db.Integer, default=0)
+    rows_per_second = db.Column(db.Float)
+    error_count = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Text)   # JSON, 100 premières erreurs
+    result = db.Column(db.Text)   # JSON, compteurs du rapport d'import
+    message = db.Column(db.Text)
+
+    cancel_requested = db.Column(db.Boolean, default=False)
+    attempts = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
             "id": self.id,
-            "uid": self.id, # On renvoie l'ID comme UID aussi
-            "name": self.name,
-            "age": self.age,
-            "nationality": self.nationality,
-            "club": self.club,
-            "position": self.position,
-            "height": self.height,
-            "weight": self.weight,
-            "transfer_value": self.transfer_value,
-            "preferred_foot": self.preferred_foot,
-            "career_apps": self.career_apps,
-            "career_goals": self.career_goals
+            "status": self.status,
+            "phase": self.phase,
+            "filename": self.filename,
+            "rows_total": self.rows_total,
+            "rows_processed": self.rows_processed,
+            "rows_per_second": self.rows_per_second,
+            "error_count": self.error_count,
+            "errors": json.loads(self.errors) if self.errors else [],
+            "result": json.loads(self.result) if self.result else None,
+            "message": self.message,
+            "cancel_requested": bool(self.cancel_requested),
+            "attempts": self.attempts,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
         }
-        
-        if include_all_stats:
-            averages = self.calculate_averages()
-            
-            basic_data.update({
-                # Carrière
-                "caps": self.caps,
-                "league_apps": self.league_apps,
-                "league_goals": self.league_goals,
-                
-                # Moyennes
-                "avg_technical": averages["technical"],
-                "avg_mental": averages["mental"],
-                "avg_physical": averages["physical"],
-                "avg_goalkeeper": averages["goalkeeper"],
-                
-                # Technique
-                "technical": {
-                    "corners": self.corners,
-                    "crossing": self.crossing,
-                    "dribbling": self.dribbling,
-                    "finishing": self.finishing,
-                    "first_touch": self.first_touch,
-                    "free_kicks": self.free_kicks,
-                    "heading": self.heading,
-                    "long_shots": self.long_shots,
-                    "marking": self.marking,
-                    "passing": self.passing,
-                    "penalty_taking": self.penalty_taking,
-                    "tackling": self.tackling,
-                    "technique": self.technique
-                },
-                
-                # Mental
-                "mental": {
-                    "aggression": self.aggression,
-                    "anticipation": self.anticipation,
-                    "bravery": self.bravery,
-                    "composure": self.composure,
-                    "concentration": self.concentration,
-                    "decisions": self.decisions,
-                    "determination": self.determination,
-                    "flair": self.flair,
-                    "leadership": self.leadership,
-                    "off_the_ball": self.off_the_ball,
-                    "positioning": self.positioning,
-                    "teamwork": self.teamwork,
-                    "vision": self.vision,
-                    "work_rate": self.work_rate
-                },
-                
-                # Physique
-                "physical": {
-                    "acceleration": self.acceleration,
-                    "agility": self.agility,
-                    "balance": self.balance,
-                    "jumping": self.jumping,
-                    "pace": self.pace,
-                    "stamina": self.stamina,
-                    "strength": self.strength
-                },
-                
-                # Gardien
-                "goalkeeper": {
-                    "aerial_reach": self.aerial_reach,
-                    "command_of_area": self.command_of_area,
-                    "communication": self.communication,
-                    "eccentricity": self.eccentricity,
-                    "handling": self.handling,
-                    "kicking": self.kicking,
-                    "one_on_ones": self.one_on_ones,
-                    "reflexes": self.reflexes,
-                    "rushing_out": self.rushing_out,
-                    "tendency_to_punch": self.tendency_to_punch,
-                    "throwing": self.throwing
-                },
-                
-                # Pieds
-                "feet": {
-                    "preferred": self.preferred_foot,
-                    "left": self.left_foot,
-                    "right": self.right_foot
-                }
-            })
-        
-        return basic_data
 
     def __repr__(self):
-        return f"<Player {self.name} ({self.position})>"
\ No newline at end of file
+        return f"<ImportJob {self.id} ({self.status})>"
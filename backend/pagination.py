@@ -0,0 +1,63 @@
+# pagination.py - Pagination par curseur (keyset)
+"""
+Le curseur encode la clé de tri et l'uid de la dernière ligne servie ; la page
+suivante reprend avec un prédicat (clé, uid) > (v, id) au lieu d'un OFFSET,
+si bien que le coût d'une page ne dépend plus de sa profondeur.
+
+Les NULL gardent la place que leur donne la base : en fin de tri croissant sur
+PostgreSQL (valeurs « les plus grandes »), en tête sur SQLite.
+"""
+import base64
+import json
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible ou émis pour un autre tri"""
+
+
+def encode_cursor(sort_by, order, value, last_id):
+    payload = json.dumps({"s": sort_by, "o": order, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, sort_by, order):
+    """Renvoie (valeur, id) de la dernière ligne, ou None pour la première page"""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = payload["v"], int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Curseur invalide")
+    if payload.get("s") != sort_by or payload.get("o") != order:
+        raise InvalidCursor("Curseur émis pour un autre tri")
+    return value, last_id
+
+
+def nulls_sort_high(dialect_name):
+    """PostgreSQL classe NULL après toute valeur, SQLite avant"""
+    return dialect_name != "sqlite"
+
+
+def keyset_order(column, id_column, descending):
+    """Ordre total (clé, uid) dans le sens demandé"""
+    if descending:
+        return [column.desc(), id_column.desc()]
+    return [column.asc(), id_column.asc()]
+
+
+def keyset_filter(column, id_column, descending, value, last_id, dialect_name):
+    """Prédicat sélectionnant les lignes situées après (value, last_id)"""
+    after = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+    nulls_first = descending == nulls_sort_high(dialect_name)
+
+    if value is None:
+        same_block = and_(column.is_(None), after(id_column, last_id))
+        return or_(same_block, column.isnot(None)) if nulls_first else same_block
+
+    # Forme « col >= v AND (...) » pour que l'index sur col borne le parcours
+    bound = column <= value if descending else column >= value
+    rest = and_(bound, or_(after(column, value), after(id_column, last_id)))
+    return rest if nulls_first else or_(rest, column.is_(None))
@@ -0,0 +1,76 @@
+# positions.py - Lecture des chaînes de position FM2023
+"""
+Les positions FM sont des chaînes composées comme "D/WB (R), DM" ou
+"AM (RLC), ST (C)" : chaque partie liste des rôles séparés par "/" et les
+côtés entre parenthèses. Elles sont découpées en postes canoniques (rôle +
+côté) : "D/WB (R), DM" -> D (R), WB (R), DM.
+
+Le groupe de poste d'un joueur est celui de son premier rôle listé.
+"""
+import re
+
+POSITION_GROUPS = ["GK", "DEF", "MID", "ATT"]
+
+ROLE_GROUPS = {
+    "GK": "GK",
+    "D": "DEF", "WB": "DEF",
+    "DM": "MID", "M": "MID",
+    "AM": "ATT", "ST": "ATT", "F": "ATT"
+}
+
+# Postes canoniques FM, dans l'ordre d'affichage (GK et DM n'ont pas de côté)
+CANONICAL_POSITIONS = [
+    "GK",
+    "D (L)", "D (C)", "D (R)",
+    "WB (L)", "WB (R)",
+    "DM",
+    "M (L)", "M (C)", "M (R)",
+    "AM (L)", "AM (C)", "AM (R)",
+    "ST (C)"
+]
+POSITION_INDEX = {position: i for i, position in enumerate(CANONICAL_POSITIONS)}
+SIDELESS_ROLES = {"GK", "DM"}
+
+_FIRST_ROLE = re.compile(r"\s*([A-Z]+)")
+_PART = re.compile(r"^\s*([A-Z]+(?:/[A-Z]+)*)\s*(?:\(([A-Z]+)\))?\s*$")
+
+
+def position_group(position):
+    """Groupe de poste (GK, DEF, MID, ATT) d'une chaîne FM, ou None"""
+    if not position:
+        return None
+    match = _FIRST_ROLE.match(position.upper())
+    return ROLE_GROUPS.get(match.group(1)) if match else None
+
+
+def parse_positions(position, expand=False):
+    """
+    Postes canoniques d'une chaîne FM, dans l'ordre de CANONICAL_POSITIONS
+    Un rôle sans côté vaut (C) ; avec expand=True (filtres), tous ses côtés : "D" -> D (L), D (C), D (R)
+    """
+    if not isinstance(position, str):
+        return []
+    found = set()
+    for part in position.upper().split(","):
+        match = _PART.match(part)
+        if not match:
+            continue
+        roles, sides = match.group(1).split("/"), match.group(2)
+        for role in roles:
+            if role in SIDELESS_ROLES:
+                found.add(role)
+            elif sides:
+                found.update(f"{role} ({side})" for side in sides)
+            elif expand:
+                found.update(p for p in CANONICAL_POSITIONS if p.startswith(f"{role} ("))
+            else:
+                found.add(f"{role} (C)")
+    return sorted(found & POSITION_INDEX.keys(), key=POSITION_INDEX.get)
+
+
+def position_flags(position, expand=False):
+    """Masque de bits des postes canoniques (bit i = CANONICAL_POSITIONS[i])"""
+    flags = 0
+    for token in parse_positions(position, expand):
+        flags |= 1 << POSITION_INDEX[token]
+    return flags
@@ -0,0 +1,154 @@
+# roles.py - Notes d'aptitude aux rôles FM (libéro, meneur reculé...)
+"""
+Chaque rôle est une moyenne pondérée d'attributs notés : attributs clés
+(poids 2) et attributs préférables (poids 1), comme dans l'écran de rôle FM.
+
+Toutes les notes de tous les joueurs s'obtiennent en un produit matriciel
+(joueurs x attributs) @ (attributs x rôles). Un attribut absent (0) est retiré
+de la moyenne du joueur au lieu de compter comme une note de 0.
+"""
+import numpy as np
+from models import RATED_ATTRIBUTES
+
+KEY_WEIGHT = 2.0
+PREFERABLE_WEIGHT = 1.0
+
+ROLES = {
+    "goalkeeper": {
+        "label": "Gardien de but",
+        "positions": ["GK"],
+        "key": ["aerial_reach", "command_of_area", "communication", "handling", "kicking", "reflexes",
+                "concentration", "positioning"],
+        "preferable": ["one_on_ones", "throwing", "anticipation", "decisions", "agility"]
+    },
+    "sweeper_keeper": {
+        "label": "Gardien libéro",
+        "positions": ["GK"],
+        "key": ["aerial_reach", "command_of_area", "communication", "handling", "kicking", "one_on_ones",
+                "reflexes", "rushing_out", "anticipation", "composure", "concentration", "positioning"],
+        "preferable": ["first_touch", "passing", "throwing", "decisions", "vision", "acceleration"]
+    },
+    "central_defender": {
+        "label": "Défenseur central",
+        "positions": ["D (C)"],
+        "key": ["heading", "marking", "tackling", "positioning", "jumping", "strength"],
+        "preferable": ["aggression", "anticipation", "bravery", "composure", "concentration", "decisions",
+                       "pace"]
+    },
+    "ball_playing_defender": {
+        "label": "Défenseur relanceur",
+        "positions": ["D (C)"],
+        "key": ["heading", "marking", "passing", "tackling", "composure", "positioning", "jumping", "strength"],
+        "preferable": ["first_touch", "technique", "aggression", "anticipation", "bravery", "concentration",
+                       "decisions", "vision", "pace"]
+    },
+    "full_back": {
+        "label": "Arrière latéral",
+        "positions": ["D (L)", "D (R)"],
+        "key": ["marking", "tackling", "anticipation", "concentration", "positioning", "teamwork"],
+        "preferable": ["crossing", "dribbling", "passing", "technique", "decisions", "work_rate",
+                       "acceleration", "pace", "stamina"]
+    },
+    "wing_back": {
+        "label": "Piston",
+        "positions": ["D (L)", "D (R)", "WB (L)", "WB (R)"],
+        "key": ["crossing", "dribbling", "tackling", "off_the_ball", "teamwork", "work_rate", "acceleration",
+                "stamina"],
+        "preferable": ["first_touch", "marking", "passing", "technique", "anticipation", "decisions", "flair",
+                       "positioning", "agility", "balance", "pace"]
+    },
+    "ball_winning_midfielder": {
+        "label": "Milieu récupérateur",
+        "positions": ["DM", "M (C)"],
+        "key": ["tackling", "aggression", "teamwork", "work_rate", "stamina"],
+        "preferable": ["marking", "anticipation", "bravery", "concentration", "positioning", "agility", "pace",
+                       "strength"]
+    },
+    "deep_lying_playmaker": {
+        "label": "Meneur de jeu reculé",
+        "positions": ["DM", "M (C)"],
+        "key": ["first_touch", "passing", "technique", "composure", "decisions", "teamwork", "vision"],
+        "preferable": ["anticipation", "off_the_ball", "positioning", "balance"]
+    },
+    "box_to_box_midfielder": {
+        "label": "Milieu box-to-box",
+        "positions": ["M (C)"],
+        "key": ["passing", "tackling", "off_the_ball", "teamwork", "work_rate", "stamina"],
+        "preferable": ["dribbling", "finishing", "first_touch", "long_shots", "technique", "aggression",
+                       "anticipation", "composure", "decisions", "positioning", "acceleration", "balance",
+                       "pace", "strength"]
+    },
+    "advanced_playmaker": {
+        "label": "Meneur de jeu avancé",
+        "positions": ["M (C)", "AM (L)", "AM (C)", "AM (R)"],
+        "key": ["first_touch", "passing", "technique", "composure", "decisions", "off_the_ball", "teamwork",
+                "vision"],
+        "preferable": ["dribbling", "anticipation", "flair", "agility"]
+    },
+    "winger": {
+        "label": "Ailier",
+        "positions": ["M (L)", "M (R)", "AM (L)", "AM (R)"],
+        "key": ["crossing", "dribbling", "technique", "acceleration", "agility"],
+        "preferable": ["first_touch", "passing", "off_the_ball", "work_rate", "balance", "pace", "stamina"]
+    },
+    "inside_forward": {
+        "label": "Attaquant intérieur",
+        "positions": ["AM (L)", "AM (R)"],
+        "key": ["dribbling", "finishing", "first_touch", "technique", "off_the_ball", "acceleration", "agility"],
+        "preferable": ["long_shots", "passing", "anticipation", "composure", "flair", "work_rate", "balance",
+                       "pace", "stamina"]
+    },
+    "advanced_forward": {
+        "label": "Attaquant de pointe",
+        "positions": ["ST (C)"],
+        "key": ["dribbling", "finishing", "first_touch", "technique", "composure", "off_the_ball",
+                "acceleration"],
+        "preferable": ["passing", "anticipation", "decisions", "work_rate", "agility", "balance", "pace",
+                       "stamina"]
+    },
+    "target_forward": {
+        "label": "Pivot",
+        "positions": ["ST (C)"],
+        "key": ["heading", "bravery", "composure", "off_the_ball", "teamwork", "balance", "jumping", "strength"],
+        "preferable": ["finishing", "first_touch", "aggression", "anticipation", "decisions"]
+    },
+    "poacher": {
+        "label": "Renard des surfaces",
+        "positions": ["ST (C)"],
+        "key": ["finishing", "off_the_ball", "anticipation", "composure"],
+        "preferable": ["first_touch", "heading", "technique", "decisions", "acceleration"]
+    }
+}
+ROLE_KEYS = list(ROLES)
+ROLE_INDEX = {key: i for i, key in enumerate(ROLE_KEYS)}
+
+
+def role_weights(role):
+    """Poids {attribut: poids} d'un rôle"""
+    definition = ROLES[role]
+    weights = {name: PREFERABLE_WEIGHT for name in definition["preferable"]}
+    weights.update({name: KEY_WEIGHT for name in definition["key"]})
+    return weights
+
+
+def _weight_matrix():
+    """Colonnes d'attributs utilisées et matrice de poids (attributs utilisés x rôles)"""
+    used = sorted({name for role in ROLE_KEYS for name in role_weights(role)}, key=RATED_ATTRIBUTES.index)
+    weights = np.zeros((len(used), len(ROLE_KEYS)), dtype=np.float32)
+    for j, role in enumerate(ROLE_KEYS):
+        for name, weight in role_weights(role).items():
+            weights[used.index(name), j] = weight
+    return [RATED_ATTRIBUTES.index(name) for name in used], weights
+
+
+ROLE_COLUMNS, ROLE_WEIGHTS = _weight_matrix()
+
+
+def rate_roles(matrix):
+    """Notes (1-20, 0 si aucun attribut du rôle) de chaque ligne de la matrice uint8 dans chaque rôle"""
+    values = matrix[:, ROLE_COLUMNS].astype(np.float32)
+    weighted = values @ ROLE_WEIGHTS
+    present = (values > 0).astype(np.float32) @ ROLE_WEIGHTS
+    ratings = np.zeros_like(weighted)
+    np.divide(weighted, present, out=ratings, where=present > 0)
+    return ratings
@@ -0,0 +1,233 @@
+# search_index.py - Index de recherche n-grammes en mémoire
+"""
+Index trigrammes sur le nom des joueurs, insensible aux accents et à la casse.
+
+Chaque mot du nom est complété comme dans pg_trgm ("  mu", " mul", ...), ce qui
+permet aux requêtes courtes de cibler les débuts de mots. Les listes de
+postings sont des tableaux NumPy triés ; les écritures admin passent par un
+petit delta (lignes ajoutées) et des pierres tombales (lignes retirées) au lieu
+de reconstruire l'index.
+
+Classement : nom commençant par la requête, puis un mot du nom commençant par
+la requête, puis nom contenant la requête, puis club, puis nationalité.
+"""
+import bisect
+import itertools
+import threading
+import unicodedata
+import numpy as np
+from models import db, Player
+
+# Lettres que la décomposition NFKD ne ramène pas à l'ASCII
+_EXTRA_FOLDS = str.maketrans({
+    "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "æ": "ae", "œ": "oe", "ß": "ss", "ı": "i"
+})
+
+# Au-delà, le delta est fusionné par une reconstruction complète
+MAX_DELTA = 2000
+
+TIER_NAME_PREFIX, TIER_WORD_PREFIX, TIER_NAME_CONTAINS, TIER_CLUB, TIER_NATIONALITY = range(5)
+
+
+def fold(text):
+    """Minuscules sans diacritiques ("Müller" -> "muller")"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.casefold().translate(_EXTRA_FOLDS))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).translate(_EXTRA_FOLDS)
+
+
+def word_trigrams(text):
+    """Trigrammes des mots complétés façon pg_trgm"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def query_trigrams(word):
+    """Trigrammes qu'un nom doit contenir pour qu'un mot de requête y figure"""
+    if len(word) >= 3:
+        return {word[i:i + 3] for i in range(len(word) - 2)}
+    # Mot court : uniquement en début de mot
+    return {f"  {word}"[:3]} | ({f" {word}"} if len(word) == 2 else set())
+
+
+class _Document:
+    __slots__ = ("id", "name", "club", "nationality")
+
+    def __init__(self, player_id, name, club, nationality):
+        self.id = player_id
+        self.name = fold(name)
+        self.club = fold(club)
+        self.nationality = fold(nationality)
+
+
+class _Base:
+    """Partie immuable de l'index, construite depuis la table players"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.row_of = {doc.id: row for row, doc in enumerate(documents)}
+        self.sorted_names = sorted((doc.name, doc.id, row) for row, doc in enumerate(documents))
+
+        postings = {}
+        for row, doc in enumerate(documents):
+            for gram in word_trigrams(doc.name):
+                postings.setdefault(gram, []).append(row)
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+        self.club_rows = {}
+        self.nationality_rows = {}
+        for row, doc in enumerate(documents):
+            if doc.club:
+                self.club_rows.setdefault(doc.club, []).append(row)
+            if doc.nationality:
+                self.nationality_rows.setdefault(doc.nationality, []).append(row)
+
+    def name_candidates(self, words):
+        """Lignes dont le nom contient tous les trigrammes de la requête"""
+        grams = set().union(*(query_trigrams(w) for w in words))
+        lists = []
+        for gram in grams:
+            rows = self.postings.get(gram)
+            if rows is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(rows)
+        lists.sort(key=len)
+        result = lists[0]
+        for rows in lists[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return result
+
+
+def _name_tier(name, query, words):
+    """Rang d'un nom pour la requête, ou None s'il ne correspond pas"""
+    if name.startswith(query):
+        return TIER_NAME_PREFIX
+    name_words = name.split()
+    for w in words:
+        if len(w) < 3:
+            if not any(nw.startswith(w) for nw in name_words):
+                return None
+        elif w not in name:
+            return None
+    if any(nw.startswith(words[0]) for nw in name_words):
+        return TIER_WORD_PREFIX
+    return TIER_NAME_CONTAINS
+
+
+class SearchIndex:
+    """Index global, tenu à jour par les écritures admin"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._base = None
+        self._delta = {}        # id -> _Document ajouté ou modifié
+        self._tombstones = set()  # lignes de la base à ignorer
+
+    def ensure_loaded(self):
+        """Base de l'index, construite au premier accès"""
+        base = self._base
+        if base is None:
+            with self._lock:
+                if self._base is None:
+                    rows = db.session.execute(
+                        db.select(Player.id, Player.name, Player.club, Player.nationality)
+                    ).all()
+                    self._base = _Base([_Document(*r) for r in rows])
+                    self._delta = {}
+                    self._tombstones = set()
+                base = self._base
+        return base
+
+    def invalidate(self):
+        """Reconstruction complète au prochain accès"""
+        with self._lock:
+            self._base = None
+
+    def upsert(self, player):
+        """Indexe un joueur ajouté ou modifié"""
+        with self._lock:
+            if self._base is None:
+                return
+            row = self._base.row_of.get(player.id)
+            if row is not None:
+                self._tombstones = self._tombstones | {row}
+            self._delta = {**self._delta, player.id: _Document(player.id, player.name, player.club, player.nationality)}
+            if len(self._delta) > MAX_DELTA:
+                self._base = None
+
+    def remove(self, player_id):
+        """Retire un joueur supprimé"""
+        with self._lock:
+            if self._base is None:
+                return
+            row = self._base.row_of.get(player_id)
+            if row is not None:
+                self._tombstones = self._tombstones | {row}
+            if player_id in self._delta:
+                self._delta = {k: v for k, v in self._delta.items() if k != player_id}
+
+    def search(self, text, limit=20):
+        """Identifiants des joueurs correspondants, du plus au moins pertinent"""
+        query = " ".join(fold(text).split())
+        if not query or limit <= 0:
+            return []
+        words = query.split()
+
+        base = self.ensure_loaded()
+        delta, tombstones = self._delta, self._tombstones
+        hits = {}  # id -> (rang, nom)
+
+        def add(doc, tier):
+            if doc.id not in hits or hits[doc.id][0] > tier:
+                hits[doc.id] = (tier, doc.name)
+
+        # 1. Noms commençant par la requête : plage contiguë de la liste triée
+        start = bisect.bisect_left(base.sorted_names, (query,))
+        for name, player_id, row in itertools.islice(base.sorted_names, start, None):
+            if not name.startswith(query) or len(hits) >= limit:
+                break
+            if row not in tombstones:
+                add(base.documents[row], TIER_NAME_PREFIX)
+
+        # 2. Autres correspondances sur le nom (postings trigrammes)
+        if len(hits) < limit:
+            for row in base.name_candidates(words):
+                row = int(row)
+                doc = base.documents[row]
+                if row in tombstones or doc.id in hits:
+                    continue
+                tier = _name_tier(doc.name, query, words)
+                if tier is not None:
+                    add(doc, tier)
+
+        for doc in delta.values():
+            tier = _name_tier(doc.name, query, words)
+            if tier is not None:
+                add(doc, tier)
+
+        # 3. Club puis nationalité, seulement s'il reste de la place
+        for tier, groups, field in ((TIER_CLUB, base.club_rows, "club"),
+                                    (TIER_NATIONALITY, base.nationality_rows, "nationality")):
+            if len(hits) >= limit:
+                break
+            for label in sorted(label for label in groups if query in label):
+                for row in groups[label]:
+                    if len(hits) >= limit:
+                        break
+                    if row not in tombstones:
+                        add(base.documents[row], tier)
+            for doc in delta.values():
+                if query in getattr(doc, field):
+                    add(doc, tier)
+
+        ranked = sorted(hits.items(), key=lambda item: (item[1][0], item[1][1], item[0]))
+        return [player_id for player_id, _ in ranked[:limit]]
+
+
+index = SearchIndex()
@@ -0,0 +1,84 @@
+# tests/conftest.py - Base SQLite de test générée par generate_players (graine fixe)
+"""
+La base est construite une fois par session dans un répertoire temporaire, puis
+recopiée avant chaque test : un test qui écrit ne voit jamais les écritures d'un autre.
+
+    cd backend && python -m pytest -q
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TEST_DIR = tempfile.mkdtemp(prefix="sokrstat-tests-")
+DB_PATH = os.path.join(TEST_DIR, "players.db")
+TEMPLATE_PATH = os.path.join(TEST_DIR, "template.db")
+
+# Lu par config.py à l'import de app : rien ne doit pointer sur la base de développement
+os.environ.update(FLASK_ENV="production",
+                  DATABASE_URL="sqlite:///" + DB_PATH,
+                  DATA_VERSION_FILE=os.path.join(TEST_DIR, "VERSION"),
+                  CACHE_DIR=os.path.join(TEST_DIR, "cache"),
+                  METRICS_ENABLED="0")
+
+SEED = 2023
+PLAYERS = 600
+
+
+def build_template():
+    """Joueurs synthétiques insérés comme le fait benchmark.build_database"""
+    import pandas as pd
+    from app import app, db
+    from models import Player, PlayerPosition
+    from ingest import compute_category_averages, compute_shadow_columns, frame_records, model_fields, position_records
+    from generate_players import PlayerGenerator
+    from init_db import upgrade_schema
+
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        chunk = next(PlayerGenerator(seed=SEED, clubs=40).chunks(PLAYERS, PLAYERS))
+        chunk = pd.concat([chunk, compute_category_averages(chunk), compute_shadow_columns(chunk)], axis=1)
+        rows = chunk.rename(columns=model_fields())
+        db.session.execute(Player.__table__.insert(), frame_records(rows))
+        db.session.execute(PlayerPosition.__table__.insert(), position_records(rows["uid"], rows["position"]))
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+    shutil.copyfile(DB_PATH, TEMPLATE_PATH)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app as flask_app
+    build_template()
+    yield flask_app
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db(app):
+    """Base fraîche (copie du modèle) et contexte d'application ; structures en mémoire vidées"""
+    from app import attribute_store, count_cache, response_cache, search_index
+    from models import db as database
+
+    with app.app_context():
+        database.session.remove()
+        database.engine.dispose()
+        shutil.copyfile(TEMPLATE_PATH, DB_PATH)
+        attribute_store.invalidate()
+        search_index.invalidate()
+        count_cache.clear()
+        response_cache.invalidate()
+        yield database
+        database.session.remove()
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
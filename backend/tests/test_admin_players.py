@@ -0,0 +1,68 @@
+# tests/test_admin_players.py - Ajout d'un joueur par l'admin (POST /api/players)
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from sqlalchemy import event
+
+import app as app_module
+from models import Player
+
+NEW_PLAYER = {"name": "Nouveau Joueur", "age": 19, "nationality": "FRA", "club": "Test FC", "position": "AM (C)"}
+
+
+@pytest.fixture
+def headers():
+    token = jwt.encode({"user": "admin", "exp": datetime.utcnow() + timedelta(hours=1)},
+                       app_module.SECRET_KEY, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def steal_ids(db, count):
+    """Au moment de l'INSERT, une autre connexion prend d'abord l'id lu (ajouts simultanés)"""
+    stolen = []
+
+    def before_insert(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("INSERT INTO players") or len(stolen) >= count or conn.info.get("other"):
+            return
+        stolen.append(parameters[0])
+        with db.engine.connect() as other:
+            other.info["other"] = True
+            try:
+                other.execute(Player.__table__.insert().values(uid=parameters[0], name="Concurrent"))
+                other.commit()
+            finally:
+                other.info.pop("other")
+
+    event.listen(db.engine, "before_cursor_execute", before_insert)
+    return stolen, lambda: event.remove(db.engine, "before_cursor_execute", before_insert)
+
+
+def test_add_player_assigns_next_id(client, db, headers):
+    last_id = db.session.execute(db.select(db.func.max(Player.id))).scalar()
+    response = client.post("/api/players", json=NEW_PLAYER, headers=headers)
+    assert response.status_code == 201
+    assert response.get_json()["id"] == last_id + 1
+    assert client.get(f"/api/players/{last_id + 1}").get_json()["name"] == "Nouveau Joueur"
+
+
+def test_add_player_retries_when_id_is_taken(client, db, headers):
+    last_id = db.session.execute(db.select(db.func.max(Player.id))).scalar()
+    stolen, stop = steal_ids(db, 2)
+    try:
+        response = client.post("/api/players", json=NEW_PLAYER, headers=headers)
+    finally:
+        stop()
+    assert stolen == [last_id + 1, last_id + 2]
+    assert response.status_code == 201
+    assert response.get_json()["id"] == last_id + 3
+
+
+def test_add_player_gives_up_after_max_attempts(client, db, headers):
+    stolen, stop = steal_ids(db, app_module.ADD_PLAYER_ATTEMPTS)
+    try:
+        response = client.post("/api/players", json=NEW_PLAYER, headers=headers)
+    finally:
+        stop()
+    assert response.status_code == 409
+    assert db.session.query(Player.id).filter(Player.name == "Nouveau Joueur").count() == 0
@@ -0,0 +1,55 @@
+# tests/test_attribute_store.py - Mises à jour ligne à ligne de la matrice d'attributs
+import numpy as np
+
+from attribute_store import store
+from models import Player, RATED_ATTRIBUTES
+
+
+def assert_derived_match_rebuild(snapshot):
+    """Tables reportées ligne à ligne identiques à celles d'un instantané reconstruit depuis la base"""
+    rebuilt = store._build()
+    np.testing.assert_array_equal(snapshot.ids, rebuilt.ids)
+    np.testing.assert_array_equal(snapshot.__dict__["peer_counts"], rebuilt.peer_counts)
+    np.testing.assert_array_equal(snapshot.__dict__["role_ratings"], rebuilt.role_ratings)
+
+
+def test_carry_derived_on_replace(db):
+    store.snapshot().prepare()
+    player = db.session.get(Player, 3)
+    player.position = "GK"
+    for attribute in RATED_ATTRIBUTES[:10]:
+        setattr(player, attribute, 20)
+    db.session.commit()
+    store.refresh_player(player)
+    assert_derived_match_rebuild(store.snapshot())
+
+
+def test_carry_derived_on_insert_and_delete(db):
+    store.snapshot().prepare()
+    player = Player(id=250_000, name="Inséré", position="D (C)", finishing=7, tackling=18)
+    db.session.add(player)
+    db.session.commit()
+    store.refresh_player(player)
+    assert_derived_match_rebuild(store.snapshot())
+
+    db.session.delete(db.session.get(Player, 2))
+    db.session.commit()
+    store.remove_player(2)
+    assert_derived_match_rebuild(store.snapshot())
+
+
+def test_refresh_without_snapshot_is_noop(db):
+    store.refresh_player(db.session.get(Player, 1))
+    assert store._snapshot is None
+
+
+def test_top_players_match_sql_order(client, db):
+    """Classement en mémoire identique à ORDER BY attribut DESC, id (notes absentes exclues)"""
+    expected = db.session.execute(
+        db.select(Player.id, Player.finishing).where(Player.finishing > 0, Player.nationality == "FRA")
+        .order_by(Player.finishing.desc(), Player.id).limit(25)
+    ).all()
+    assert len(expected) > 5
+    response = client.get("/api/stats/top-players", query_string={"attribute": "finishing", "limit": 25,
+                                                                   "nationality": "FRA"})
+    assert [(row["id"], row["value"]) for row in response.get_json()] == [tuple(row) for row in expected]
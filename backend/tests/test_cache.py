@@ -0,0 +1,119 @@
+# tests/test_cache.py - Cache de réponses : générations, anti-stampede, bornes du disque
+import os
+import threading
+import time
+
+import pytest
+
+from cache import DiskBackend, MemoryBackend, ResponseCache
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    if request.param == "disk":
+        return DiskBackend(str(tmp_path / "cache"))
+    return MemoryBackend()
+
+
+def test_invalidate_starts_new_generation(backend):
+    cache = ResponseCache(backend)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert cache.get_or_set("stats", compute) == {"value": 1}
+    assert cache.get_or_set("stats", compute) == {"value": 1}
+    cache.invalidate()
+    assert cache.get_or_set("stats", compute) == {"value": 2}
+    assert len(calls) == 2
+
+
+def test_value_computed_before_invalidation_is_not_stored(backend):
+    """Une écriture pendant le calcul : la valeur (peut-être périmée) est servie mais pas gardée"""
+    cache = ResponseCache(backend)
+    generation = backend.generation()
+
+    def compute_during_write():
+        cache.invalidate()
+        return "ancienne"
+
+    assert cache.get_or_set("stats", compute_during_write) == "ancienne"
+    assert backend.get(f"{generation}:stats") is None
+    assert cache.get_or_set("stats", lambda: "nouvelle") == "nouvelle"
+
+
+def test_none_is_not_cached(backend):
+    cache = ResponseCache(backend)
+    assert cache.get_or_set("erreur", lambda: None) is None
+    assert cache.get_or_set("erreur", lambda: "ok") == "ok"
+
+
+def test_expired_entry_is_recomputed(backend):
+    cache = ResponseCache(backend)
+    cache.get_or_set("court", lambda: "a", ttl=1)
+    backend.set(f"{backend.generation()}:court", "a", -1)
+    assert cache.get_or_set("court", lambda: "b") == "b"
+
+
+def test_invalidate_local_only_clears_private_backend(tmp_path):
+    memory = ResponseCache(MemoryBackend())
+    disk = ResponseCache(DiskBackend(str(tmp_path / "cache")))
+    for cache in (memory, disk):
+        cache.get_or_set("stats", lambda: "avant")
+        cache.invalidate_local()
+    assert memory.get_or_set("stats", lambda: "après") == "après"
+    # Disque partagé : le worker qui a écrit a déjà changé la génération pour tous
+    assert disk.get_or_set("stats", lambda: "après") == "avant"
+
+
+def test_concurrent_misses_compute_once(backend):
+    cache = ResponseCache(backend)
+    calls = []
+    start = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "valeur"
+
+    def worker():
+        start.wait()
+        assert cache.get_or_set("lent", compute) == "valeur"
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_disk_backend_evicts_least_recently_read(tmp_path):
+    backend = DiskBackend(str(tmp_path / "cache"), max_entries=3)
+    for key in ("a", "b", "c"):
+        backend.set(key, key, None)
+        time.sleep(0.01)
+    assert backend.get("a") == "a"
+    time.sleep(0.01)
+    backend.set("d", "d", None)
+    assert [backend.get(key) for key in ("a", "b", "c", "d")] == ["a", None, "c", "d"]
+
+
+def test_disk_backend_bounds_bytes(tmp_path):
+    directory = tmp_path / "cache"
+    backend = DiskBackend(str(directory), max_bytes=4096)
+    backend.set("trop-gros", "x" * 8192, None)
+    assert backend.get("trop-gros") is None
+    for i in range(10):
+        backend.set(str(i), "x" * 1000, None)
+    assert sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".pkl")) <= 4096
+    assert backend.get("9") is not None
+
+
+def test_disk_generation_is_shared(tmp_path):
+    first = DiskBackend(str(tmp_path / "cache"))
+    second = DiskBackend(str(tmp_path / "cache"))
+    first.bump_generation()
+    assert second.generation() == first.generation() == 1
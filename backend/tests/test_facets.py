@@ -0,0 +1,35 @@
+# tests/test_facets.py - Comptes disjonctifs de /api/facets
+from attribute_store import store
+from models import Player
+
+
+def sql_counts(db, column, *conditions):
+    rows = db.session.execute(
+        db.select(column, db.func.count()).where(column.isnot(None), *conditions).group_by(column)
+    ).all()
+    return dict(rows)
+
+
+def facet_dict(facets, name):
+    return {entry["value"]: entry["count"] for entry in facets[name]}
+
+
+def test_facet_counts_ignore_their_own_filter(db):
+    """Chaque facette est comptée sous les autres filtres seulement (comptes disjonctifs)"""
+    nationality = db.session.execute(
+        db.select(Player.nationality).group_by(Player.nationality).order_by(db.func.count().desc())
+    ).scalars().first()
+    total, facets = store.snapshot().facet_counts(nationality=nationality, preferred_foot="Left")
+
+    both = (Player.nationality == nationality, Player.preferred_foot == "Left")
+    assert total == db.session.query(Player.id).filter(*both).count()
+    assert facet_dict(facets, "nationality") == sql_counts(db, Player.nationality, Player.preferred_foot == "Left")
+    assert facet_dict(facets, "preferred_foot") == sql_counts(db, Player.preferred_foot,
+                                                              Player.nationality == nationality)
+    assert facet_dict(facets, "club") == sql_counts(db, Player.club, *both)
+
+
+def test_facet_counts_without_filters(db):
+    total, facets = store.snapshot().facet_counts()
+    assert total == db.session.query(Player.id).count()
+    assert facet_dict(facets, "preferred_foot") == sql_counts(db, Player.preferred_foot)
@@ -0,0 +1,49 @@
+# tests/test_generate_players.py - Fichiers générés lus par les deux chemins d'import
+import pandas as pd
+import pytest
+
+from app import IMPORT_REQUIRED_COLUMNS, read_import_file
+from generate_players import write_players
+from import_data import clean_chunk, csv_dtypes
+from ingest import COLUMN_MAPPING, bulk_upsert_players
+from models import Player
+
+ROWS = 120
+
+
+def generated(tmp_path, headers, seed=7):
+    path = str(tmp_path / f"{headers}-{seed}.csv")
+    write_players(path, ROWS, seed=seed, headers=headers, chunk_size=50, first_uid=10_000)
+    return path
+
+
+def test_same_seed_gives_identical_file(tmp_path):
+    first, second = tmp_path / "first.csv", tmp_path / "second.csv"
+    for path in (first, second):
+        write_players(str(path), ROWS, seed=7, chunk_size=50)
+    assert first.read_bytes() == second.read_bytes()
+
+
+@pytest.mark.parametrize("headers", ["fm", "model"])
+def test_admin_import_reads_generated_file(db, tmp_path, headers):
+    with open(generated(tmp_path, headers), "rb") as f:
+        df = read_import_file(f.read(), "players.csv")
+    assert IMPORT_REQUIRED_COLUMNS <= set(df.columns)
+
+    count = db.session.query(Player.id).count()
+    report = bulk_upsert_players(df)
+    assert (report["rejected"], report["inserted"]) == (0, ROWS)
+    assert db.session.query(Player.id).count() == count + ROWS
+    assert db.session.get(Player, 10_000).nationality is not None
+
+
+def test_import_data_reads_fm_headers(tmp_path):
+    path = generated(tmp_path, "fm")
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in header if col in COLUMN_MAPPING]
+    assert len(usecols) == len(header)
+    dtypes = {col: dtype for col, dtype in csv_dtypes().items() if col in usecols}
+    chunk = clean_chunk(pd.read_csv(path, usecols=usecols, dtype=dtypes))
+    assert len(chunk) == ROWS
+    assert chunk["uid"].tolist() == list(range(10_000, 10_000 + ROWS))
+    assert chunk["nat"].notna().all()
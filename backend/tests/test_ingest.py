@@ -0,0 +1,89 @@
+# tests/test_ingest.py - Import par lots INSERT ... ON CONFLICT
+import pandas as pd
+
+from ingest import bulk_upsert_players, compute_category_averages
+from models import AVERAGE_GROUPS, Player, PlayerPosition
+from positions import parse_positions
+
+
+def test_upsert_keeps_stored_values_for_missing_columns(db):
+    """Une cellule vide (NULL) ne remplace pas la valeur en base : coalesce(excluded, actuelle)"""
+    before = db.session.get(Player, 5)
+    club, nationality, dribbling = before.club, before.nationality, before.dribbling
+    db.session.expire_all()
+
+    report = bulk_upsert_players(pd.DataFrame({
+        "id": [5], "name": [before.name], "finishing": [20], "club": [None], "dribbling": [None],
+        "transfer_value": ["€1.5M - €2M"]
+    }))
+
+    db.session.expire_all()
+    after = db.session.get(Player, 5)
+    assert (report["inserted"], report["updated"]) == (0, 1)
+    assert after.finishing == 20
+    assert (after.club, after.nationality, after.dribbling) == (club, nationality, dribbling)
+    assert (after.value_min, after.value_max) == (1_500_000, 2_000_000)
+
+
+def test_upsert_recomputes_averages_from_merged_row(db):
+    """Les moyennes mêlent les notes du fichier et celles déjà en base"""
+    attributes = sorted({name for names in AVERAGE_GROUPS.values() for name in names})
+    stored = {a: getattr(db.session.get(Player, 7), a) for a in attributes}
+    db.session.expire_all()
+
+    bulk_upsert_players(pd.DataFrame({"id": [7], "name": ["Renommé"], "passing": [1], "technique": [1]}))
+
+    merged = pd.DataFrame([{**stored, "passing": 1, "technique": 1}], dtype="float64")
+    expected = compute_category_averages(merged).iloc[0]
+    db.session.expire_all()
+    player = db.session.get(Player, 7)
+    assert player.name == "Renommé"
+    for group in AVERAGE_GROUPS:
+        assert getattr(player, f"avg_{group}") == expected[f"avg_{group}"]
+
+
+def test_upsert_inserts_new_rows_after_max_id(db):
+    last_id = db.session.execute(db.select(db.func.max(Player.id))).scalar()
+    report = bulk_upsert_players(pd.DataFrame({
+        "name": ["Nouveau Joueur", "Autre Joueur", "Nouveau Joueur"],
+        "position": ["ST (C)", "GK", None],
+        "finishing": [12, None, 14]
+    }))
+
+    assert report["merged_duplicates"] == 1
+    assert (report["inserted"], report["updated"]) == (2, 0)
+    assert sorted(report["ids"]) == [last_id + 1, last_id + 2]
+    player = db.session.execute(db.select(Player).where(Player.name == "Nouveau Joueur")).scalar_one()
+    # Doublon du fichier : les valeurs non vides de la dernière ligne l'emportent
+    assert (player.finishing, player.position) == (14, "ST (C)")
+    positions = db.session.execute(
+        db.select(PlayerPosition.position).where(PlayerPosition.player_id == player.id)
+    ).scalars().all()
+    assert positions == parse_positions("ST (C)")
+
+
+def test_upsert_matches_existing_player_by_name(db):
+    player = db.session.get(Player, 11)
+    report = bulk_upsert_players(pd.DataFrame({"name": [player.name], "heading": [19]}))
+    assert report["ids"] == [11]
+    assert report["updated"] == 1
+
+
+def test_upsert_rejects_invalid_rows(db):
+    count = db.session.query(Player.id).count()
+    report = bulk_upsert_players(pd.DataFrame({"name": ["Hors échelle", ""], "pace": [25, 10]}))
+    assert report["rejected"] == 2
+    assert db.session.query(Player.id).count() == count
+
+
+def test_new_rows_skip_explicit_new_ids_of_the_same_file(db):
+    """Un id explicite encore absent de la base n'est pas réattribué à une ligne sans id"""
+    last_id = db.session.execute(db.select(db.func.max(Player.id))).scalar()
+    report = bulk_upsert_players(pd.DataFrame({
+        "id": [last_id + 1, None], "name": ["Avec Id", "Sans Id"], "finishing": [10, 11]
+    }))
+
+    assert report["inserted"] == 2
+    assert sorted(report["ids"]) == [last_id + 1, last_id + 2]
+    names = db.session.execute(db.select(Player.name).where(Player.id > last_id).order_by(Player.id)).scalars().all()
+    assert names == ["Avec Id", "Sans Id"]
@@ -0,0 +1,120 @@
+# tests/test_jobs.py - Réclamation, reprise et nouvelles tentatives des imports en tâche de fond
+from datetime import datetime, timedelta
+
+import pytest
+
+from jobs import JobRunner
+from models import ImportJob
+
+
+@pytest.fixture
+def runner(app, db, monkeypatch):
+    """Exécution synchrone : submit et les nouvelles tentatives sont seulement enregistrés"""
+    runner = JobRunner(app, handler=None, max_attempts=3, permanent_errors=(ValueError,))
+    runner.submitted, runner.retries = [], []
+    monkeypatch.setattr(runner, "submit", runner.submitted.append)
+    monkeypatch.setattr(runner, "_retry_later", lambda job_id, attempts: runner.retries.append((job_id, attempts)))
+    return runner
+
+
+def add_job(db, **fields):
+    job = ImportJob(filename="players.csv", file_data=b"name\nTest\n", **fields)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def load(db, job_id):
+    db.session.expire_all()
+    return db.session.get(ImportJob, job_id)
+
+
+def test_claim_is_exclusive(runner, db):
+    job_id = add_job(db)
+    assert runner._claim(job_id)
+    assert not runner._claim(job_id)
+    job = load(db, job_id)
+    assert (job.status, job.attempts) == ("running", 1)
+
+
+def test_resume_requeues_stale_jobs_only(runner, db):
+    now = datetime.utcnow()
+    queued = add_job(db)
+    stale = add_job(db, status="running", heartbeat_at=now - timedelta(seconds=runner.stale_after + 60))
+    alive = add_job(db, status="running", heartbeat_at=now)
+    done = add_job(db, status="done")
+
+    assert runner.resume() == [queued, stale]
+    assert runner.submitted == [queued, stale]
+    assert load(db, stale).phase == "requeued"
+    assert (load(db, alive).status, load(db, done).status) == ("running", "done")
+
+
+def test_failed_attempt_is_retried_with_file_kept(runner, db):
+    job_id = add_job(db)
+    seen = []
+
+    def handler(job, progress):
+        seen.append(job.file_data)
+        if len(seen) == 1:
+            raise RuntimeError("base verrouillée")
+
+    runner.handler = handler
+    runner._run(job_id)
+    job = load(db, job_id)
+    assert (job.status, job.phase, job.attempts) == ("queued", "retrying", 1)
+    assert job.file_data == b"name\nTest\n"
+    assert runner.retries == [(job_id, 1)]
+
+    runner._run(job_id)
+    job = load(db, job_id)
+    assert (job.status, job.attempts) == ("done", 2)
+    assert seen == [b"name\nTest\n"] * 2
+    assert job.file_data is None and job.finished_at is not None
+
+
+def test_permanent_error_fails_immediately(runner, db):
+    job_id = add_job(db)
+
+    def handler(job, progress):
+        raise ValueError("Colonne name absente")
+
+    runner.handler = handler
+    runner._run(job_id)
+    job = load(db, job_id)
+    assert (job.status, job.message) == ("failed", "Colonne name absente")
+    assert job.file_data is None
+    assert runner.retries == []
+
+
+def test_gives_up_after_max_attempts(runner, db):
+    job_id = add_job(db)
+
+    def handler(job, progress):
+        raise RuntimeError("toujours en échec")
+
+    runner.handler = handler
+    for _ in range(runner.max_attempts):
+        runner._run(job_id)
+    job = load(db, job_id)
+    assert (job.status, job.attempts) == ("failed", runner.max_attempts)
+    assert len(runner.retries) == runner.max_attempts - 1
+
+
+def test_cancelled_job_keeps_no_file(runner, db):
+    job_id = add_job(db)
+
+    def handler(job, progress):
+        job.cancel_requested = True
+        db.session.commit()
+        progress.check_cancelled()
+
+    runner.handler = handler
+    runner._run(job_id)
+    job = load(db, job_id)
+    assert job.status == "cancelled"
+    assert job.file_data is None
+
+    queued = add_job(db)
+    runner.cancel(load(db, queued))
+    assert (load(db, queued).status, load(db, queued).file_data) == ("cancelled", None)
@@ -0,0 +1,64 @@
+# tests/test_pagination.py - Pagination par curseur de /api/players
+import pytest
+
+from models import Player
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_order
+
+
+def walk(client, **params):
+    """Ids de toutes les pages en suivant next_cursor"""
+    ids, cursor = [], ""
+    while True:
+        response = client.get("/api/players", query_string={**params, "cursor": cursor})
+        assert response.status_code == 200
+        data = response.get_json()
+        ids += [p["id"] for p in data["players"]]
+        if not data["pagination"]["has_more"]:
+            assert data["pagination"]["next_cursor"] is None
+            return ids
+        cursor = data["pagination"]["next_cursor"]
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("sort_by", ["club", "age", "name"])
+def test_cursor_walk_matches_full_order(client, db, sort_by, order):
+    """Les pages enchaînées redonnent l'ordre SQL complet, NULL compris, sans doublon ni trou"""
+    column = Player.sortable_column(sort_by)
+    expected = db.session.execute(
+        db.select(Player.id).order_by(*keyset_order(column, Player.id, order == "desc"))
+    ).scalars().all()
+    ids = walk(client, sort_by=sort_by, order=order, per_page=7)
+    assert ids == expected
+
+
+def test_null_block_spans_pages(client, db):
+    """Joueurs sans club (NULL) répartis sur plusieurs pages dans les deux sens"""
+    nulls = db.session.execute(db.select(Player.id).where(Player.club.is_(None))).scalars().all()
+    assert len(nulls) > 3
+    ascending = walk(client, sort_by="club", order="asc", per_page=3)
+    descending = walk(client, sort_by="club", order="desc", per_page=3)
+    # SQLite : NULL en tête du tri croissant, en fin du tri décroissant
+    assert ascending[:len(nulls)] == sorted(nulls)
+    assert descending[-len(nulls):] == sorted(nulls, reverse=True)
+
+
+def test_cursor_per_page_is_clamped(client, db):
+    data = client.get("/api/players", query_string={"cursor": "", "per_page": 0}).get_json()
+    assert data["pagination"]["per_page"] == 1
+    assert len(data["players"]) == 1
+
+
+def test_cursor_round_trip_and_errors():
+    token = encode_cursor("club", "asc", None, 42)
+    assert decode_cursor(token, "club", "asc") == (None, 42)
+    assert decode_cursor("", "club", "asc") is None
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, "club", "desc")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("pas-un-curseur", "club", "asc")
+
+
+def test_cursor_for_other_sort_is_rejected(client, db):
+    token = encode_cursor("age", "asc", 20, 1)
+    response = client.get("/api/players", query_string={"cursor": token, "sort_by": "club"})
+    assert response.status_code == 400
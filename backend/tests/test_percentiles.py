@@ -0,0 +1,25 @@
+# tests/test_percentiles.py - Rangs centiles par groupe de poste (/api/compare)
+import pytest
+
+from attribute_store import store
+from positions import POSITION_GROUPS
+
+
+@pytest.mark.parametrize("attribute", ["finishing", "positioning", "reflexes"])
+def test_percentiles_match_brute_force(db, attribute):
+    """Rang centile parmi les joueurs notés (ex-aequo pour moitié), tous postes puis par groupe"""
+    snapshot = store.snapshot()
+    column = snapshot.column(attribute).astype(int)
+    for group in (None, *range(len(POSITION_GROUPS))):
+        peers = column[column > 0] if group is None else column[(column > 0) & (snapshot.position_groups == group)]
+        for value in (1, 8, 15, 20):
+            result = snapshot.percentiles({attribute: value}, group)[attribute]
+            if len(peers) == 0:
+                assert result is None
+                continue
+            expected = round(100.0 * ((peers < value).sum() + (peers == value).sum() / 2) / len(peers), 1)
+            assert result == expected
+
+
+def test_percentiles_of_missing_rating(db):
+    assert store.snapshot().percentiles({"finishing": None, "passing": 0}) == {"finishing": None, "passing": None}
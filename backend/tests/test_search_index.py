@@ -0,0 +1,79 @@
+# tests/test_search_index.py - Index trigrammes de /api/search
+import pytest
+
+from models import Player
+from search_index import fold, index
+
+
+@pytest.fixture
+def players(db):
+    """Joueurs dont le nom, le club ou la nationalité contiennent « zorvak » (absent des données générées)"""
+    rows = {
+        "prefix": Player(id=900_001, name="Zörvak Dührkoop", club="Alpha", nationality="GER"),
+        "word": Player(id=900_002, name="Jan Zorvakson", club="Beta", nationality="NED"),
+        "contains": Player(id=900_003, name="Ozorvakian Lee", club="Gamma", nationality="ENG"),
+        "club": Player(id=900_004, name="Ab Cd", club="FC Zorvak", nationality="FRA"),
+        "nationality": Player(id=900_005, name="Ef Gh", club="Delta", nationality="Zorvakia"),
+        "nordic": Player(id=900_006, name="Bjørn Łukasz Ðuric", club="Epsilon", nationality="NOR"),
+    }
+    db.session.add_all(rows.values())
+    db.session.commit()
+    return {key: player.id for key, player in rows.items()}
+
+
+def test_fold():
+    assert fold("Müller") == "muller"
+    assert fold("BJØRN Łukasz Ðuric") == "bjorn lukasz duric"
+    assert fold(None) == ""
+
+
+@pytest.mark.parametrize("query", ["Duhrkoop", "dührkoop", "DÜHRKOOP", "zorvak duh"])
+def test_accents_and_case_are_ignored(players, query):
+    assert index.search(query) == [players["prefix"]]
+
+
+def test_letters_without_decomposition(players):
+    assert index.search("bjorn lukasz duric") == [players["nordic"]]
+    assert index.search("Bjørn") == [players["nordic"]]
+
+
+def test_ranking_order(players):
+    """Nom commençant par la requête, mot commençant par la requête, nom contenant, club, nationalité"""
+    assert index.search("zorvak") == [players[key] for key in
+                                      ("prefix", "word", "contains", "club", "nationality")]
+    assert index.search("zorvak", limit=2) == [players["prefix"], players["word"]]
+
+
+def test_upsert_and_remove_use_delta_and_tombstones(players, db):
+    index.ensure_loaded()
+    renamed = db.session.get(Player, players["prefix"])
+    renamed.name = "Renamed Person"
+    db.session.commit()
+    index.upsert(renamed)
+    added = Player(id=900_010, name="Zorvak Zz", club="Omega", nationality="ITA")
+    db.session.add(added)
+    db.session.commit()
+    index.upsert(added)
+    index.remove(players["word"])
+
+    assert index._base is not None
+    assert index.search("renamed") == [players["prefix"]]
+    expected = [added.id, players["contains"], players["club"], players["nationality"]]
+    assert index.search("zorvak") == expected
+
+    # Retrait d'un joueur ajouté par le delta
+    index.remove(added.id)
+    assert added.id not in index.search("zorvak")
+
+    # Même résultat qu'après une reconstruction complète
+    db.session.delete(db.session.get(Player, players["word"]))
+    db.session.delete(added)
+    db.session.commit()
+    incremental = index.search("zorvak")
+    index.invalidate()
+    assert index.search("zorvak") == incremental
+
+
+def test_search_endpoint_keeps_index_order(client, players):
+    response = client.get("/api/search", query_string={"q": "Zorvak", "limit": 3})
+    assert [p["id"] for p in response.get_json()] == [players["prefix"], players["word"], players["contains"]]
@@ -0,0 +1,15 @@
+# tests/test_startup.py - Budget de démarrage à froid (cf. check_startup.py)
+from check_startup import BUDGET_MS, LAZY_MODULES, RUNS, measure
+
+
+def test_cold_start_within_budget():
+    """Meilleur de RUNS démarrages dans un processus neuf, arrêté dès qu'un essai tient le budget"""
+    runs = []
+    for _ in range(RUNS):
+        runs.append(measure())
+        assert runs[-1]["loaded"] == [], f"modules chargés au démarrage : {runs[-1]['loaded']}"
+        if runs[-1]["total_ms"] <= BUDGET_MS:
+            break
+    best = min(run["total_ms"] for run in runs)
+    assert best <= BUDGET_MS, f"{best:.0f} ms > budget de {BUDGET_MS:.0f} ms ({runs[-1]['slowest'][:3]})"
+
@@ -0,0 +1,62 @@
+# tests/test_units.py - Conversion des champs texte FM en valeurs numériques
+import pytest
+
+from units import parse_count, parse_height, parse_value_range, parse_weight
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("€10M - €15M", (10_000_000, 15_000_000)),
+    ("€1,500,000", (1_500_000, 1_500_000)),
+    ("€1.500.000", (1_500_000, 1_500_000)),
+    ("€1 500 000", (1_500_000, 1_500_000)),
+    ("€1.125M", (1_125_000, 1_125_000)),
+    ("€1,5M - €2,25M", (1_500_000, 2_250_000)),
+    ("€2,5K - €1.250.000", (2_500, 1_250_000)),
+    ("£500K", (575_000, 575_000)),
+    ("$2.5M", (2_300_000, 2_300_000)),
+    ("€0", (0, 0)),
+    ("Not for Sale", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_value_range(text, expected):
+    assert parse_value_range(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("185 cm", 185),
+    ("6'1\"", 185),
+    ("6'", 183),
+    ("185", 185),
+    ("grand", None),
+    (None, None),
+])
+def test_parse_height(text, expected):
+    assert parse_height(text) == (expected,)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("78 kg", 78),
+    ("172 lbs", 78),
+    ("1 lb", 0),
+    ("78", 78),
+    ("78.6", 79),
+    ("lourd", None),
+    ("", None),
+])
+def test_parse_weight(text, expected):
+    assert parse_weight(text) == (expected,)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("120 (15)", 135),
+    ("120", 120),
+    ("30.0", 30),
+    ("1,024 (3)", 1027),
+    (0, 0),
+    ("-", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_count(text, expected):
+    assert parse_count(text) == (expected,)
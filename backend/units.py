@@ -0,0 +1,99 @@
+# units.py - Conversion des champs texte FM en valeurs numériques
+"""
+Le CSV FM2023 garde unités et fourchettes dans le texte : "185 cm", "78 kg",
+"€10M - €15M", "120 (15)". Chaque fonction renvoie un tuple (une valeur par
+colonne dérivée, None si le texte est absent ou illisible).
+"""
+import re
+
+# Taux fixes indicatifs pour ramener les valeurs en euros
+EUR_RATES = {"€": 1.0, "£": 1.15, "$": 0.92}
+MULTIPLIERS = {"": 1, "K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+# Séparateurs de milliers : virgule, point, espaces fines ou insécables ("€1,500,000", "1 500 000")
+_SEPARATORS = "[,.\u2009\u202f\u00a0]"
+_NUMBER = r"(\d{1,3}(?:" + _SEPARATORS + r"\d{3})+(?!\d)(?:[.,]\d+)?|\d+(?:[.,]\d+)?)"
+# Séparateur suivi d'exactement 3 chiffres : groupe de milliers, pas décimale
+_GROUPING = re.compile(_SEPARATORS + r"(?=\d{3}(?!\d))")
+_CM = re.compile(_NUMBER + r"\s*cm", re.I)
+_FEET = re.compile(r"(\d+)\s*'\s*(\d+)?")
+_KG = re.compile(_NUMBER + r"\s*kg", re.I)
+_LBS = re.compile(_NUMBER + r"\s*lbs?", re.I)
+_PLAIN = re.compile(r"^\s*" + _NUMBER + r"\s*$")
+_AMOUNT = re.compile(r"([€£$])\s*" + _NUMBER + r"\s*([KMB]?)", re.I)
+_APPS = re.compile(r"^\s*" + _NUMBER + r"\s*(?:\((\d+)\))?")
+
+
+def _float(text, grouping=True):
+    """"1,500,000" -> 1500000.0, "1.500,5" -> 1500.5, "1,5" -> 1.5 (grouping=False : "1.125" -> 1.125)"""
+    if grouping:
+        text = _GROUPING.sub("", text)
+    return float(text.replace(",", "."))
+
+
+def parse_height(text):
+    """Taille en cm ("185 cm", "6'1\\"", "185")"""
+    if not text:
+        return (None,)
+    text = str(text)
+    if match := _CM.search(text):
+        return (round(_float(match.group(1))),)
+    if match := _FEET.search(text):
+        return (round(int(match.group(1)) * 30.48 + int(match.group(2) or 0) * 2.54),)
+    if match := _PLAIN.match(text):
+        return (round(_float(match.group(1))),)
+    return (None,)
+
+
+def parse_weight(text):
+    """Poids en kg ("78 kg", "172 lbs", "78")"""
+    if not text:
+        return (None,)
+    text = str(text)
+    if match := _KG.search(text):
+        return (round(_float(match.group(1))),)
+    if match := _LBS.search(text):
+        return (round(_float(match.group(1)) * 0.45359237),)
+    if match := _PLAIN.match(text):
+        return (round(_float(match.group(1))),)
+    return (None,)
+
+
+def parse_value_range(text):
+    """Fourchette de valeur en euros ("€10M - €15M" -> (10000000, 15000000), "Not for Sale" -> None)"""
+    if not text:
+        return (None, None)
+    # Avec un suffixe K/M/B, un seul séparateur est une décimale ("€1.125M") ; sinon un groupe de milliers
+    amounts = [
+        round(_float(number, grouping=not suffix or number.count(",") + number.count(".") > 1)
+              * MULTIPLIERS[suffix.upper()] * EUR_RATES[currency])
+        for currency, number, suffix in _AMOUNT.findall(str(text))
+    ]
+    if not amounts:
+        return (None, None)
+    return (min(amounts), max(amounts))
+
+
+def parse_count(text):
+    """Matchs ou buts : "120 (15)" = 120 titularisations + 15 entrées -> 135 ; "30.0" -> 30"""
+    if text is None or text == "":
+        return (None,)
+    match = _APPS.match(str(text))
+    if not match:
+        return (None,)
+    return (round(_float(match.group(1))) + int(match.group(2) or 0),)
+
+
+# Champ texte -> (colonnes numériques dérivées, conversion)
+SHADOW_FIELDS = {
+    "height": (("height_cm",), parse_height),
+    "weight": (("weight_kg",), parse_weight),
+    "transfer_value": (("value_min", "value_max"), parse_value_range),
+    "career_apps": (("career_apps_count",), parse_count),
+    "career_goals": (("career_goals_count",), parse_count),
+    "league_apps": (("league_apps_count",), parse_count),
+    "league_goals": (("league_goals_count",), parse_count),
+    "youth_apps": (("youth_apps_count",), parse_count),
+    "youth_goals": (("youth_goals_count",), parse_count)
+}
+SHADOW_COLUMNS = [column for columns, _ in SHADOW_FIELDS.values() for column in columns]
@@ -1,6 +1,6 @@
 // frontend/src/components/ExportButton.jsx
 import React, { useState } from 'react';
-import { getPlayers } from '../services/api';
+import { exportPlayers } from '../services/api';
 
 export default function ExportButton({ 
   filters = {}, 
@@ -63,38 +63,18 @@ export default function ExportButton({
     ],
   };
 
-  const downloadFile = (blob, filename) => {
-    const url = URL.createObjectURL(blob);
-    const link = document.createElement('a');
-    link.href = url;
-    link.download = filename;
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
-    URL.revokeObjectURL(url);
-  };
-
   const handleExport = async (format) => {
     setLoading(true);
     try {
-      // Récupérer les données filtrées
-      const params = { ...filters, per_page: 1000, page: 1 };
-      Object.keys(params).forEach(key => {
-        if (params[key] === "" || params[key] === null) {
-          delete params[key];
+      // Filtres actifs (les valeurs vides sont ignorées)
+      const activeFilters = { ...filters };
+      Object.keys(activeFilters).forEach(key => {
+        if (activeFilters[key] === "" || activeFilters[key] === null) {
+          delete activeFilters[key];
         }
       });
-      
-      const data = await getPlayers(params);
-      const players = data.players || [];
-      
-      if (players.length === 0) {
-        alert('Aucune donnée à exporter');
-        setLoading(false);
-        return;
-      }
 
-      // Préparer les en-têtes
+      // Libellés des en-têtes
       const columnLabels = {};
       Object.values(availableColumns).forEach(category => {
         category.forEach(col => {
@@ -102,40 +82,13 @@ export default function ExportButton({
         });
       });
 
-      const headers = selectedColumns.map(key => columnLabels[key] || key);
-      
-      // Préparer les données
-      const rows = players.map(player => 
-        selectedColumns.map(col => {
-          const value = player[col];
-          return value !== null && value !== undefined ? String(value) : '';
-        })
-      );
-
-      if (format === 'csv') {
-        // Export CSV
-        const csvContent = [
-          headers.join(','),
-          ...rows.map(row => row.map(cell => `"${cell.replace(/"/g, '""')}"`).join(','))
-        ].join('\n');
-        
-        const blob = new Blob(['\uFEFF' + csvContent], { 
-          type: 'text/csv;charset=utf-8;' 
-        });
-        downloadFile(blob, 'sokrstat_export.csv');
-        
-      } else if (format === 'excel') {
-        // Export Excel (format TSV pour compatibilité)
-        const excelContent = [
-          headers.join('\t'),
-          ...rows.map(row => row.join('\t'))
-        ].join('\n');
-        
-        const blob = new Blob(['\uFEFF' + excelContent], { 
-          type: 'application/vnd.ms-excel;charset=utf-8;' 
-        });
-        downloadFile(blob, 'sokrstat_export.xls');
-      }
+      // Export généré et envoyé en flux par le serveur
+      await exportPlayers({
+        format,
+        columns: selectedColumns,
+        labels: columnLabels,
+        filters: activeFilters
+      });
       
       // Fermer le menu après succès
       setTimeout(() => {
@@ -191,13 +191,21 @@ export default function Admin() {
       
       const data = await response.json();
       
-      if (response.ok) {
-        setMessage(`${data.message}`);
-        setImportFile(null);
-        // Reset input file
-        document.getElementById('file-upload').value = '';
-      } else {
+      if (!response.ok) {
         setError(`❌ ${data.error}`);
+        return;
+      }
+
+      setImportFile(null);
+      // Reset input file
+      document.getElementById('file-upload').value = '';
+
+      // L'import tourne en tâche de fond : on suit sa progression
+      const job = await waitForJob(data.job_id, token);
+      if (job.status === 'done') {
+        setMessage(`${job.message}`);
+      } else {
+        setError(`❌ ${job.message || 'Import interrompu'}`);
       }
     } catch (err) {
       setError(`❌ Erreur : ${err.message}`);
@@ -206,6 +214,23 @@ export default function Admin() {
     }
   };
 
+  // Interroge /admin/jobs/<id> jusqu'à la fin de la tâche
+  const waitForJob = async (jobId, token) => {
+    while (true) {
+      const response = await fetch(`${API_URL}/admin/jobs/${jobId}`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      const job = await response.json();
+      if (!response.ok) throw new Error(job.error);
+
+      if (['done', 'failed', 'cancelled'].includes(job.status)) return job;
+
+      const progress = job.rows_total ? ` : ${job.rows_processed}/${job.rows_total} lignes` : '';
+      setMessage(`⏳ Import en cours (${job.phase})${progress}`);
+      await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+  };
+
   return (
     <div className="min-h-screen bg-gray-50 p-4 md:p-6">
       <div className="max-w-4xl mx-auto">
@@ -288,6 +288,8 @@ export default function ComparePage() {
             val = p[m.key] || 0;
         } else {
             val = p[category] ? p[category][m.key] : 0;
+            // Centile parmi les joueurs du même groupe de poste (affiché dans l'infobulle)
+            point[`centile:${p.name}`] = p.percentiles?.attributes?.[m.key];
         }
         point[p.name] = val;
       });
@@ -532,6 +534,10 @@ function RadarCard({ title, data, players, colors }) {
             
             <Legend iconType="circle" wrapperStyle={{ paddingTop: '10px', fontSize: '12px' }}/>
             <Tooltip 
+                formatter={(value, name, item) => {
+                  const pct = item.payload[`centile:${name}`];
+                  return pct != null ? [`${value} (${Math.round(pct)}e centile au poste)`, name] : [value, name];
+                }}
                 contentStyle={{ borderRadius: '8px', border: 'none', boxShadow: '0 4px 6px -1px rgba(0, 0, 0, 0.1)' }}
                 itemStyle={{ fontSize: '12px' }}
             />
@@ -11,10 +11,22 @@ import {
   ResponsiveContainer,
   Cell,
 } from "recharts";
-import { getStatsOverview, getTopPlayers, getNationalities, getPositions } from "../services/api";
+import { getStatsOverview, getTopPlayers, getNationalities, getPositions, getDistribution } from "../services/api";
 
 import FlagIcon from "../components/FlagIcon";
 
+// Attributs proposés pour le graphique de distribution
+const DISTRIBUTION_ATTRIBUTES = [
+  { key: "pace", label: "Vitesse" },
+  { key: "acceleration", label: "Accélération" },
+  { key: "finishing", label: "Finition" },
+  { key: "passing", label: "Passe" },
+  { key: "dribbling", label: "Dribble" },
+  { key: "tackling", label: "Tacle" },
+  { key: "vision", label: "Vision" },
+  { key: "stamina", label: "Endurance" },
+];
+
 // Animation d'apparition au scroll
 function Section({ children }) {
   const ref = useRef(null);
@@ -43,12 +55,20 @@ export default function Home() {
   const [topPlayers, setTopPlayers] = useState([]);
   const [nationalities, setNationalities] = useState([]);
   const [positions, setPositions] = useState([]);
+  const [distributionAttribute, setDistributionAttribute] = useState("pace");
+  const [distribution, setDistribution] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     loadData();
   }, []);
 
+  useEffect(() => {
+    getDistribution(distributionAttribute)
+      .then(setDistribution)
+      .catch(err => console.error("Erreur chargement distribution:", err));
+  }, [distributionAttribute]);
+
   const loadData = async () => {
     try {
       const [overview, players, nats, poss] = await Promise.all([
@@ -252,6 +272,38 @@ export default function Home() {
           </div>
 
         </div>
+
+        {/* Distribution d'un attribut (1-20) */}
+        {distribution && (
+          <div className="bg-white rounded-xl shadow-lg p-6 mt-8">
+            <div className="flex flex-wrap items-center justify-between gap-4 mb-4">
+              <h3 className="text-2xl font-bold text-gray-800">
+                Distribution des notes
+              </h3>
+              <select
+                value={distributionAttribute}
+                onChange={(e) => setDistributionAttribute(e.target.value)}
+                className="border border-gray-300 rounded-lg px-3 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
+              >
+                {DISTRIBUTION_ATTRIBUTES.map(({ key, label }) => (
+                  <option key={key} value={key}>{label}</option>
+                ))}
+              </select>
+            </div>
+            <p className="text-sm text-gray-600 mb-4">
+              Moyenne {distribution.mean ?? "-"} · Médiane {distribution.median ?? "-"} · Quartiles {distribution.q1 ?? "-"} – {distribution.q3 ?? "-"}
+            </p>
+            <ResponsiveContainer width="100%" height={300}>
+              <BarChart data={distribution.histogram}>
+                <CartesianGrid strokeDasharray="3 3" />
+                <XAxis dataKey="value" />
+                <YAxis />
+                <Tooltip />
+                <Bar dataKey="count" fill="#10b981" />
+              </BarChart>
+            </ResponsiveContainer>
+          </div>
+        )}
       </Section>
 
       {/* Fonctionnalités */}
@@ -1,10 +1,28 @@
 // Players.jsx - Page Liste des Joueurs FM2023
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import { getPlayers, searchPlayers, listNationalities, listPositions } from "../services/api";
+import { getPlayers, searchPlayers, getFacets } from "../services/api";
 import ExportButton from "../components/ExportButton";
 import FlagIcon from "../components/FlagIcon";
 
+// Tranches d'âge renvoyées par /api/facets -> bornes min_age / max_age
+const AGE_BANDS = {
+  "≤17": ["", "17"],
+  "18-21": ["18", "21"],
+  "22-25": ["22", "25"],
+  "26-29": ["26", "29"],
+  "30-33": ["30", "33"],
+  "34+": ["34", ""]
+};
+
+// Options d'une facette avec leurs comptes (la valeur choisie reste listée même à 0)
+const facetOptions = (values, selected) => {
+  if (selected && !values.some(v => v.value === selected)) {
+    return [{ value: selected, count: 0 }, ...values];
+  }
+  return values;
+};
+
 export default function Players() {
   const [players, setPlayers] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -22,35 +40,50 @@ export default function Players() {
     club: "",
     min_age: "",
     max_age: "",
+    preferred_foot: "",
     sort_by: "name",
     order: "asc"
   });
   
-  const [nationalities, setNationalities] = useState([]);
-  const [positions, setPositions] = useState([]);
+  const [facets, setFacets] = useState({
+    position: [],
+    nationality: [],
+    club: [],
+    preferred_foot: [],
+    age_band: []
+  });
   const [showFilters, setShowFilters] = useState(false);
 
   useEffect(() => {
-    loadFilterLists();
-  }, []);
+    loadFacets();
+  }, [filters.position, filters.nationality, filters.club, filters.preferred_foot, filters.min_age, filters.max_age]);
 
   useEffect(() => {
     loadPlayers();
   }, [currentPage, filters]);
 
-  const loadFilterLists = async () => {
+  // Comptes de chaque filtre sous les autres filtres déjà appliqués (une seule requête)
+  const loadFacets = async () => {
     try {
-      const [nats, poss] = await Promise.all([
-        listNationalities(),
-        listPositions()
-      ]);
-      setNationalities(nats);
-      setPositions(poss.slice(0, 20));
+      const { sort_by, order, ...params } = filters;
+      Object.keys(params).forEach(key => {
+        if (params[key] === "" || params[key] === null) {
+          delete params[key];
+        }
+      });
+      const data = await getFacets(params);
+      setFacets(data.facets);
     } catch (err) {
       console.error("Erreur chargement filtres:", err);
     }
   };
 
+  const selectAgeBand = (label) => {
+    const [min, max] = AGE_BANDS[label] || ["", ""];
+    setFilters(prev => ({ ...prev, min_age: min, max_age: max }));
+    setCurrentPage(1);
+  };
+
   const loadPlayers = async () => {
     setLoading(true);
     setError(null);
@@ -115,6 +148,7 @@ export default function Players() {
       club: "",
       min_age: "",
       max_age: "",
+      preferred_foot: "",
       sort_by: "name",
       order: "asc"
     });
@@ -204,8 +238,8 @@ export default function Players() {
                   className="w-full border border-gray-300 rounded-lg px-3 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
                 >
                   <option value="">Toutes les positions</option>
-                  {positions.slice(0, 15).map((pos) => (
-                    <option key={pos} value={pos}>{pos}</option>
+                  {facetOptions(facets.position, filters.position).map(({ value, count }) => (
+                    <option key={value} value={value}>{value} ({count.toLocaleString()})</option>
                   ))}
                 </select>
               </div>
@@ -218,8 +252,8 @@ export default function Players() {
                   className="w-full border border-gray-300 rounded-lg px-3 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
                 >
                   <option value="">Toutes</option>
-                  {nationalities.map((nat) => (
-                    <option key={nat} value={nat}>{nat}</option>
+                  {facetOptions(facets.nationality, filters.nationality).map(({ value, count }) => (
+                    <option key={value} value={value}>{value} ({count.toLocaleString()})</option>
                   ))}
                 </select>
               </div>
@@ -235,6 +269,20 @@ export default function Players() {
                 />
               </div>
 
+              <div>
+                <label className="block text-sm font-medium text-gray-700 mb-1">Pied fort</label>
+                <select
+                  value={filters.preferred_foot}
+                  onChange={(e) => handleFilterChange("preferred_foot", e.target.value)}
+                  className="w-full border border-gray-300 rounded-lg px-3 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
+                >
+                  <option value="">Tous</option>
+                  {facetOptions(facets.preferred_foot, filters.preferred_foot).map(({ value, count }) => (
+                    <option key={value} value={value}>{value} ({count.toLocaleString()})</option>
+                  ))}
+                </select>
+              </div>
+
               <div>
                 <label className="block text-sm font-medium text-gray-700 mb-1">Âge min</label>
                 <input
@@ -281,6 +329,23 @@ export default function Players() {
               </div>
             </div>
 
+            <div className="flex flex-wrap gap-2 mb-4">
+              {facets.age_band.map(({ value, count }) => {
+                const [min, max] = AGE_BANDS[value] || ["", ""];
+                const active = filters.min_age === min && filters.max_age === max;
+                return (
+                  <button
+                    key={value}
+                    type="button"
+                    onClick={() => selectAgeBand(active ? null : value)}
+                    className={`px-3 py-1 rounded-full text-sm ${active ? "bg-blue-600 text-white" : "bg-gray-100 text-gray-700 hover:bg-gray-200"}`}
+                  >
+                    {value} ans ({count.toLocaleString()})
+                  </button>
+                );
+              })}
+            </div>
+
             <button onClick={resetFilters} className="text-sm text-blue-600 hover:text-blue-800 font-medium">
               ✖ Réinitialiser les filtres
             </button>
@@ -123,6 +123,18 @@ export const getPositions = async () => {
   }
 };
 
+export const getDistribution = async (attribute, params = {}) => {
+  try {
+    const response = await api.get('/stats/distribution', {
+      params: { attribute, ...params }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching distribution:', error);
+    throw error;
+  }
+};
+
 // ==================
 // FILTERS
 // ==================
@@ -157,6 +169,16 @@ export const listPositions = async () => {
   }
 };
 
+export const getFacets = async (params = {}) => {
+  try {
+    const response = await api.get('/facets', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching facets:', error);
+    throw error;
+  }
+};
+
 // ==================
 // EXPORT
 // ==================
@@ -196,8 +218,10 @@ export default {
   getNationalities,
   getClubs,
   getPositions,
+  getDistribution,
   listNationalities,
   listClubs,
   listPositions,
+  getFacets,
   exportPlayers,
 };
\ No newline at end of file